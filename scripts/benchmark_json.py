@@ -0,0 +1,149 @@
+"""Benchmarks manifest.json and layout.json parsing with each JSON backend.
+
+Usage:
+    python benchmark_json.py [packages folder]
+
+If a packages folder (such as the Community folder) is given, every
+manifest.json and layout.json inside of it is parsed. Otherwise, a corpus of
+files shaped like real packages is generated in a temporary folder.
+"""
+
+import glob
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+SCRIPT_FOLDER = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SCRIPT_FOLDER, "..", "src", "main", "python"))
+
+import lib.json_backend as json_backend  # noqa: E402
+import lib.layout as layout  # noqa: E402
+
+MANIFEST_COUNT = 500
+# number of entries of each generated layout.json, from a small livery
+# up to a large photogrammetry scenery package
+LAYOUT_SIZES = [50, 500, 5000, 50000, 200000]
+REPEAT = 3
+
+EXTENSIONS = [".PNG.DDS", ".PNG.DDS.json", ".bin", ".gltf", ".xml", ".cfg", ".BGL"]
+FOLDERS = ["SimObjects/Airplanes/Example", "texture", "model", "scenery/world", "panel"]
+
+
+def make_manifest(i: int) -> dict:
+    """Returns a manifest shaped like a real package's."""
+    return {
+        "dependencies": [
+            {"name": "fs-base-propdefinitions", "package_version": "0.1.{}".format(i)}
+        ],
+        "content_type": random.choice(["AIRCRAFT", "SCENERY", "LIVERY", "MISC"]),
+        "title": "Example Package {}".format(i),
+        "manufacturer": "Example",
+        "creator": "Example Creator {}".format(i % 37),
+        "package_version": "1.{}.{}".format(i % 10, i % 7),
+        "minimum_game_version": "1.12.13",
+        "release_notes": {
+            "neutral": {"LastUpdate": "", "OlderHistory": "Initial release. " * 5}
+        },
+        "total_package_size": str(random.randint(10 ** 5, 10 ** 10)).zfill(20),
+    }
+
+
+def make_layout(size: int) -> dict:
+    """Returns a layout shaped like a real package's."""
+    return {
+        "content": [
+            {
+                "path": "{}/{:08X}{}".format(
+                    random.choice(FOLDERS), i, random.choice(EXTENSIONS)
+                ),
+                "size": random.randint(100, 10 ** 7),
+                "date": 132500000000000000 + random.randint(0, 10 ** 12),
+            }
+            for i in range(size)
+        ]
+    }
+
+
+def generate_corpus(folder: str) -> None:
+    """Writes a corpus of manifests and layouts, some with byte order marks."""
+    for i in range(MANIFEST_COUNT):
+        package = os.path.join(folder, "package-{}".format(i))
+        os.makedirs(package)
+        encoding = "utf-8-sig" if i % 10 == 0 else "utf-8"
+        with open(os.path.join(package, "manifest.json"), "w", encoding=encoding) as f:
+            json.dump(make_manifest(i), f, indent=4)
+
+    for size in LAYOUT_SIZES:
+        package = os.path.join(folder, "layout-{}".format(size))
+        os.makedirs(package)
+        with open(os.path.join(package, "layout.json"), "w", encoding="utf8") as f:
+            json.dump(make_layout(size), f, indent=2)
+
+
+def stdlib_load(path: str) -> None:
+    """Parses a file with the standard library alone. The application used to
+    read as utf8, which fails on a byte order mark, so one is skipped here."""
+    with open(path, "r", encoding="utf-8-sig") as f:
+        json.load(f)
+
+
+def stream_summary(path: str) -> None:
+    """Summarizes a layout without keeping its entries."""
+    layout.summarize(layout.iter_layout(path))
+
+
+def summary(path: str) -> None:
+    """Summarizes a layout the way the application does."""
+    layout.summarize_layout(path)
+
+
+def bench(name: str, func, paths: list) -> None:
+    """Times a parse function over every path, keeping the best run."""
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        for path in paths:
+            func(path)
+        best = min(best, time.perf_counter() - start)
+
+    print("  {:<28} {:>10.1f} ms".format(name, best * 1000))
+
+
+def main() -> None:
+    tmp_folder = None
+
+    if len(sys.argv) > 1:
+        folder = sys.argv[1]
+    else:
+        tmp_folder = tempfile.mkdtemp()
+        folder = tmp_folder
+        print("Generating corpus in {}".format(folder))
+        generate_corpus(folder)
+
+    try:
+        manifests = glob.glob(os.path.join(folder, "*", "manifest.json"))
+        layouts = glob.glob(os.path.join(folder, "*", "layout.json"))
+
+        print("JSON backend: {}".format(json_backend.BACKEND))
+
+        print("{} manifest.json files".format(len(manifests)))
+        bench("json", stdlib_load, manifests)
+        bench("json_backend", json_backend.load_file, manifests)
+
+        print("{} layout.json files".format(len(layouts)))
+        bench("json", stdlib_load, layouts)
+        bench("json_backend", json_backend.load_file, layouts)
+        bench("layout.load_layout", layout.load_layout, layouts)
+        bench("layout streaming summary", stream_summary, layouts)
+        bench("layout.summarize_layout", summary, layouts)
+    finally:
+        if tmp_folder:
+            shutil.rmtree(tmp_folder)
+
+
+if __name__ == "__main__":
+    main()
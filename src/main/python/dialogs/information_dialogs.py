@@ -43,3 +43,89 @@ def mod_install_folder_set(parent: QWidget, folder: str) -> None:
         TITLE,
         "The mod install folder has been set to {}".format(folder),
     )
+
+
+def mod_layouts_generated(parent: QWidget, mods: List[str]) -> None:
+    if not mods:
+        message = "Every mod layout is already up to date."
+    else:
+        message = "{} mod layout(s) rewritten!\n{}".format(
+            len(mods), "\n".join("- {}".format(mod) for mod in mods)
+        )
+
+    QMessageBox().information(parent, TITLE, message)
+
+
+def mod_folders_cleaned(parent: QWidget, folders: List[str]) -> None:
+    if not folders:
+        message = "No orphaned links or empty folders were found."
+    else:
+        message = "{} orphaned link(s) and empty folder(s) removed!\n{}".format(
+            len(folders), "\n".join("- {}".format(folder) for folder in folders)
+        )
+
+    QMessageBox().information(parent, TITLE, message)
+
+
+def mod_links_ok(parent: QWidget) -> None:
+    QMessageBox().information(
+        parent, TITLE, "Every mod link points to the mod install folder."
+    )
+
+
+def mod_links_repaired(parent: QWidget, links: List[str]) -> None:
+    QMessageBox().information(
+        parent,
+        TITLE,
+        "{} mod link(s) repaired!\n{}".format(
+            len(links), "\n".join("- {}".format(link) for link in links)
+        ),
+    )
+
+
+def no_mod_libraries(parent: QWidget) -> None:
+    QMessageBox().information(
+        parent, TITLE, "There are no mod libraries besides the mod install folder."
+    )
+
+
+def mod_libraries_rebalanced(parent: QWidget, mods: List[str]) -> None:
+    if not mods:
+        message = "The mod libraries are already balanced."
+    else:
+        message = "{} mod(s) moved between libraries!\n{}".format(
+            len(mods), "\n".join("- {}".format(mod) for mod in mods)
+        )
+
+    QMessageBox().information(parent, TITLE, message)
+
+
+def mods_packed(parent: QWidget, mods: List[str], saved: str) -> None:
+    if not mods:
+        message = "There are no disabled mods to pack."
+    else:
+        message = "{} mod(s) packed, saving {}!\n{}".format(
+            len(mods), saved, "\n".join("- {}".format(mod) for mod in mods)
+        )
+
+    QMessageBox().information(parent, TITLE, message)
+
+
+def mod_files_deduplicated(parent: QWidget, linked: int, freed: str) -> None:
+    if not linked:
+        message = "No duplicate mod files were found."
+    else:
+        message = "{} duplicate mod file(s) linked, freeing {}!".format(linked, freed)
+
+    QMessageBox().information(parent, TITLE, message)
+
+
+def mods_verified(parent: QWidget, deep: bool = False) -> None:
+    message = "No problems were found with any mod."
+    if deep:
+        message += "\nFile contents are compared to the last time they were checked, so the first check of a mod's contents only records them."
+    QMessageBox().information(parent, TITLE, message)
+
+
+def no_mod_conflicts(parent: QWidget) -> None:
+    QMessageBox().information(parent, TITLE, "No enabled mods provide the same files.")
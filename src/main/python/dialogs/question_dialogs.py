@@ -1,8 +1,18 @@
+from typing import Dict, List
+
 from PySide2.QtWidgets import QMessageBox, QWidget
 
 TITLE = "Question"
 
 
+def format_problems(problems: Dict[str, List[str]]) -> str:
+    """Formats a mapping of mod names to problems, one mod per line."""
+    return "\n".join(
+        "- {}: {}".format(name, ", ".join(items))
+        for name, items in sorted(problems.items())
+    )
+
+
 def backup_success(parent: QWidget, archive) -> bool:
     result = QMessageBox().question(
         parent,
@@ -40,3 +50,66 @@ def mod_install_folder_move(parent: QWidget, before: str, after: str) -> bool:
         QMessageBox.No,  # type: ignore
     )
     return result == QMessageBox.Yes
+
+
+def mod_missing_dependencies(parent: QWidget, missing: Dict[str, List[str]]) -> bool:
+    result = QMessageBox().warning(
+        parent,
+        TITLE,
+        "The following mod(s) depend on packages that are not available:\n\n{}\n\n"
+        "Are you sure you want to enable them?".format(format_problems(missing)),
+        QMessageBox.Yes | QMessageBox.No,  # type: ignore
+        QMessageBox.No,  # type: ignore
+    )
+    return result == QMessageBox.Yes
+
+
+def mod_dependents(parent: QWidget, dependents: Dict[str, List[str]]) -> bool:
+    result = QMessageBox().warning(
+        parent,
+        TITLE,
+        "Other enabled mods depend on the following mod(s):\n\n{}\n\n"
+        "Are you sure you want to continue?".format(format_problems(dependents)),
+        QMessageBox.Yes | QMessageBox.No,  # type: ignore
+        QMessageBox.No,  # type: ignore
+    )
+    return result == QMessageBox.Yes
+
+
+def mod_folders_clean(parent: QWidget, folders: List[str]) -> bool:
+    result = QMessageBox().question(
+        parent,
+        TITLE,
+        "The following orphaned link(s) and empty folder(s) will be removed:\n{}\n\nWould you like to continue?".format(
+            "\n".join("- {}".format(folder) for folder in folders)
+        ),
+        QMessageBox.Yes | QMessageBox.No,  # type: ignore
+        QMessageBox.No,  # type: ignore
+    )
+    return result == QMessageBox.Yes
+
+
+def mod_links_repair(parent: QWidget, links: List[str], repairable: int) -> bool:
+    result = QMessageBox().question(
+        parent,
+        TITLE,
+        "Mod link(s) point outside of the mod install folder, or to folders that no longer exist:\n{}\n\n{} of them can be pointed to the copy of the mod in the mod install folder. Would you like to repair them?".format(
+            "\n".join("- {}".format(link) for link in links), repairable
+        ),
+        QMessageBox.Yes | QMessageBox.No,  # type: ignore
+        QMessageBox.Yes,  # type: ignore
+    )
+    return result == QMessageBox.Yes
+
+
+def mod_install_folder_resume(parent: QWidget, before: str, after: str) -> bool:
+    result = QMessageBox().question(
+        parent,
+        TITLE,
+        "A move of the mod install folder from {} to {} was interrupted. Would you like to resume it?".format(
+            before, after
+        ),
+        QMessageBox.Yes | QMessageBox.No,  # type: ignore
+        QMessageBox.Yes,  # type: ignore
+    )
+    return result == QMessageBox.Yes
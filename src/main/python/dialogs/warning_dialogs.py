@@ -50,3 +50,123 @@ def mod_install_folder_in_sim_path(parent: QWidget) -> None:
         "The mod install folder you've selected contains the same path"
         + " as the simulator. You, more than likely, do not want this.",
     )
+
+
+def mod_layouts(parent: QWidget, mods: List[str]) -> None:
+    QMessageBox().warning(
+        parent,
+        TITLE,
+        "Unable to write the layout.json of mod(s):\n{} \nSee the debug log for more info.".format(
+            "\n".join("- {}".format(mod) for mod in mods)
+        ),
+    )
+
+
+def mod_layout_parsing(parent: QWidget, mods: List[str]) -> None:
+    QMessageBox().warning(
+        parent,
+        TITLE,
+        "Unable to verify mod(s):\n{} \nThis is likely due to a corrupt layout.json file. See the debug log for more info.".format(
+            "\n".join("- {}".format(mod) for mod in mods)
+        ),
+    )
+
+
+def mods_damaged(parent: QWidget, mods: List[str]) -> None:
+    QMessageBox().warning(
+        parent,
+        TITLE,
+        "{} mod(s) are damaged or were not fully copied:\n{}".format(
+            len(mods), "\n".join("- {}".format(mod) for mod in mods)
+        ),
+    )
+
+
+def mod_conflicts(parent: QWidget, conflicts: List[str]) -> None:
+    QMessageBox().warning(
+        parent,
+        TITLE,
+        "Enabled mods provide the same files, and only one of each will be used:\n{}".format(
+            "\n".join("- {}".format(conflict) for conflict in conflicts)
+        ),
+    )
+
+
+def mod_folders_not_cleaned(parent: QWidget, folders: List[str]) -> None:
+    QMessageBox().warning(
+        parent,
+        TITLE,
+        "Unable to remove folder(s):\n{} \nSee the debug log for more info.".format(
+            "\n".join("- {}".format(folder) for folder in folders)
+        ),
+    )
+
+
+def mod_folders_unreadable(parent: QWidget, folders: List[str]) -> None:
+    QMessageBox().warning(
+        parent,
+        TITLE,
+        "Folder(s) could not be read, and were left alone:\n{} \nSee the debug log for more info.".format(
+            "\n".join("- {}".format(folder) for folder in folders)
+        ),
+    )
+
+
+def mod_duplicates(parent: QWidget, folders: List[str]) -> None:
+    QMessageBox().warning(
+        parent,
+        TITLE,
+        "Mod(s) copied into the Community folder also have a copy in the mod install folder, and were left alone:\n{}".format(
+            "\n".join("- {}".format(folder) for folder in folders)
+        ),
+    )
+
+
+def mod_links(parent: QWidget, links: List[str]) -> None:
+    QMessageBox().warning(
+        parent,
+        TITLE,
+        "Mod link(s) point outside of the mod install folder, or to folders that no longer exist, and no copy of them was found in the mod install folder:\n{}".format(
+            "\n".join("- {}".format(link) for link in links)
+        ),
+    )
+
+
+def mod_links_not_repaired(parent: QWidget, links: List[str]) -> None:
+    QMessageBox().warning(
+        parent,
+        TITLE,
+        "Unable to repair mod link(s):\n{} \nSee the debug log for more info.".format(
+            "\n".join("- {}".format(link) for link in links)
+        ),
+    )
+
+
+def mods_not_packed(parent: QWidget, mods: List[str]) -> None:
+    QMessageBox().warning(
+        parent,
+        TITLE,
+        "Unable to pack mod(s):\n{} \nSee the debug log for more info.".format(
+            "\n".join("- {}".format(mod) for mod in mods)
+        ),
+    )
+
+
+def mod_files_not_deduplicated(parent: QWidget, files: List[str]) -> None:
+    QMessageBox().warning(
+        parent,
+        TITLE,
+        "Unable to link duplicate mod file(s):\n{} \nSee the debug log for more info.".format(
+            "\n".join("- {}".format(file) for file in files)
+        ),
+    )
+
+
+def mods_not_moved(parent: QWidget, mods: List[str]) -> None:
+    QMessageBox().warning(
+        parent,
+        TITLE,
+        "Unable to move mod(s) between libraries:\n{} \nSee the debug log for more info.".format(
+            "\n".join("- {}".format(mod) for mod in mods)
+        ),
+    )
@@ -0,0 +1,217 @@
+import functools
+import inspect
+import os
+import sys
+import threading
+from collections import OrderedDict, namedtuple
+from typing import Any, Callable, Hashable, Tuple, Union
+
+# statistics of a cache, similar to what functools.lru_cache reports
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "entries", "size", "budget"])
+
+# value returned on a cache miss, as None can be a cached value
+MISSING = object()
+
+
+class budget_cache:
+    """Least recently used cache that is bounded by the total size of its values,
+    rather than by the number of entries."""
+
+    def __init__(self, budget: int, size_func: Callable[[Any], int] = None) -> None:
+        """Initialize the cache with a budget in bytes and a function that
+        returns the size of a value in bytes. Without a size function, every
+        value counts as one, and the budget is a number of entries."""
+        self.budget = budget
+        self.size_func = size_func or (lambda value: 1)
+
+        self.entries = OrderedDict()  # type: OrderedDict
+        self.sizes = {}  # type: dict
+        self.total_size = 0
+
+        self.hits = 0
+        self.misses = 0
+
+        # values are added from worker threads as well as the main thread
+        self.lock = threading.RLock()
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self.lock:
+            return key in self.entries
+
+    def __len__(self) -> int:
+        with self.lock:
+            return len(self.entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Returns a cached value, and marks it as recently used."""
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return default
+
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Adds a value to the cache, evicting the least recently used values
+        until the cache fits in its budget again."""
+        size = self.size_func(value)
+
+        with self.lock:
+            self.invalidate(key)
+
+            if size > self.budget:
+                # would push everything else out, and still not fit
+                return
+
+            self.entries[key] = value
+            self.sizes[key] = size
+            self.total_size += size
+
+            while self.total_size > self.budget:
+                self.invalidate(next(iter(self.entries)))
+
+    def invalidate(self, key: Hashable) -> None:
+        """Removes a single value from the cache, if it exists."""
+        with self.lock:
+            if key in self.entries:
+                del self.entries[key]
+                self.total_size -= self.sizes.pop(key)
+
+    def invalidate_matching(self, predicate: Callable[[Hashable], bool]) -> None:
+        """Removes every value whose key passes the given test."""
+        with self.lock:
+            for key in [key for key in self.entries if predicate(key)]:
+                self.invalidate(key)
+
+    def clear(self) -> None:
+        """Removes every value from the cache."""
+        with self.lock:
+            self.entries.clear()
+            self.sizes.clear()
+            self.total_size = 0
+
+    def cache_info(self) -> CacheInfo:
+        """Returns the hit and miss counts, and how full the cache is."""
+        with self.lock:
+            return CacheInfo(
+                self.hits, self.misses, len(self.entries), self.total_size, self.budget
+            )
+
+
+def fingerprint(path: str) -> Union[Tuple[int, int, int], None]:
+    """Returns a fingerprint of a path's stat, which changes when it is modified,
+    replaced or moved. Returns None if the path does not exist."""
+    try:
+        stats = os.stat(path)
+    except OSError:
+        return None
+
+    return (stats.st_mtime_ns, stats.st_ctime_ns, stats.st_size)
+
+
+def estimate_size(value: Any) -> int:
+    """Returns roughly how much memory a parsed JSON-like value uses, in bytes."""
+    size = sys.getsizeof(value)
+
+    if isinstance(value, dict):
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(estimate_size(v) for v in value)
+    elif hasattr(value, "__slots__"):
+        size += sum(estimate_size(getattr(value, k)) for k in value.__slots__)
+
+    return size
+
+
+class stat_cache(budget_cache):
+    """Cache whose values are each tied to a path on disk. A value is only
+    returned while the stat fingerprint of its path is unchanged, and values
+    can be invalidated for everything inside of a single folder."""
+
+    def __init__(self, budget: int, size_func: Callable[[Any], int] = None) -> None:
+        """Initialize the cache. The size function is given cached values, not
+        the path and fingerprint stored alongside them."""
+        value_size = size_func or (lambda value: 1)
+        super().__init__(budget, size_func=lambda entry: value_size(entry[2]))
+
+    def get_valid(self, key: Hashable, path: str = None) -> Any:
+        """Returns a cached value if its path has not changed since it was cached,
+        otherwise MISSING."""
+        entry = self.get(key, MISSING)
+        if entry is MISSING:
+            return MISSING
+
+        cached_path, cached_fingerprint, value = entry
+
+        if cached_path != path or (
+            path is not None and fingerprint(path) != cached_fingerprint
+        ):
+            # the hit was stale, count it as a miss instead
+            with self.lock:
+                self.hits -= 1
+                self.misses += 1
+            self.invalidate(key)
+            return MISSING
+
+        return value
+
+    def put_valid(
+        self, key: Hashable, value: Any, path: str = None, fp: Any = MISSING
+    ) -> None:
+        """Caches a value, along with the stat fingerprint of its path. Pass the
+        fingerprint taken before the value was built, so that a change made
+        while building it is not missed."""
+        if fp is MISSING:
+            fp = fingerprint(path) if path is not None else None
+        self.put(key, (path, fp, value))
+
+    def invalidate_path(self, folder: str) -> None:
+        """Removes every value tied to a path inside of the given folder."""
+        folder = os.path.normcase(os.path.normpath(folder))
+
+        def inside(key: Hashable) -> bool:
+            path = self.entries[key][0]
+            if path is None:
+                return False
+
+            path = os.path.normcase(os.path.normpath(path))
+            return path == folder or path.startswith(folder + os.sep)
+
+        self.invalidate_matching(inside)
+
+
+def cached_method(cache_attr: str, path_func: Callable = None) -> Callable:
+    """Decorates an instance method so its results are kept in the stat_cache
+    stored on the given attribute of the instance, rather than a global cache
+    that keeps the instance alive.
+
+    Results are keyed by the method name and arguments. If a path function is
+    given, it is called with the same arguments, and results are only reused
+    while the path it returns has not changed on disk."""
+
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+            # bind so that default and keyword arguments give the same key
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            key = (func.__name__,) + bound.args[1:]
+
+            method_cache = getattr(self, cache_attr)
+            path = path_func(*bound.args) if path_func else None
+
+            value = method_cache.get_valid(key, path)
+            if value is MISSING:
+                fp = fingerprint(path) if path is not None else None
+                value = func(self, *args, **kwargs)
+                method_cache.put_valid(key, value, path, fp=fp)
+
+            return value
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,330 @@
+import concurrent.futures
+import os
+import shutil
+import threading
+import time
+import zipfile
+from typing import Any, Callable, Dict, List, Tuple, Union
+
+from loguru import logger
+
+import lib.config as config
+import lib.files as files
+import lib.json_backend as json_backend
+import lib.type_helper as type_helper
+import lib.walker as walker
+from lib.mod_record import mod_record
+
+COLD_INDEX_VERSION = 1
+# suffix of the archive a disabled mod is packed into, next to where its
+# folder was
+ARCHIVE_EXTENSION = ".msfsmod.zip"
+# suffix of archives and folders that are still being written
+PARTIAL_EXTENSION = ".partial"
+# formats that are already compressed, and are stored as they are. DDS
+# textures are block compressed, and barely shrink for the time it takes
+STORED_EXTENSIONS = {
+    ".dds",
+    ".ktx2",
+    ".png",
+    ".jpg",
+    ".jpeg",
+    ".webp",
+    ".ogg",
+    ".mp3",
+    ".wem",
+    ".bnk",
+    ".zip",
+    ".7z",
+    ".cab",
+}
+# number of files extracted at once
+EXTRACT_WORKERS = 8
+# bytes read from the archive at a time, so large files are never held in memory
+CHUNK_SIZE = 1024 * 1024
+
+
+class PackError(Exception):
+    """Raised when a mod folder cannot be packed completely, or its archive does
+    not match it."""
+
+
+class link_visitor(walker.visitor):
+    """Refuses linked folders, which an archive cannot hold."""
+
+    def visit_link(self, entry: os.DirEntry, rel_folder: str) -> None:
+        raise PackError("{} is a linked folder".format(entry.path))
+
+
+def is_enabled() -> bool:
+    """Returns if disabled mods are packed into archives."""
+    succeeded, value = config.get_key_value(config.COLD_STORAGE_KEY)
+    return succeeded and type_helper.str2bool(value)
+
+
+def set_enabled(enabled: bool) -> None:
+    """Writes if disabled mods are packed into archives."""
+    config.set_key_value(config.COLD_STORAGE_KEY, enabled)
+
+
+def get_archive_path(mod_folder: str) -> str:
+    """Returns the path of the archive a mod folder is packed into."""
+    return mod_folder + ARCHIVE_EXTENSION
+
+
+def get_compression(filename: str) -> int:
+    """Returns how a file is compressed in an archive."""
+    if os.path.splitext(filename)[1].lower() in STORED_EXTENSIONS:
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+def pack(
+    mod_folder: str, archive: str, update_func: Callable = None
+) -> Tuple[int, int, int]:
+    """Packs a mod folder into an archive. Written to a temporary file first, so
+    an interrupted pack never leaves a broken archive behind. Anything that
+    cannot be read raises, rather than being left out. Returns the number of
+    members, the size of the files packed, and the size of the archive."""
+    partial = archive + PARTIAL_EXTENSION
+    members = 0
+    size = 0
+
+    try:
+        with zipfile.ZipFile(partial, "w", allowZip64=True) as zf:
+            for rel_folder, entries in walker.walker(strict=True).iter_folders(
+                mod_folder, [link_visitor()]
+            ):
+                folder = os.path.join(mod_folder, rel_folder)
+                arc_folder = os.path.normpath(rel_folder).replace(os.sep, "/")
+
+                if arc_folder != os.curdir:
+                    # keeps empty folders as well
+                    zf.write(folder, arc_folder)
+                    members += 1
+
+                for entry, stats in entries:
+                    members += 1
+                    size += stats.st_size
+                    arcname = entry.name
+                    if arc_folder != os.curdir:
+                        arcname = arc_folder + "/" + arcname
+
+                    if update_func:
+                        update_func("Packing {}".format(arcname))
+
+                    zf.write(
+                        entry.path, arcname, compress_type=get_compression(entry.name)
+                    )
+    except BaseException:
+        if os.path.isfile(partial):
+            os.remove(partial)
+        raise
+
+    os.replace(partial, archive)
+    return (members, size, os.path.getsize(archive))
+
+
+def verify_archive(archive: str, members: int, size: int) -> None:
+    """Checks that an archive holds as many members and bytes as were packed
+    into it, and that every member reads back intact."""
+    try:
+        with zipfile.ZipFile(archive) as zf:
+            infos = zf.infolist()
+            archived_size = sum(info.file_size for info in infos)
+            if len(infos) != members or archived_size != size:
+                raise PackError(
+                    "{} has {} members and {} bytes, {} and {} expected".format(
+                        archive, len(infos), archived_size, members, size
+                    )
+                )
+
+            bad_member = zf.testzip()
+    except zipfile.BadZipFile as e:
+        raise PackError("{} is not a valid archive: {}".format(archive, e))
+
+    if bad_member is not None:
+        raise PackError("{} is corrupt in {}".format(bad_member, archive))
+
+
+def get_target(folder: str, info: zipfile.ZipInfo) -> str:
+    """Returns where a member of an archive is extracted to, refusing paths that
+    would end up outside of the folder."""
+    target = os.path.normpath(os.path.join(folder, *info.filename.split("/")))
+    if os.path.commonpath([folder, target]) != folder:
+        raise ValueError("Archive member {} is outside of {}".format(info, folder))
+    return target
+
+
+def unpack(
+    archive: str,
+    mod_folder: str,
+    workers: int = EXTRACT_WORKERS,
+    update_func: Callable = None,
+    percent_func: Callable = None,
+) -> None:
+    """Extracts an archive into a mod folder. Members are streamed straight to
+    disk, many at a time, largest first, with each thread reading through its
+    own handle of the archive. Extracted to a temporary folder first, which is
+    renamed into place once everything is there."""
+    partial = os.path.normpath(mod_folder + PARTIAL_EXTENSION)
+    files.delete_folder(partial)
+    os.makedirs(partial)
+
+    with zipfile.ZipFile(archive) as zf:
+        members = sorted(zf.infolist(), key=lambda info: info.file_size, reverse=True)
+
+    # zip files cannot be read from more than one thread through one handle
+    local = threading.local()
+    handles = []  # type: List[zipfile.ZipFile]
+
+    def extract(info: zipfile.ZipInfo) -> None:
+        target = get_target(partial, info)
+        if info.filename.endswith("/"):
+            os.makedirs(target, exist_ok=True)
+            return
+
+        if not hasattr(local, "zf"):
+            local.zf = zipfile.ZipFile(archive)
+            handles.append(local.zf)
+
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with local.zf.open(info) as src, open(target, "wb") as dest:
+            shutil.copyfileobj(src, dest, CHUNK_SIZE)
+
+        # restore the modification date, as files were packed with it
+        mtime = time.mktime(info.date_time + (0, 0, -1))
+        os.utime(target, (mtime, mtime))
+
+    try:
+        with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+            futures = [executor.submit(extract, info) for info in members]
+
+            for i, future in enumerate(concurrent.futures.as_completed(futures)):
+                future.result()
+                if percent_func:
+                    percent_func((i, len(members)))
+    except BaseException:
+        files.delete_folder(partial)
+        raise
+    finally:
+        for handle in handles:
+            handle.close()
+
+    if update_func:
+        update_func("Restoring {}".format(mod_folder))
+
+    files.delete_folder(mod_folder)
+    os.rename(partial, mod_folder)
+
+
+class cold_mod:
+    """A mod packed into an archive, with the record it had as a folder."""
+
+    __slots__ = ("record", "archive", "packed_size")
+
+    def __init__(self, record: mod_record, archive: str, packed_size: int) -> None:
+        self.record = record
+        self.archive = archive
+        self.packed_size = packed_size
+
+    @property
+    def mod_folder(self) -> str:
+        """Returns the folder the mod is restored to."""
+        return self.archive[: -len(ARCHIVE_EXTENSION)]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the mod as a dictionary, such as for saving to JSON."""
+        return {
+            "record": self.record.to_dict(),
+            "archive": self.archive,
+            "packed_size": self.packed_size,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "cold_mod":
+        """Creates a mod from a dictionary, as produced by to_dict."""
+        return cls(
+            mod_record.from_dict(data["record"]), data["archive"], data["packed_size"]
+        )
+
+
+class cold_index:
+    """Index of the mods packed into archives, so they are still listed with
+    their manifest data without opening any archive."""
+
+    def __init__(self) -> None:
+        # mod folder name to packed mod
+        self.mods = {}  # type: Dict[str, cold_mod]
+        self.loaded = False
+
+        # the index is updated from worker threads
+        self.lock = threading.RLock()
+
+    def load(self) -> None:
+        """Loads the index from disk, the first time it is needed."""
+        with self.lock:
+            if self.loaded:
+                return
+            self.loaded = True
+
+            if not os.path.isfile(config.COLD_INDEX_FILE):
+                return
+
+            try:
+                data = json_backend.load_file(config.COLD_INDEX_FILE)
+            except Exception:
+                logger.exception("Cold storage index could not be parsed")
+                return
+
+            if data.get("version") != COLD_INDEX_VERSION:
+                logger.debug("Cold storage index version mismatch, ignoring")
+                return
+
+            for item in data["mods"]:
+                mod = cold_mod.from_dict(item)
+                self.mods[mod.record.folder_name] = mod
+
+    def save(self) -> None:
+        """Writes the index to disk."""
+        with self.lock:
+            try:
+                json_backend.write_file(
+                    config.COLD_INDEX_FILE,
+                    {
+                        "version": COLD_INDEX_VERSION,
+                        "mods": [mod.to_dict() for mod in self.mods.values()],
+                    },
+                )
+            except Exception:
+                logger.exception("Cold storage index could not be written")
+
+    def add(self, record: mod_record, archive: str, packed_size: int) -> None:
+        """Adds a packed mod to the index."""
+        with self.lock:
+            self.load()
+            self.mods[record.folder_name] = cold_mod(record, archive, packed_size)
+
+    def remove(self, name: str) -> Union[cold_mod, None]:
+        """Removes a mod from the index, and returns it if it was there."""
+        with self.lock:
+            self.load()
+            return self.mods.pop(name, None)
+
+    def get(self, name: str) -> Union[cold_mod, None]:
+        """Returns a packed mod, if its archive still exists."""
+        with self.lock:
+            self.load()
+            mod = self.mods.get(name)
+            if mod is not None and not os.path.isfile(mod.archive):
+                logger.warning("Archive of {} is missing".format(name))
+                return None
+            return mod
+
+    def records(self) -> List[mod_record]:
+        """Returns the records of every packed mod whose archive still exists."""
+        with self.lock:
+            self.load()
+            return [
+                mod.record for mod in self.mods.values() if os.path.isfile(mod.archive)
+            ]
@@ -9,11 +9,21 @@ BASE_FOLDER = os.path.abspath(os.path.join(os.getenv("APPDATA"), "MSFS Mod Manag
 DEBUG_LOG = os.path.join(BASE_FOLDER, "debug.log")
 
 CONFIG_FILE = os.path.join(BASE_FOLDER, "config.ini")
+MOD_SNAPSHOT_FILE = os.path.join(BASE_FOLDER, "mods.json")
+HASHES_FOLDER = os.path.join(BASE_FOLDER, "hashes")
+CONFLICT_INDEX_FILE = os.path.join(BASE_FOLDER, "conflicts.json")
+OFFICIAL_INVENTORY_FILE = os.path.join(BASE_FOLDER, "official.json")
+MOVE_PLAN_FILE = os.path.join(BASE_FOLDER, "move.json")
+COLD_INDEX_FILE = os.path.join(BASE_FOLDER, "cold.json")
+DEDUP_INDEX_FILE = os.path.join(BASE_FOLDER, "dedup.json")
 SECTION_KEY = "settings"
 
 SIM_FOLDER_KEY = "sim_folder"
 # this key is kept as-is for legacy purposes
 MOD_INSTALL_FOLDER_KEY = "mod_cache_folder"
+MOD_LIBRARIES_KEY = "mod_libraries"
+PLACEMENT_POLICY_KEY = "placement_policy"
+COLD_STORAGE_KEY = "cold_storage"
 LAST_OPEN_FOLDER_KEY = "last_open_folder"
 
 LAST_VER_CHECK_KEY = "last_version_check"
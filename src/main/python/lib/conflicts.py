@@ -0,0 +1,159 @@
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Set
+
+from loguru import logger
+
+import lib.config as config
+import lib.json_backend as json_backend
+
+CONFLICT_INDEX_VERSION = 1
+
+
+def path_key(path: str) -> str:
+    """Returns a layout path in the form it is compared in. The sim's virtual
+    file system does not care about case, or which slashes are used."""
+    return path.replace("\\", "/").lower()
+
+
+class conflict_index:
+    """Inverted index of the files each mod provides, built from their layout.json
+    files. Answers which mods provide the same file, without reading every
+    layout again. Persisted, and updated one mod at a time."""
+
+    def __init__(self) -> None:
+        # mod folder name to the layout.json fingerprint it was indexed at,
+        # and the file paths it provides
+        self.mods = {}  # type: Dict[str, Dict[str, Any]]
+        # file path to the names of the mods that provide it
+        self.providers = {}  # type: Dict[str, Set[str]]
+        self.loaded = False
+        self.dirty = False
+
+        # the index is updated from worker threads
+        self.lock = threading.RLock()
+
+    def load(self) -> None:
+        """Loads the index from disk, the first time it is needed."""
+        with self.lock:
+            if self.loaded:
+                return
+            self.loaded = True
+
+            if not os.path.isfile(config.CONFLICT_INDEX_FILE):
+                return
+
+            try:
+                data = json_backend.load_file(config.CONFLICT_INDEX_FILE)
+            except Exception:
+                logger.exception("Conflict index could not be parsed")
+                return
+
+            if data.get("version") != CONFLICT_INDEX_VERSION:
+                logger.debug("Conflict index version mismatch, ignoring")
+                return
+
+            for name, mod in data["mods"].items():
+                self.add(name, tuple(mod["fingerprint"]), mod["paths"])
+
+            self.dirty = False
+
+    def save(self) -> None:
+        """Writes the index to disk, if it changed."""
+        with self.lock:
+            if not self.dirty:
+                return
+
+            try:
+                json_backend.write_file(
+                    config.CONFLICT_INDEX_FILE,
+                    {"version": CONFLICT_INDEX_VERSION, "mods": self.mods},
+                )
+                self.dirty = False
+            except Exception:
+                logger.exception("Conflict index could not be written")
+
+    def is_current(self, name: str, fingerprint: Any) -> bool:
+        """Returns if a mod is indexed at the given layout.json fingerprint."""
+        with self.lock:
+            self.load()
+            mod = self.mods.get(name)
+            return mod is not None and tuple(mod["fingerprint"]) == fingerprint
+
+    def add(self, name: str, fingerprint: Any, paths: Iterable[str]) -> None:
+        """Indexes the file paths of a mod, replacing what it provided before."""
+        with self.lock:
+            self.remove(name)
+
+            keys = sorted({path_key(path) for path in paths})
+            self.mods[name] = {"fingerprint": list(fingerprint), "paths": keys}
+
+            for key in keys:
+                self.providers.setdefault(key, set()).add(name)
+
+            self.dirty = True
+
+    def remove(self, name: str) -> None:
+        """Removes a mod from the index."""
+        with self.lock:
+            mod = self.mods.pop(name, None)
+            if mod is None:
+                return
+
+            for key in mod["paths"]:
+                providers = self.providers[key]
+                providers.discard(name)
+                if not providers:
+                    del self.providers[key]
+
+            self.dirty = True
+
+    def prune(self, names: Iterable[str]) -> None:
+        """Removes every mod that is not one of the given names."""
+        with self.lock:
+            self.load()
+            keep = set(names)
+            for name in [name for name in self.mods if name not in keep]:
+                self.remove(name)
+
+    def get_conflicts(self, name: str, enabled: Set[str]) -> Dict[str, List[str]]:
+        """Returns the files of a mod that other enabled mods provide as well,
+        mapped to the names of those other mods."""
+        with self.lock:
+            self.load()
+            mod = self.mods.get(name)
+            if mod is None:
+                return {}
+
+            conflicts = {}
+            for key in mod["paths"]:
+                providers = self.providers[key]
+                if len(providers) > 1:
+                    others = sorted(p for p in providers if p != name and p in enabled)
+                    if others:
+                        conflicts[key] = others
+
+            return conflicts
+
+    def get_all_conflicts(self, enabled: Set[str]) -> Dict[str, Dict[str, int]]:
+        """Returns every enabled mod that shares files with another enabled mod,
+        mapped to those other mods and how many files they share."""
+        with self.lock:
+            self.load()
+            conflicts = {}  # type: Dict[str, Dict[str, int]]
+
+            for providers in self.providers.values():
+                if len(providers) < 2:
+                    continue
+
+                active = [p for p in providers if p in enabled]
+                if len(active) < 2:
+                    continue
+
+                for name in active:
+                    counts = conflicts.setdefault(name, {})
+                    for other in active:
+                        if other != name:
+                            counts[other] = counts.get(other, 0) + 1
+
+            return conflicts
@@ -0,0 +1,298 @@
+import concurrent.futures
+import os
+import stat
+import threading
+from typing import Callable, Dict, Iterable, List, Set, Tuple
+
+from loguru import logger
+
+import lib.cache as cache
+import lib.config as config
+import lib.files as files
+import lib.json_backend as json_backend
+import lib.walker as walker
+
+DEDUP_INDEX_VERSION = 2
+# files smaller than this are left alone, as linking them saves little
+MIN_SIZE = 64 * 1024
+# files the mod manager rewrites, which are kept as copies of their own
+EXCLUDED_FILES = {"manifest.json", "layout.json"}
+# number of files hashed at once
+HASH_WORKERS = 8
+# suffix of a link that is about to replace a duplicate
+LINK_EXTENSION = ".dedup"
+
+# a path with its stats
+StatEntry = Tuple[str, os.stat_result]
+
+
+class dedup_index:
+    """Content hashes of mod files, with the fingerprint each was hashed at.
+    Kept across runs, so only files that changed since are hashed again."""
+
+    def __init__(self) -> None:
+        # file path to its stat fingerprint and hash
+        self.files = {}  # type: Dict[str, Tuple[int, int, int, str]]
+        self.loaded = False
+
+        # the index is updated from worker threads
+        self.lock = threading.RLock()
+
+    def load(self) -> None:
+        """Loads the index from disk, the first time it is needed."""
+        with self.lock:
+            if self.loaded:
+                return
+            self.loaded = True
+
+            if not os.path.isfile(config.DEDUP_INDEX_FILE):
+                return
+
+            try:
+                data = json_backend.load_file(config.DEDUP_INDEX_FILE)
+            except Exception:
+                logger.exception("Deduplication index could not be parsed")
+                return
+
+            if data.get("version") != DEDUP_INDEX_VERSION:
+                logger.debug("Deduplication index version mismatch, ignoring")
+                return
+
+            self.files = {path: tuple(item) for path, item in data["files"].items()}
+
+    def save(self) -> None:
+        """Writes the index to disk."""
+        with self.lock:
+            try:
+                json_backend.write_file(
+                    config.DEDUP_INDEX_FILE,
+                    {"version": DEDUP_INDEX_VERSION, "files": self.files},
+                )
+            except Exception:
+                logger.exception("Deduplication index could not be written")
+
+    def get(self, path: str) -> str:
+        """Returns the hash of a file, if it has not changed since it was hashed."""
+        with self.lock:
+            self.load()
+            item = self.files.get(path)
+            if item is None or tuple(item[:3]) != cache.fingerprint(path):
+                return ""
+            return item[3]
+
+    def set(self, path: str, h: str) -> None:
+        """Records the hash of a file, at its current fingerprint."""
+        with self.lock:
+            self.load()
+            fp = cache.fingerprint(path)
+            if fp is not None:
+                self.files[path] = fp + (h,)
+
+    def prune(self, paths: Set[str]) -> None:
+        """Forgets every file that is not one of the given paths."""
+        with self.lock:
+            self.load()
+            self.files = {
+                path: item for path, item in self.files.items() if path in paths
+            }
+
+
+def find_candidates(mod_folders: Iterable[str]) -> List[List[str]]:
+    """Walks mod folders, and returns the files that could be duplicates: those
+    of the same size on the same drive, as only they can be linked together."""
+    # drive and size to file paths
+    sizes = {}  # type: Dict[Tuple[int, int], List[str]]
+
+    for mod_folder in mod_folders:
+        device = os.stat(mod_folder).st_dev
+
+        for _, entries in walker.walker().iter_folders(mod_folder):
+            for entry, stats in entries:
+                if stats.st_size < MIN_SIZE or entry.name in EXCLUDED_FILES:
+                    continue
+                sizes.setdefault((device, stats.st_size), []).append(entry.path)
+
+    return [paths for paths in sizes.values() if len(paths) > 1]
+
+
+def hash_groups(
+    groups: List[List[str]],
+    index: dedup_index,
+    workers: int = HASH_WORKERS,
+    update_func: Callable = None,
+    percent_func: Callable = None,
+) -> List[Tuple[str, List[StatEntry]]]:
+    """Splits groups of files of the same size into groups of identical files.
+    Only one link of each file is hashed, and only if it changed since it was
+    last hashed. Returns the hash of each group of identical files, and the
+    paths in it with their stats."""
+    # file identity to the stats of one of its links, and all of its paths
+    identities = {}  # type: Dict[Tuple[int, int], StatEntry]
+    links = {}  # type: Dict[Tuple[int, int], List[StatEntry]]
+    to_hash = []  # type: List[StatEntry]
+
+    for paths in groups:
+        group = set()
+        for path in paths:
+            try:
+                stats = os.stat(path)
+            except OSError:
+                logger.warning("Unable to stat {}".format(path))
+                continue
+
+            identity = (stats.st_dev, stats.st_ino)
+            group.add(identity)
+            links.setdefault(identity, []).append((path, stats))
+            identities.setdefault(identity, (path, stats))
+
+        # every path is a link of the same file, so there is nothing to compare
+        if len(group) > 1:
+            to_hash.extend(identities[identity] for identity in group)
+
+    hashes = {}  # type: Dict[Tuple[int, int], str]
+
+    def hash_one(path: str) -> str:
+        h = index.get(path)
+        if not h:
+            h = files.hash_file(path)
+            index.set(path, h)
+        return h
+
+    with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+        futures = {
+            executor.submit(hash_one, path): (path, stats) for path, stats in to_hash
+        }
+
+        for i, future in enumerate(concurrent.futures.as_completed(futures)):
+            path, stats = futures[future]
+            try:
+                hashes[(stats.st_dev, stats.st_ino)] = future.result()
+            except OSError:
+                logger.exception("Unable to hash {}".format(path))
+
+            if update_func:
+                update_func("Hashing {}".format(path))
+            if percent_func:
+                percent_func((i, len(futures)))
+
+    # drive, size and hash to every link of every identical file
+    identical = {}  # type: Dict[Tuple[int, int, str], List[StatEntry]]
+    for identity, h in hashes.items():
+        stats = identities[identity][1]
+        identical.setdefault((stats.st_dev, stats.st_size, h), []).extend(
+            links[identity]
+        )
+
+    return [
+        (key[2], group)
+        for key, group in identical.items()
+        if len({(stats.st_dev, stats.st_ino) for _, stats in group}) > 1
+    ]
+
+
+def make_read_only(path: str) -> None:
+    """Marks a linked file read-only, so a program writing to it in place fails,
+    rather than changing it for every mod that shares it."""
+    os.chmod(path, stat.S_IREAD)
+
+
+def link_file(src: str, dest: str) -> None:
+    """Replaces a file with a hard link to an identical one. The link is made
+    beside it first, so the file is never missing."""
+    partial = dest + LINK_EXTENSION
+    if os.path.isfile(partial):
+        os.remove(partial)
+
+    os.link(src, partial)
+    try:
+        # a read-only file cannot be replaced on Windows
+        os.chmod(dest, stat.S_IWRITE)
+        os.replace(partial, dest)
+    except OSError:
+        os.remove(partial)
+        raise
+
+
+def link_group(group: List[StatEntry]) -> Tuple[int, int, List[str]]:
+    """Links every file in a group of identical files to the same one. The file
+    with the most links already is kept. Returns how many paths were linked, how
+    many bytes were freed, and the paths that failed."""
+    by_identity = {}  # type: Dict[Tuple[int, int], List[StatEntry]]
+    for path, stats in group:
+        by_identity.setdefault((stats.st_dev, stats.st_ino), []).append((path, stats))
+
+    keep = max(by_identity, key=lambda identity: len(by_identity[identity]))
+    src = by_identity[keep][0][0]
+
+    linked = 0
+    freed = 0
+    errors = []
+
+    for identity, paths in by_identity.items():
+        if identity == keep:
+            continue
+
+        done = 0
+        for path, _ in paths:
+            try:
+                link_file(src, path)
+                done += 1
+            except OSError:
+                logger.exception("Unable to link {} to {}".format(path, src))
+                errors.append(path)
+
+        linked += done
+        # the space is only freed once no link of the old file is left,
+        # including any outside of the mod folders
+        stats = paths[0][1]
+        if done == len(paths) == stats.st_nlink:
+            freed += stats.st_size
+
+    make_read_only(src)
+    return (linked, freed, errors)
+
+
+def deduplicate(
+    mod_folders: List[str],
+    index: dedup_index,
+    update_func: Callable = None,
+    percent_func: Callable = None,
+) -> Tuple[int, int, List[str]]:
+    """Finds identical files across mod folders, by size and then by hash, and
+    replaces the copies with hard links to a single file. Changing a linked file
+    replaces it, as the mod manager does, which breaks the link and leaves the
+    others as they were. Returns how many files were linked, how many bytes
+    were freed, and the files that failed."""
+    if update_func:
+        update_func("Finding files of the same size")
+
+    groups = find_candidates(mod_folders)
+    index.prune({path for paths in groups for path in paths})
+
+    identical = hash_groups(
+        groups, index, update_func=update_func, percent_func=percent_func
+    )
+
+    linked = 0
+    freed = 0
+    errors = []
+
+    for i, (h, group) in enumerate(identical):
+        if update_func:
+            update_func("Linking {} copies of {}".format(len(group), group[0][0]))
+
+        group_linked, group_freed, group_errors = link_group(group)
+        linked += group_linked
+        freed += group_freed
+        errors.extend(group_errors)
+
+        # the links now have the stats of the file they point to
+        for path, _ in group:
+            if path not in group_errors:
+                index.set(path, h)
+
+        if percent_func:
+            percent_func((i, len(identical)))
+
+    index.save()
+    return (linked, freed, errors)
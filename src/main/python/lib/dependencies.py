@@ -0,0 +1,152 @@
+import threading
+from typing import Dict, Iterable, List, Set, Tuple
+
+from lib.query import version_key
+
+# where a package is installed
+OFFICIAL = "official"
+ENABLED = "enabled"
+DISABLED = "disabled"
+
+
+class package_node:
+    """A package in the dependency graph."""
+
+    __slots__ = ("name", "version", "location", "dependencies")
+
+    def __init__(
+        self,
+        name: str,
+        version: str,
+        location: str,
+        dependencies: Iterable[Tuple[str, str]],
+    ) -> None:
+        self.name = name
+        self.version = version
+        # official, enabled or disabled
+        self.location = location
+        # names of the packages this one depends on, and the version it asks for
+        self.dependencies = tuple(tuple(dep) for dep in dependencies)
+
+    @property
+    def active(self) -> bool:
+        """If the sim loads this package."""
+        return self.location != DISABLED
+
+
+class dependency_graph:
+    """Graph of the dependencies declared in package manifests, indexed by package
+    name in both directions, so what a change breaks can be answered by looking
+    at the neighbours of the changed packages only."""
+
+    def __init__(self) -> None:
+        # package name to node
+        self.packages = {}  # type: Dict[str, package_node]
+        # package name to the names of the packages that depend on it. Kept for
+        # names that are not installed as well, to report them once they are
+        self.dependents = {}  # type: Dict[str, Set[str]]
+
+        # the graph is updated from worker threads
+        self.lock = threading.RLock()
+
+    def set_package(
+        self,
+        name: str,
+        version: str,
+        location: str,
+        dependencies: Iterable[Tuple[str, str]],
+    ) -> None:
+        """Adds or updates a package, only touching edges that changed."""
+        node = package_node(name, version, location, dependencies)
+
+        with self.lock:
+            old = self.packages.get(name)
+            old_names = {dep[0] for dep in old.dependencies} if old else set()
+            new_names = {dep[0] for dep in node.dependencies}
+
+            for dep_name in old_names - new_names:
+                self.unlink(dep_name, name)
+            for dep_name in new_names - old_names:
+                self.dependents.setdefault(dep_name, set()).add(name)
+
+            self.packages[name] = node
+
+    def remove_package(self, name: str) -> None:
+        """Removes a package from the graph."""
+        with self.lock:
+            node = self.packages.pop(name, None)
+            if node is None:
+                return
+
+            for dep_name, _ in node.dependencies:
+                self.unlink(dep_name, name)
+
+    def unlink(self, dep_name: str, name: str) -> None:
+        """Removes a single reverse edge."""
+        dependents = self.dependents.get(dep_name)
+        if dependents is not None:
+            dependents.discard(name)
+            if not dependents:
+                del self.dependents[dep_name]
+
+    def prune(self, names: Iterable[str]) -> None:
+        """Removes every package that is not one of the given names."""
+        with self.lock:
+            keep = set(names)
+            for name in [name for name in self.packages if name not in keep]:
+                self.remove_package(name)
+
+    def missing_dependencies(self, name: str, activating: Set[str] = None) -> List[str]:
+        """Returns what would be missing for a package to work if it were enabled,
+        along with any other packages being enabled at the same time."""
+        activating = activating or set()
+        problems = []
+
+        with self.lock:
+            node = self.packages.get(name)
+            if node is None:
+                return []
+
+            for dep_name, dep_version in node.dependencies:
+                dep = self.packages.get(dep_name)
+
+                if dep is None:
+                    problems.append("{} is not installed".format(dep_name))
+                elif not dep.active and dep_name not in activating:
+                    problems.append("{} is disabled".format(dep_name))
+                elif (
+                    dep_version
+                    and dep.version
+                    and version_key(dep.version) < version_key(dep_version)
+                ):
+                    problems.append(
+                        "{} is version {}, {} is required".format(
+                            dep_name, dep.version, dep_version
+                        )
+                    )
+
+        return problems
+
+    def broken_dependents(self, names: Set[str]) -> Dict[str, List[str]]:
+        """Returns, for each of the given packages, the active packages that
+        depend on it and would break if all of them were disabled or removed."""
+        broken = {}
+
+        with self.lock:
+            for name in names:
+                node = self.packages.get(name)
+                if node is None or not node.active:
+                    # nothing that depends on it works now either
+                    continue
+
+                dependents = sorted(
+                    dependent
+                    for dependent in self.dependents.get(name, ())
+                    if dependent not in names
+                    and dependent in self.packages
+                    and self.packages[dependent].active
+                )
+                if dependents:
+                    broken[name] = dependents
+
+        return broken
@@ -0,0 +1,142 @@
+import os
+import sys
+from array import array
+from collections.abc import Sequence
+from typing import Any, Dict, Iterator, List, Tuple
+
+
+class file_list(Sequence):
+    """Compact listing of the files inside of a mod.
+
+    Rather than a dictionary with a full path string per file, each directory
+    prefix is stored once and files refer to it by index. File names are packed
+    into a single string, and sizes (and optionally modification times) are
+    kept in typed arrays.
+
+    Indexing or iterating returns the same {"path": ..., "size": ...}
+    dictionaries the listing used to be made of."""
+
+    def __init__(self, mtimes: bool = False) -> None:
+        """Initialize an empty listing."""
+        # unique directory prefixes, relative to the mod folder
+        self.folders = []  # type: List[str]
+        self.folder_ids = {}  # type: Dict[str, int]
+
+        # per file, index of its directory prefix
+        self.file_folders = array("I")
+        # per file, size in bytes
+        self.sizes = array("Q")
+        # per file, modification time
+        self.mtimes = array("d") if mtimes else None
+
+        # file names that have been packed into a single string,
+        # and the offset of each one inside of it
+        self.packed_names = ""
+        self.name_offsets = array("Q", [0])
+        # file names that have not been packed yet
+        self.pending_names = []  # type: List[str]
+
+    def add_folder(self, folder: str) -> int:
+        """Adds a directory relative to the mod folder, if it is not there yet,
+        and returns its index. Directories without files are kept as well, so
+        the listing knows every folder it was made from."""
+        folder_id = self.folder_ids.get(folder)
+        if folder_id is None:
+            folder_id = len(self.folders)
+            self.folders.append(folder)
+            self.folder_ids[folder] = folder_id
+        return folder_id
+
+    def add(self, folder: str, name: str, size: int, mtime: float = None) -> None:
+        """Adds a file, given its directory relative to the mod folder."""
+        folder_id = self.add_folder(folder)
+
+        self.file_folders.append(folder_id)
+        self.sizes.append(size)
+        if self.mtimes is not None:
+            self.mtimes.append(mtime or 0.0)
+
+        self.pending_names.append(name)
+
+    def add_path(self, path: str, size: int, mtime: float = None) -> None:
+        """Adds a file, given its path relative to the mod folder."""
+        folder, name = os.path.split(path)
+        self.add(folder, name, size, mtime=mtime)
+
+    def pack(self) -> None:
+        """Packs pending file names into the single names string.
+        Done once a listing is complete, as every name is copied."""
+        if not self.pending_names:
+            return
+
+        offset = self.name_offsets[-1]
+        for name in self.pending_names:
+            offset += len(name)
+            self.name_offsets.append(offset)
+
+        self.packed_names += "".join(self.pending_names)
+        self.pending_names = []
+
+    def get_name(self, i: int) -> str:
+        """Returns the file name of a file."""
+        packed = len(self.name_offsets) - 1
+        if i >= packed:
+            return self.pending_names[i - packed]
+
+        return self.packed_names[self.name_offsets[i] : self.name_offsets[i + 1]]
+
+    def get_path(self, i: int) -> str:
+        """Returns the path of a file, relative to the mod folder."""
+        return os.path.join(self.folders[self.file_folders[i]], self.get_name(i))
+
+    def get_size(self, i: int) -> int:
+        """Returns the size of a file in bytes."""
+        return self.sizes[i]
+
+    def get_mtime(self, i: int) -> Any:
+        """Returns the modification time of a file, if they are being kept."""
+        return self.mtimes[i] if self.mtimes is not None else None
+
+    def __len__(self) -> int:
+        return len(self.sizes)
+
+    def __getitem__(self, i: Any) -> Any:
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+
+        data = {"path": self.get_path(i), "size": self.sizes[i]}
+        if self.mtimes is not None:
+            data["mtime"] = self.mtimes[i]
+        return data
+
+    def iter_entries(self) -> Iterator[Tuple[str, int]]:
+        """Iterates the path and size of each file, without building dictionaries."""
+        for i in range(len(self)):
+            yield (self.get_path(i), self.sizes[i])
+
+    def iter_paths(self) -> Iterator[str]:
+        """Iterates the path of each file."""
+        for i in range(len(self)):
+            yield self.get_path(i)
+
+    @property
+    def total_size(self) -> int:
+        """Total size in bytes of every file."""
+        return sum(self.sizes)
+
+    def nbytes(self) -> int:
+        """Returns roughly how much memory the listing uses, in bytes."""
+        size = sys.getsizeof(self.packed_names)
+        size += sum(sys.getsizeof(name) for name in self.pending_names)
+        size += sum(sys.getsizeof(folder) for folder in self.folders) * 2
+        size += self.file_folders.itemsize * len(self.file_folders)
+        size += self.sizes.itemsize * len(self.sizes)
+        size += self.name_offsets.itemsize * len(self.name_offsets)
+        if self.mtimes is not None:
+            size += self.mtimes.itemsize * len(self.mtimes)
+        return size
@@ -13,6 +13,8 @@ import patoolib
 from loguru import logger
 
 import lib.config as config
+import lib.links as links
+import lib.walker as walker
 
 if sys.platform == "win32":
     import win32file
@@ -89,11 +91,52 @@ def fix_permissions_recursive(folder: str, update_func: Callable = None) -> None
 
     logger.debug("Fixing permissions for {}".format(folder))
 
-    for root, dirs, files in os.walk(folder):
-        for d in dirs:
-            fix_permissions(os.path.join(root, d))
-        for f in files:
-            fix_permissions(os.path.join(root, f))
+    walker.walker().walk(folder, [walker.permission_visitor()])
+
+
+def remove_shared_file(path: str) -> None:
+    """Removes one hard link of a file that is shared with other folders. The
+    read-only mark guarding a shared file belongs to the file rather than the
+    link, so on Windows it is put back through another link once this one is
+    gone, rather than left cleared for every folder sharing it."""
+    try:
+        os.remove(path)
+        return
+    except PermissionError:
+        if sys.platform != "win32":
+            raise
+
+    drive = os.path.splitdrive(path)[0]
+    others = [
+        drive + name
+        for name in win32file.FindFileNames(path)
+        if not check_same_path(drive + name, path)
+    ]
+
+    os.chmod(path, stat.S_IWRITE)
+    os.remove(path)
+
+    if others:
+        os.chmod(others[0], stat.S_IREAD)
+
+
+def remove_shared_files(folder: str, update_func: Callable = None) -> None:
+    """Removes the files of a folder that are hard linked from elsewhere, such
+    as by deduplication, one link at a time, before the rest of the folder is
+    made writable."""
+    if update_func:
+        update_func("Removing shared files from {}".format(folder))
+
+    logger.debug("Removing shared files from {}".format(folder))
+
+    for _, entries in walker.walker().iter_folders(folder):
+        for entry, _ in entries:
+            try:
+                # the stats of a directory entry have no link count on Windows
+                if os.stat(entry.path).st_nlink > 1:
+                    remove_shared_file(entry.path)
+            except OSError:
+                logger.warning("Unable to remove shared file {}".format(entry.path))
 
 
 def listdir_dirs(folder: str, full_paths: bool = False) -> list:
@@ -158,11 +201,12 @@ def is_symlink(path: str) -> bool:
 
 def read_symlink(path: str) -> str:
     """Returns the original path of a symlink."""
-    if os.path.islink(path):
-        return os.readlink(path)
+    try:
+        return links.read_link(path)
+    except links.LinkError:
+        logger.debug("Unable to read link {} directly".format(path))
 
-    # Pretty slow, avoid if possible
-    # TODO, reimplement with Win32
+    # Pretty slow, only for links that can't be read directly
     process = subprocess.run(
         ["cmd", "/c", "fsutil", "reparsepoint", "query", path],
         check=False,
@@ -234,11 +278,9 @@ def get_folder_size(folder: str) -> Num:
         logger.warning("Folder {} does not exist".format(folder))
         return 0
 
-    return sum(
-        os.path.getsize(os.path.join(dirpath, filename))
-        for dirpath, _, filenames in os.walk(folder)
-        for filename in filenames
-    )
+    sizes = walker.size_visitor()
+    walker.walker().walk(folder, [sizes])
+    return sizes.total_size
 
 
 def delete_file(file: str, first: bool = True, update_func: Callable = None) -> None:
@@ -300,7 +342,10 @@ def delete_folder(
             raise AccessError(folder)
         else:
             logger.debug("Attempting to fix permissions")
-            # otherwise, try to fix permissions and try again
+            # otherwise, try to fix permissions and try again. Files shared
+            # with other folders are removed first, as making them writable
+            # here would make them writable everywhere
+            remove_shared_files(folder, update_func=update_func)
             fix_permissions_recursive(folder, update_func=update_func)
             delete_folder(folder, first=False, update_func=update_func)
     except FileNotFoundError as e:
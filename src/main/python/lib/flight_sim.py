@@ -1,14 +1,56 @@
-import datetime
-import functools
-import json
+import concurrent.futures
 import os
-from typing import Callable, List, Tuple, Union
+import time
+from typing import Callable, Dict, Iterator, List, Set, Tuple, Union
 
 from loguru import logger
 
+import lib.cache as cache
+import lib.cold_storage as cold_storage
 import lib.config as config
+import lib.conflicts as conflicts
+import lib.dedup as dedup
+import lib.dependencies as dependencies
 import lib.files as files
+import lib.json_backend as json_backend
+import lib.layout as layout
+import lib.libraries as libraries
+import lib.links as links
+import lib.official as official
+import lib.reconcile as reconcile
+import lib.relocate as relocate
+import lib.snapshot as snapshot
 import lib.thread as thread
+import lib.verify as verify
+import lib.walker as walker
+from lib.file_list import file_list
+from lib.mod_record import mod_record
+
+# maximum number of parsed mods to hold before sending them to the GUI
+MOD_BATCH_SIZE = 250
+# maximum number of seconds to hold parsed mods before sending them to the GUI.
+# This keeps the first rows appearing quickly, even on slow storage.
+MOD_BATCH_INTERVAL = 0.05
+# maximum number of mod files to hold before sending them to the GUI
+FILE_BATCH_SIZE = 5000
+# maximum number of bytes of mod file listings to keep cached
+FILES_CACHE_BUDGET = 64 * 1024 * 1024
+# seconds before a cached listing was walked that a change to a mod file may
+# not have been seen in, as some filesystems only keep dates to 2 seconds
+LISTING_MTIME_MARGIN = 2.0
+# maximum number of bytes of parsed manifests, layouts and paths to keep cached
+MOD_CACHE_BUDGET = 32 * 1024 * 1024
+# number of mods verified at once
+VERIFY_WORKERS = 8
+# number of threads reading the folders of a single mod while verifying,
+# as many mods are already being verified at once
+VERIFY_WALK_WORKERS = 2
+# number of mods whose layout is checked at once
+LAYOUT_WORKERS = 4
+# number of threads reading the folders of a single mod while checking its layout
+LAYOUT_WALK_WORKERS = 4
+# number of official package manifests parsed at once
+OFFICIAL_WORKERS = 8
 
 
 class LayoutError(Exception):
@@ -31,9 +73,49 @@ class NoModsError(Exception):
     """Raised when no mods are found in an archive."""
 
 
+class mod_changes:
+    """Set of changes made to mods by an operation,
+    so that only the affected table rows need to be updated."""
+
+    def __init__(self) -> None:
+        # mod data of newly installed mods
+        self.added = []  # type: List[mod_record]
+        # folder name and enabled status of mods that no longer exist
+        self.removed = []  # type: List[Tuple[str, bool]]
+        # mod data of mods whose enabled status was flipped
+        self.changed = []  # type: List[mod_record]
+
+    def merge(self, other: "mod_changes") -> None:
+        """Adds the changes of another change set to this one."""
+        self.added.extend(other.added)
+        self.removed.extend(other.removed)
+        self.changed.extend(other.changed)
+
+
 class flight_sim:
     def __init__(self) -> None:
         self.sim_packages_folder = ""
+        # parsed mod file listings, bounded by memory used
+        self.files_cache = cache.stat_cache(
+            FILES_CACHE_BUDGET, size_func=lambda data: data.nbytes()
+        )
+        # parsed mod data and resolved paths, checked against the files
+        # they came from on every lookup
+        self.mod_cache = cache.stat_cache(
+            MOD_CACHE_BUDGET, size_func=cache.estimate_size
+        )
+        # which mods provide which files, kept across runs
+        self.conflict_index = conflicts.conflict_index()
+        # which packages depend on which, rebuilt from cached manifests
+        self.dependency_graph = dependencies.dependency_graph()
+        # if the dependency graph has been built with every mod at least once
+        self.dependency_graph_ready = False
+        # the official packages, kept across runs
+        self.official_inventory = official.official_inventory()
+        # disabled mods packed into archives, kept across runs
+        self.cold_index = cold_storage.cold_index()
+        # hashes of mod files that could be duplicates, kept across runs
+        self.dedup_index = dedup.dedup_index()
 
     def parse_user_cfg(self, sim_folder: str = None, filename: str = None) -> str:
         """Parses the given UserCfg.opt file.
@@ -178,12 +260,22 @@ class flight_sim:
 
     def clear_mod_cache(self) -> None:
         """Clears the cache of the mod parsing functions."""
-        self.parse_mod_layout.cache_clear()
-        self.parse_mod_files.cache_clear()
-        self.parse_mod_manifest.cache_clear()
-        self.get_mod_folder.cache_clear()
+        self.mod_cache.clear()
+        self.files_cache.clear()
+
+    def invalidate_mod_cache(self, mod_folder: str) -> None:
+        """Clears the cached data of a single mod folder."""
+        self.mod_cache.invalidate_path(mod_folder)
+        self.files_cache.invalidate_path(mod_folder)
+        # which library a mod is in may have changed
+        self.mod_cache.invalidate(
+            ("get_mod_folder", os.path.basename(mod_folder), False)
+        )
 
-    @functools.lru_cache()
+    @cache.cached_method(
+        "mod_cache",
+        path_func=lambda self: os.path.join(self.sim_packages_folder, "Community"),
+    )
     def get_sim_mod_folder(self) -> str:
         """Returns the path to the community packages folder inside Flight Simulator.
         Tries to resolve symlinks in every step of the path."""
@@ -193,7 +285,10 @@ class flight_sim:
             files.resolve_symlink(os.path.join(self.sim_packages_folder, "Community"))
         )
 
-    @functools.lru_cache()
+    @cache.cached_method(
+        "mod_cache",
+        path_func=lambda self: os.path.join(self.sim_packages_folder, "Official"),
+    )
     def get_sim_official_folder(self) -> str:
         """Returns the path to the official packages folder inside Flight Simulator.
         Tries to resolve symlinks in every step of the path."""
@@ -203,14 +298,23 @@ class flight_sim:
         official_packages = files.resolve_symlink(
             os.path.join(self.sim_packages_folder, "Official")
         )
-        # choose folder inside
-        store = files.listdir_dirs(official_packages)[0]
+        # choose the store the sim was installed from, such as OneStore or
+        # Steam. Prefer the one with the base package, in case others are left
+        stores = files.listdir_dirs(official_packages)
+        store = next(
+            (
+                store
+                for store in stores
+                if os.path.isdir(os.path.join(official_packages, store, "fs-base"))
+            ),
+            stores[0],
+        )
 
         return files.fix_path(
             files.resolve_symlink(os.path.join(official_packages, store))
         )
 
-    @functools.lru_cache()
+    @cache.cached_method("mod_cache")
     def get_mod_folder(self, folder: str, enabled: bool) -> str:
         """Returns path to mod folder given folder name and enabled status."""
         # logger.debug("Determining path for mod {}, enabled: {}".format(folder, enabled))
@@ -218,57 +322,517 @@ class flight_sim:
         if enabled:
             mod_folder = os.path.join(self.get_sim_mod_folder(), folder)
         else:
-            mod_folder = os.path.join(files.get_mod_install_folder(), folder)
+            mod_folder = self.find_library_mod(folder)
 
         # logger.debug("Final mod path: {}".format(mod_folder))
 
         return files.fix_path(mod_folder)
 
-    @functools.lru_cache()
-    def parse_mod_layout(self, mod_folder: str) -> dict:
-        """Builds the mod files info as a dictionary. Parsed from the layout.json."""
-        logger.debug("Parsing layout for {}".format(mod_folder))
+    def find_library_mod(self, folder: str) -> str:
+        """Returns the path of a mod folder in the first library that has it,
+        or in the main mod install folder if none do."""
+        mod_libraries = libraries.get_libraries()
+        for library in mod_libraries:
+            mod_folder = os.path.join(library, folder)
+            if os.path.isdir(mod_folder):
+                return mod_folder
 
+        return os.path.join(mod_libraries[0], folder)
+
+    def get_mod_layout_path(self, mod_folder: str) -> str:
+        """Returns the path to the layout.json of a mod."""
         layout_path = files.resolve_symlink(os.path.join(mod_folder, "layout.json"))
 
         if not os.path.isfile(layout_path):
             logger.error("No layout.json found")
             raise NoLayoutError(mod_folder)
 
+        return layout_path
+
+    def iter_mod_layout(self, mod_folder: str) -> Iterator[layout.layout_entry]:
+        """Iterates the mod files info from the layout.json, one entry at a time,
+        without reading the entire file into memory."""
+        layout_path = self.get_mod_layout_path(mod_folder)
+
         try:
-            with open(layout_path, "r", encoding="utf8") as f:
-                data = json.load(f)
+            yield from layout.iter_layout(layout_path)
         except Exception as e:
             if hasattr(e, "winerror"):
                 logger.exception("WinError: {}".format(e.winerror))  # type: ignore
             logger.exception("layout.json could not be parsed")
             raise LayoutError(e)
 
-        return data["content"]
+    @cache.cached_method(
+        "mod_cache",
+        path_func=lambda self, mod_folder: os.path.join(mod_folder, "layout.json"),
+    )
+    def parse_mod_layout(self, mod_folder: str) -> List[layout.layout_entry]:
+        """Builds the mod files info as a list. Parsed from the layout.json."""
+        logger.debug("Parsing layout for {}".format(mod_folder))
+        layout_path = self.get_mod_layout_path(mod_folder)
+
+        try:
+            return layout.load_layout(layout_path)
+        except Exception as e:
+            if hasattr(e, "winerror"):
+                logger.exception("WinError: {}".format(e.winerror))  # type: ignore
+            logger.exception("layout.json could not be parsed")
+            raise LayoutError(e)
+
+    @cache.cached_method(
+        "mod_cache",
+        path_func=lambda self, mod_folder: os.path.join(mod_folder, "layout.json"),
+    )
+    def get_mod_layout_summary(self, mod_folder: str) -> layout.layout_summary:
+        """Returns the file count, total size and newest file date listed in the
+        layout.json. Large layouts are streamed, so their entries are never all
+        held in memory."""
+        logger.debug("Summarizing layout for {}".format(mod_folder))
+        layout_path = self.get_mod_layout_path(mod_folder)
+
+        try:
+            return layout.summarize_layout(layout_path)
+        except Exception as e:
+            if hasattr(e, "winerror"):
+                logger.exception("WinError: {}".format(e.winerror))  # type: ignore
+            logger.exception("layout.json could not be parsed")
+            raise LayoutError(e)
+
+    @cache.cached_method(
+        "mod_cache",
+        path_func=lambda self, mod_folder: os.path.join(mod_folder, "layout.json"),
+    )
+    def get_mod_layout_digest(self, mod_folder: str) -> str:
+        """Returns a fingerprint of the entries of the layout.json."""
+        return layout.digest(self.parse_mod_layout(mod_folder))
+
+    def generate_mod_layout(self, mod_folder: str, force: bool = False) -> bool:
+        """Rebuilds the layout.json of a mod from its files, so the sim does not
+        ignore files that were edited. Every file is walked each time, as an edit
+        deep inside a mod changes nothing above it, but the file is only
+        rewritten if the paths or sizes of the files no longer match it. Returns
+        if it was rewritten."""
+        layout_path = os.path.join(mod_folder, "layout.json")
+        entries = layout.build_layout(mod_folder, workers=LAYOUT_WALK_WORKERS)
+
+        if not force:
+            try:
+                if self.get_mod_layout_digest(mod_folder) == layout.digest(entries):
+                    logger.debug("Layout for {} is up to date".format(mod_folder))
+                    return False
+            except (NoLayoutError, LayoutError):
+                # missing or broken, so always write a new one
+                pass
+
+        logger.debug("Writing layout for {}".format(mod_folder))
+        layout.write_layout(files.fix_path(layout_path), entries)
+        self.invalidate_mod_cache(mod_folder)
+        return True
+
+    def generate_mod_layouts(
+        self,
+        mod_folders: List[str] = None,
+        update_func: Callable = None,
+        percent_func: Callable = None,
+    ) -> Tuple[List[str], List[str]]:
+        """Rebuilds the layout.json of many mods at once, by default every mod.
+        Returns the mod folders that were rewritten, and those that failed."""
+        if mod_folders is None:
+            enabled_mod_folders, disabled_mod_folders = self.get_all_mod_folders()
+            mod_folders = enabled_mod_folders + disabled_mod_folders
+
+        if update_func:
+            update_func("Checking layouts of {} mods".format(len(mod_folders)))
+
+        rewritten = []
+        errors = []
+
+        with concurrent.futures.ThreadPoolExecutor(LAYOUT_WORKERS) as executor:
+            futures = {
+                executor.submit(self.generate_mod_layout, mod_folder): mod_folder
+                for mod_folder in mod_folders
+            }
+
+            for i, future in enumerate(concurrent.futures.as_completed(futures)):
+                mod_folder = futures[future]
+
+                try:
+                    if future.result():
+                        rewritten.append(mod_folder)
+                except OSError:
+                    logger.exception(
+                        "Layout for {} could not be written".format(mod_folder)
+                    )
+                    errors.append(mod_folder)
+
+                if percent_func:
+                    percent_func((i, len(mod_folders)))
+
+        return (rewritten, errors)
+
+    def verify_mod(self, mod_folder: str, deep: bool = False) -> verify.mod_report:
+        """Checks the files of a mod against its layout.json. By default, only the
+        path and size of every file are compared. In deep mode, file contents
+        are hashed as well."""
+        report = verify.mod_report(mod_folder)
+        actual = layout.build_layout(mod_folder, workers=VERIFY_WALK_WORKERS)
+        verify.compare_stats(report, self.parse_mod_layout(mod_folder), actual)
+
+        if deep:
+            verify.compare_hashes(report, actual)
+
+        return report
+
+    def verify_mods(
+        self,
+        mod_folders: List[str] = None,
+        deep: bool = False,
+        update_func: Callable = None,
+        percent_func: Callable = None,
+    ) -> Tuple[List[verify.mod_report], List[str]]:
+        """Verifies many mods at once, by default every mod. Returns the reports of
+        mods with problems, and the mod folders that could not be verified."""
+        if mod_folders is None:
+            enabled_mod_folders, disabled_mod_folders = self.get_all_mod_folders()
+            mod_folders = enabled_mod_folders + disabled_mod_folders
+
+        if update_func:
+            update_func("Verifying {} mods".format(len(mod_folders)))
+
+        reports = []
+        errors = []
+
+        with concurrent.futures.ThreadPoolExecutor(VERIFY_WORKERS) as executor:
+            futures = {
+                executor.submit(self.verify_mod, mod_folder, deep=deep): mod_folder
+                for mod_folder in mod_folders
+            }
+
+            for i, future in enumerate(concurrent.futures.as_completed(futures)):
+                mod_folder = futures[future]
+
+                try:
+                    report = future.result()
+                    if not report.ok:
+                        reports.append(report)
+                except NoLayoutError:
+                    logger.debug("Not verifying {}, no layout".format(mod_folder))
+                except (LayoutError, OSError):
+                    errors.append(mod_folder)
+
+                if percent_func:
+                    percent_func((i, len(mod_folders)))
+
+        return (reports, errors)
+
+    def index_mod_conflicts(self, mod_folder: str) -> None:
+        """Updates the files a mod provides in the conflict index, only reading
+        its layout.json if it changed since it was last indexed."""
+        name = os.path.basename(mod_folder)
+        fingerprint = cache.fingerprint(os.path.join(mod_folder, "layout.json"))
+
+        if fingerprint is None:
+            self.conflict_index.remove(name)
+            return
+
+        if self.conflict_index.is_current(name, fingerprint):
+            return
+
+        logger.debug("Indexing files of {}".format(mod_folder))
+        try:
+            paths = [entry.path for entry in self.iter_mod_layout(mod_folder)]
+        except (NoLayoutError, LayoutError):
+            self.conflict_index.remove(name)
+            return
+
+        self.conflict_index.add(name, fingerprint, paths)
+
+    def update_conflict_index(self) -> None:
+        """Brings the conflict index up to date with every mod."""
+        enabled_mod_folders, disabled_mod_folders = self.get_all_mod_folders()
+        mod_folders = enabled_mod_folders + disabled_mod_folders
+
+        for mod_folder in mod_folders:
+            self.index_mod_conflicts(mod_folder)
+
+        self.conflict_index.prune(os.path.basename(folder) for folder in mod_folders)
+        self.conflict_index.save()
+
+    def get_enabled_mod_names(self) -> Set[str]:
+        """Returns the folder names of the enabled mods."""
+        return set(files.listdir_dirs(self.get_sim_mod_folder()))
+
+    def get_mod_conflicts(self, mod_folder: str) -> Dict[str, List[str]]:
+        """Returns the files of a mod that enabled mods provide as well, mapped to
+        the names of those mods. Only this mod's layout.json is read, if needed."""
+        self.index_mod_conflicts(mod_folder)
+        self.conflict_index.save()
+
+        return self.conflict_index.get_conflicts(
+            os.path.basename(mod_folder), self.get_enabled_mod_names()
+        )
+
+    def get_all_conflicts(self) -> Dict[str, Dict[str, int]]:
+        """Returns every enabled mod that provides the same files as another
+        enabled mod, mapped to those mods and the number of files they share."""
+        self.update_conflict_index()
+        return self.conflict_index.get_all_conflicts(self.get_enabled_mod_names())
+
+    def graph_mod(self, mod_folder: str, location: str) -> None:
+        """Updates a package in the dependency graph from its manifest.
+        Manifests are cached, so this is cheap for packages that did not change."""
+        name = os.path.basename(mod_folder)
+        try:
+            mod = self.parse_mod_manifest(
+                mod_folder, enabled=location != dependencies.DISABLED
+            )
+        except (NoManifestError, ManifestError):
+            cold = self.cold_index.get(name)
+            if cold is None:
+                self.dependency_graph.remove_package(name)
+                return
+            # packed into an archive, so use the manifest data it had
+            mod = cold.record
+
+        self.dependency_graph.set_package(name, mod.version, location, mod.dependencies)
+
+    def update_dependency_graph(self) -> None:
+        """Brings the dependency graph up to date with every mod, and with the
+        official packages mods can depend on."""
+        enabled_mod_folders, disabled_mod_folders = self.get_all_mod_folders()
+
+        try:
+            official_packages = self.get_official_packages()
+        except (OSError, IndexError):
+            logger.exception("Official packages could not be listed")
+            official_packages = {}
+
+        names = set(official_packages)
+        for name, package in official_packages.items():
+            self.dependency_graph.set_package(
+                name, package.version, dependencies.OFFICIAL, package.dependencies
+            )
+
+        cold_mod_folders = [record.full_path for record in self.cold_index.records()]
+        locations = (
+            (cold_mod_folders, dependencies.DISABLED),
+            (disabled_mod_folders, dependencies.DISABLED),
+            # enabled last, in case an official package is overridden
+            (enabled_mod_folders, dependencies.ENABLED),
+        )
+
+        for mod_folders, location in locations:
+            for mod_folder in mod_folders:
+                self.graph_mod(mod_folder, location)
+                names.add(os.path.basename(mod_folder))
+
+        self.dependency_graph.prune(names)
+        self.dependency_graph_ready = True
+
+    def ensure_dependency_graph(self) -> bool:
+        """Builds the dependency graph right away, if the background indexer has
+        not finished building it yet, or failed to. Returns if it is ready."""
+        if not self.dependency_graph_ready:
+            try:
+                self.update_dependency_graph()
+            except OSError:
+                logger.exception("Dependency graph could not be built")
+
+        return self.dependency_graph_ready
+
+    def get_official_packages(self) -> Dict[str, mod_record]:
+        """Returns the official packages by name. Their manifests are only parsed
+        again when packages are added to or removed from the official folder,
+        or when any of their manifests changed."""
+        official_folder = self.get_sim_official_folder()
+        fingerprint = official.get_fingerprint(official_folder)
+
+        if not self.official_inventory.is_current(official_folder, fingerprint):
+            logger.debug("Building inventory of {}".format(official_folder))
+            package_folders = files.listdir_dirs(official_folder, full_paths=True)
+
+            def parse(package_folder: str) -> Union[mod_record, None]:
+                try:
+                    return self.parse_mod_manifest(package_folder)
+                except (NoManifestError, ManifestError):
+                    return None
+
+            with concurrent.futures.ThreadPoolExecutor(OFFICIAL_WORKERS) as executor:
+                packages = [
+                    package
+                    for package in executor.map(parse, package_folders)
+                    if package is not None
+                ]
+
+            self.official_inventory.update(official_folder, fingerprint, packages)
+            self.official_inventory.save()
+
+        return self.official_inventory.packages
+
+    def get_official_overrides(self, names: Set[str] = None) -> Dict[str, str]:
+        """Returns the enabled mods that have the same name as an official
+        package, and so replace it, mapped to the official version."""
+        if names is None:
+            names = self.get_enabled_mod_names()
+
+        official_packages = self.get_official_packages()
+        return {
+            name: official_packages[name].version
+            for name in names
+            if name in official_packages
+        }
+
+    def check_enable(self, folders: List[str]) -> Dict[str, List[str]]:
+        """Returns the disabled mods that would be missing dependencies if they
+        were enabled together, mapped to what is missing. Nothing is reported
+        if the dependency graph cannot be built."""
+        if not self.ensure_dependency_graph():
+            return {}
+
+        names = set(folders)
+        problems = {}
+
+        for folder in folders:
+            self.graph_mod(
+                self.get_mod_folder(folder, enabled=False), dependencies.DISABLED
+            )
+
+        for folder in folders:
+            missing = self.dependency_graph.missing_dependencies(folder, names)
+            if missing:
+                problems[folder] = missing
+
+        return problems
+
+    def check_disable(self, folders: List[str]) -> Dict[str, List[str]]:
+        """Returns the mods that would lose enabled packages they depend on if
+        these were disabled or uninstalled, mapped to the packages depending on
+        them."""
+        if not self.ensure_dependency_graph():
+            return {}
+
+        return self.dependency_graph.broken_dependents(set(folders))
+
+    def update_indexes(self) -> None:
+        """Brings the dependency graph and conflict index up to date."""
+        self.update_dependency_graph()
+        self.update_conflict_index()
+
+    def get_cached_files(
+        self, mod_folder: str, mtimes: bool = False
+    ) -> Union[file_list, None]:
+        """Returns the cached listing of a mod, if it still matches the mod. A
+        file added, removed or renamed changes the modification time of its
+        folder, and a file edited in place changes its own, so every folder and
+        file of the listing is stat-ed again, without reading any folder."""
+        key = ("parse_mod_files", mod_folder, mtimes)
+        entry = self.files_cache.get(key)
+        if entry is None:
+            return None
+
+        _, walked_at, listing = entry
+        if self.is_listing_current(mod_folder, listing, walked_at):
+            return listing
+
+        self.files_cache.invalidate(key)
+        return None
+
+    def is_listing_current(
+        self, mod_folder: str, listing: file_list, walked_at: float
+    ) -> bool:
+        """Returns if no folder or file of a listing changed since it was walked."""
+        # anything modified around the walk may have been missed by it
+        changed_after = walked_at - LISTING_MTIME_MARGIN
+
+        try:
+            for folder in listing.folders:
+                if os.stat(os.path.join(mod_folder, folder)).st_mtime >= changed_after:
+                    return False
+
+            for path, size in listing.iter_entries():
+                stats = os.stat(os.path.join(mod_folder, path))
+                if stats.st_size != size or stats.st_mtime >= changed_after:
+                    return False
+        except OSError:
+            return False
+
+        return True
+
+    def cache_files(
+        self, mod_folder: str, listing: file_list, walked_at: float, mtimes: bool
+    ) -> None:
+        """Caches the listing of a mod, along with when its walk started."""
+        listing.pack()
+        self.files_cache.put_valid(
+            ("parse_mod_files", mod_folder, mtimes), listing, mod_folder, fp=walked_at
+        )
+
+    def parse_mod_files(self, mod_folder: str, mtimes: bool = False) -> file_list:
+        """Builds the mod files info as a compact listing. Parsed from the fielsystem.
+        Listings are cached, within a memory budget."""
+        listing = self.get_cached_files(mod_folder, mtimes=mtimes)
+        if listing is not None:
+            return listing
 
-    @functools.lru_cache()
-    def parse_mod_files(self, mod_folder: str) -> List[dict]:
-        """Builds the mod files info as a dictionary. Parsed from the fielsystem."""
         logger.debug("Parsing all mod files for {}".format(mod_folder))
 
-        data = []
-        for root, _, files_ in os.walk(mod_folder):
-            for file in files_:
-                data.append(
-                    {
-                        "path": os.path.join(os.path.relpath(root, mod_folder), file),
-                        "size": os.path.getsize(os.path.join(root, file)),
-                    }
+        walked_at = time.time()
+        visitor = walker.file_list_visitor(mtimes=mtimes)
+        walker.walker().walk(mod_folder, [visitor])
+
+        self.cache_files(mod_folder, visitor.files, walked_at, mtimes)
+        return visitor.files
+
+    def stream_mod_files(
+        self, mod_folder: str, batch_func: Callable, cancel_func: Callable = None
+    ) -> Tuple[int, int]:
+        """Walks a mod, sending the files info to the batch function in batches
+        as they are found. Returns the number of files and total size. Shares
+        the listings cached by parse_mod_files, so a mod whose listing is still
+        current is not walked again, and a complete walk is cached for next
+        time."""
+        batch = thread.batcher(batch_func, FILE_BATCH_SIZE, MOD_BATCH_INTERVAL)
+
+        listing = self.get_cached_files(mod_folder)
+        if listing is not None:
+            logger.debug("Streaming cached mod files for {}".format(mod_folder))
+            for path, size in listing.iter_entries():
+                batch.add({"path": path, "size": size})
+
+            batch.flush()
+            return (len(listing), listing.total_size)
+
+        logger.debug("Streaming all mod files for {}".format(mod_folder))
+
+        walked_at = time.time()
+        visitor = walker.file_list_visitor()
+        mod_walker = walker.walker(cancel_func=cancel_func)
+
+        for folder, entries in mod_walker.iter_folders(mod_folder, [visitor]):
+            for entry, stat in entries:
+                batch.add(
+                    {"path": os.path.join(folder, entry.name), "size": stat.st_size}
                 )
 
-        return data
+        batch.flush()
+
+        listing = visitor.files
+        # a walk that was cut short is missing files
+        if not (cancel_func and cancel_func()):
+            self.cache_files(mod_folder, listing, walked_at, False)
 
-    @functools.lru_cache()
-    def parse_mod_manifest(self, mod_folder: str, enabled: bool = True) -> dict:
-        """Builds the mod metadata as a dictionary. Parsed from the manifest.json."""
+        return (len(listing), listing.total_size)
+
+    @cache.cached_method(
+        "mod_cache",
+        path_func=lambda self, mod_folder, enabled: os.path.join(
+            mod_folder, "manifest.json"
+        ),
+    )
+    def parse_mod_manifest(self, mod_folder: str, enabled: bool = True) -> mod_record:
+        """Builds the mod metadata as a record. Parsed from the manifest.json."""
         logger.debug("Parsing manifest for {}".format(mod_folder))
 
-        mod_data = {"folder_name": os.path.basename(mod_folder)}
         manifest_path = files.resolve_symlink(os.path.join(mod_folder, "manifest.json"))
 
         if not os.path.isfile(manifest_path):
@@ -276,49 +840,55 @@ class flight_sim:
             raise NoManifestError(mod_folder)
 
         try:
-            with open(manifest_path, "r", encoding="utf8") as f:
-                data = json.load(f)
+            data = json_backend.load_file(manifest_path)
         except Exception as e:
             if hasattr(e, "winerror"):
                 logger.exception("WinError: {}".format(e.winerror))  # type: ignore
             logger.exception("manifest.json could not be opened/parsed")
             raise ManifestError(e)
 
-        # manifest data
-        mod_data["content_type"] = data.get("content_type", "")
-        mod_data["title"] = data.get("title", "")
-        mod_data["manufacturer"] = data.get("manufacturer", "")
-        mod_data["creator"] = data.get("creator", "")
-        mod_data["version"] = data.get("package_version", "")
-        mod_data["minimum_game_version"] = data.get("minimum_game_version", "")
-
-        # manifest metadata
-        # Windows considering moving/copying a file 'creating' it again,
-        # and not modifying contents
-        mod_data["time_mod"] = datetime.datetime.fromtimestamp(
-            os.path.getctime(manifest_path)
-        ).strftime("%Y-%m-%d %H:%M:%S")
-
-        # convience, often helps to just have this included in the returned result
-        # and its easier to to do here
-        mod_data["enabled"] = enabled  # type: ignore
-        mod_data["full_path"] = os.path.abspath(mod_folder)
-
-        return mod_data
+        # size as recorded by the package itself, which avoids walking the mod
+        try:
+            size = int(data.get("total_package_size", 0))
+        except (TypeError, ValueError):
+            size = 0
+
+        manifest_dependencies = [
+            (dep["name"], dep.get("package_version", ""))
+            for dep in data.get("dependencies", [])
+            if isinstance(dep, dict) and dep.get("name")
+        ]
+
+        return mod_record(
+            os.path.basename(mod_folder),
+            # manifest data
+            content_type=data.get("content_type", ""),
+            title=data.get("title", ""),
+            manufacturer=data.get("manufacturer", ""),
+            creator=data.get("creator", ""),
+            version=data.get("package_version", ""),
+            minimum_game_version=data.get("minimum_game_version", ""),
+            size=size,
+            # manifest metadata
+            # Windows considering moving/copying a file 'creating' it again,
+            # and not modifying contents. Kept raw, and only formatted for display
+            timestamp=os.path.getctime(manifest_path),
+            # convience, often helps to just have this included in the returned
+            # result and its easier to to do here
+            enabled=enabled,
+            full_path=os.path.abspath(mod_folder),
+            dependencies=manifest_dependencies,
+        )
 
     def get_game_version(self) -> str:
         """Attempts to guess the game's version.
         This is based on the fs-base package and the minimum game version listed."""
         logger.debug("Attempting to determine game version")
         version = "???"
-        # build path to fs-base manifest
-        fs_base = files.resolve_symlink(
-            os.path.join(self.get_sim_official_folder(), "fs-base")
-        )
-        # parse it if we guessed correct
-        if os.path.isdir(fs_base):
-            data = self.parse_mod_manifest(fs_base)
-            version = data["minimum_game_version"]
+        # from the base package, if we guessed the official folder correct
+        fs_base = self.get_official_packages().get("fs-base")
+        if fs_base is not None:
+            version = fs_base.minimum_game_version
 
         logger.debug("Game version: {}".format(version))
         return version
@@ -329,12 +899,18 @@ class flight_sim:
         enabled: bool,
         progress_func: Callable = None,
         start: int = 0,
-    ) -> Tuple[list, list]:
-        """Returns a list of mod folders, and errors encountered."""
+        batch_func: Callable = None,
+    ) -> Tuple[List[mod_record], list]:
+        """Returns a list of mod records, and errors encountered.
+        If a batch function is provided, parsed mods are also sent to it in batches
+        as they are parsed."""
 
         mods = []
         errors = []
 
+        if batch_func:
+            batch = thread.batcher(batch_func, MOD_BATCH_SIZE, MOD_BATCH_INTERVAL)
+
         for i, folder in enumerate(folders):
             if progress_func:
                 progress_func(
@@ -343,58 +919,158 @@ class flight_sim:
                     start + len(folders) - 1,
                 )
 
-            try:
-                if not os.listdir(folder):
-                    # if the mod folder is completely empty, just delete it
-                    logger.debug("Deleting empty mod folder")
-                    files.delete_folder(folder)
-                    continue
-            except FileNotFoundError:
-                # in the case of a broken symlink, this will trigger an error
-                # unfortuantely, a os.path.exists or isdir will return true
-                logger.debug("Deleting broken symlink")
-                files.delete_symlink(folder)
-                continue
-
             # parse each mod
             try:
-                mods.append(self.parse_mod_manifest(folder, enabled=enabled))
+                mod = self.parse_mod_manifest(folder, enabled=enabled)
             except (NoManifestError, ManifestError):
                 errors.append(folder)
+                continue
+
+            mods.append(mod)
+
+            if batch_func:
+                batch.add(mod)
+
+        # send whatever is left over
+        if batch_func:
+            batch.flush()
 
         return mods, errors
 
-    def get_all_mods(self, progress_func: Callable = None) -> Tuple[list, list]:
-        """Returns data and errors for all mods."""
+    def reconcile_mod_folders(self) -> reconcile.reconciliation:
+        """Classifies every folder in the Community folder and the mod install
+        folder, such as linked, disabled, orphaned or empty."""
+        return reconcile.reconcile(
+            self.get_sim_mod_folder(),
+            libraries.get_libraries(),
+            libraries.get_offline_libraries(),
+        )
 
-        enabled_mod_folders = files.listdir_dirs(
-            self.get_sim_mod_folder(), full_paths=True
+    def audit_mod_links(self) -> List[links.link_report]:
+        """Checks every link in the Community folder, and returns those that
+        point outside of the mod install folder, or to folders that are gone."""
+        reports = links.audit_links(
+            self.get_sim_mod_folder(),
+            libraries.get_libraries(),
+            libraries.get_offline_libraries(),
         )
-        disabled_mod_folders = files.listdir_dirs(
-            files.get_mod_install_folder(), full_paths=True
+        logger.debug("{} link(s) need attention".format(len(reports)))
+        return reports
+
+    def repair_mod_links(
+        self,
+        reports: List[links.link_report],
+        update_func: Callable = None,
+        percent_func: Callable = None,
+    ) -> Tuple[List[str], List[str]]:
+        """Points links found by an audit at the copies of their mods in the mod
+        install folder. Returns the links that were repaired, and those that
+        failed."""
+        repaired, errors = links.repair_links(
+            reports, update_func=update_func, percent_func=percent_func
         )
 
-        for folder in enabled_mod_folders:
-            # remove duplicate folders from disabled list if there is a symlink for them
-            if files.is_symlink(folder):
-                install_folder = os.path.join(
-                    files.get_mod_install_folder(), os.path.basename(folder)
-                )
-                if install_folder in disabled_mod_folders:
-                    disabled_mod_folders.remove(install_folder)
+        for path in repaired + errors:
+            self.invalidate_mod_cache(path)
+
+        return (repaired, errors)
+
+    def get_all_mod_folders(self) -> Tuple[List[str], List[str]]:
+        """Returns the folders of all enabled mods, and of all disabled mods.
+        Disabled copies of linked mods, orphaned links and empty folders are
+        left out."""
+        return self.reconcile_mod_folders().get_mod_folders()
+
+    def find_mod_folder_cleanup(
+        self,
+    ) -> Tuple[List[reconcile.folder_state], List[str], List[str]]:
+        """Finds orphaned links and empty folders in the Community folder and
+        the mod libraries. Returns them, the mods that are in both folders, and
+        the folders that cannot be read. The last two are never removed."""
+        result = self.reconcile_mod_folders()
+        logger.debug("Mod folder states: {}".format(result.counts()))
+
+        return (
+            list(result.iter_state(reconcile.ORPHANED, reconcile.EMPTY)),
+            [folder.path for folder in result.iter_state(reconcile.DUPLICATE)],
+            [folder.path for folder in result.iter_state(reconcile.UNREADABLE)],
+        )
+
+    def clean_mod_folders(
+        self,
+        folders: List[reconcile.folder_state],
+        update_func: Callable = None,
+        percent_func: Callable = None,
+    ) -> Tuple[List[str], List[str]]:
+        """Removes orphaned links and empty folders found by
+        find_mod_folder_cleanup. Each is checked again first, and left alone if
+        it is no longer orphaned or empty. Returns what was removed, and what
+        failed to be removed."""
+        removed = []
+        errors = []
+
+        for i, folder in enumerate(folders):
+            if update_func:
+                update_func("Removing {} folder {}".format(folder.state, folder.path))
+
+            try:
+                state = reconcile.check_contents(folder.path, folder.link)
+                if state != folder.state:
+                    raise ValueError(
+                        "{} is {} now".format(folder.path, state or "not empty")
+                    )
+
+                if folder.link:
+                    files.delete_symlink(folder.path)
+                else:
+                    # fails rather than deleting anything that is in it
+                    os.rmdir(folder.path)
+                removed.append(folder.path)
+            except Exception:
+                logger.exception("Failed to remove {}".format(folder.path))
+                errors.append(folder.path)
+
+            self.invalidate_mod_cache(folder.path)
+
+            if percent_func:
+                percent_func((i, len(folders)))
+
+        return (removed, errors)
+
+    def get_all_mods(
+        self, progress_func: Callable = None, batch_func: Callable = None
+    ) -> Tuple[List[mod_record], list]:
+        """Returns data and errors for all mods."""
+        enabled_mod_folders, disabled_mod_folders = self.get_all_mod_folders()
 
         enabled_mod_data, enabled_mod_errors = self.get_mods(
-            enabled_mod_folders, enabled=True, progress_func=progress_func
+            enabled_mod_folders,
+            enabled=True,
+            progress_func=progress_func,
+            batch_func=batch_func,
         )
         disabled_mod_data, disabled_mod_errors = self.get_mods(
             disabled_mod_folders,
             enabled=False,
             progress_func=progress_func,
             start=len(enabled_mod_data) - 1,
+            batch_func=batch_func,
         )
 
+        # mods packed into archives are listed from the cold storage index
+        names = {mod.folder_name for mod in enabled_mod_data + disabled_mod_data}
+        cold_mod_data = [
+            record
+            for record in self.cold_index.records()
+            if record.folder_name not in names
+        ]
+        if batch_func and cold_mod_data:
+            batch_func(cold_mod_data)
+
+        logger.debug("Mod cache: {}".format(self.mod_cache.cache_info()))
+
         return (
-            enabled_mod_data + disabled_mod_data,
+            enabled_mod_data + disabled_mod_data + cold_mod_data,
             enabled_mod_errors + disabled_mod_errors,
         )
 
@@ -436,17 +1112,13 @@ class flight_sim:
         if update_func:
             update_func("Locating mods inside {}".format(folder))
 
-        # check the root folder for a manifest
-        if os.path.isfile(os.path.join(folder, "manifest.json")):
-            logger.debug("Mod found {}".format(os.path.join(folder)))
-            mod_folders.append(os.path.join(folder))
+        # find every folder with a manifest, including the root folder
+        manifests = walker.manifest_visitor()
+        walker.walker().walk(folder, [manifests])
 
-        for root, dirs, _ in os.walk(folder):
-            # go through each directory and check for the manifest
-            for d in dirs:
-                if os.path.isfile(os.path.join(root, d, "manifest.json")):
-                    logger.debug("Mod found {}".format(os.path.join(root, d)))
-                    mod_folders.append(os.path.join(root, d))
+        for mod_folder in sorted(manifests.mod_folders):
+            logger.debug("Mod found {}".format(mod_folder))
+            mod_folders.append(mod_folder)
 
         if not mod_folders:
             logger.error("No mods found")
@@ -454,13 +1126,120 @@ class flight_sim:
 
         return mod_folders
 
+    def choose_install_folder(self, mod_folder: str) -> str:
+        """Returns where to install a mod. A mod that is already installed is
+        replaced where it is, otherwise the placement policy picks a library."""
+        name = os.path.basename(mod_folder)
+        mod_libraries = libraries.get_libraries()
+
+        for library in mod_libraries:
+            if os.path.isdir(os.path.join(library, name)):
+                return os.path.join(library, name)
+
+        library = libraries.choose_library(
+            mod_libraries,
+            lambda: files.get_folder_size(mod_folder),
+            libraries.get_policy(),
+        )
+        logger.debug("Installing {} to library {}".format(name, library))
+        return os.path.join(library, name)
+
+    def get_library_mods(self) -> List[libraries.library_mod]:
+        """Returns every mod in every library, with its size."""
+        mods = []
+
+        for library in libraries.get_libraries():
+            for mod_folder in files.listdir_dirs(library, full_paths=True):
+                try:
+                    mod = self.parse_mod_manifest(mod_folder, enabled=False)
+                    size, scenery = mod.size, mod.content_type == libraries.SCENERY
+                except (NoManifestError, ManifestError):
+                    size, scenery = 0, False
+
+                if not size:
+                    size = files.get_folder_size(mod_folder)
+
+                mods.append(
+                    libraries.library_mod(
+                        os.path.basename(mod_folder), library, size, scenery
+                    )
+                )
+
+        return mods
+
+    def rebalance_libraries(
+        self, update_func: Callable = None, percent_func: Callable = None
+    ) -> Tuple[List[str], List[str]]:
+        """Moves mods between libraries, as the placement policy would have placed
+        them. Returns the mods that were moved, and those that failed to move."""
+        mod_libraries = libraries.get_libraries()
+        if len(mod_libraries) < 2:
+            return ([], [])
+
+        if update_func:
+            update_func("Measuring mod libraries")
+
+        moves = libraries.plan_rebalance(
+            mod_libraries, self.get_library_mods(), libraries.get_policy()
+        )
+        logger.debug("{} mod(s) to move between libraries".format(len(moves)))
+
+        # links in the Community folder, to point at the new copies
+        mod_folder = self.get_sim_mod_folder()
+        linked = {
+            links.normalize(target): path
+            for path, target in links.read_links(mod_folder).items()
+        }
+
+        moved = []
+        errors = []
+        targets = {}
+
+        try:
+            for i, (name, src, dest) in enumerate(moves):
+                src_mod = os.path.join(src, name)
+                dest_mod = os.path.join(dest, name)
+
+                if update_func:
+                    update_func(
+                        "Moving {} to {} ({} of {} mods)".format(
+                            name, dest, i + 1, len(moves)
+                        )
+                    )
+
+                try:
+                    relocate.move_mod(src_mod, dest_mod)
+                    moved.append(name)
+                except (OSError, files.AccessError, relocate.MoveError):
+                    logger.exception("Failed to move {} to {}".format(src_mod, dest))
+                    errors.append(name)
+                finally:
+                    self.invalidate_mod_cache(src_mod)
+                    self.invalidate_mod_cache(dest_mod)
+
+                # once the original is gone, the copy is the mod, even if the
+                # move did not finish cleanly
+                link = linked.get(links.normalize(src_mod))
+                if link and not os.path.isdir(src_mod) and os.path.isdir(dest_mod):
+                    targets[link] = dest_mod
+
+                if percent_func:
+                    percent_func((i, len(moves)))
+        finally:
+            # point the links of moved mods at their new copies, all at once,
+            # however the loop ended
+            _, link_errors = links.relink_all(targets, update_func=update_func)
+            errors.extend(os.path.basename(path) for path in link_errors)
+
+        return (moved, errors)
+
     def install_mods(
         self,
         folder: str,
         update_func: Callable = None,
         delete: bool = False,
         percent_func: Callable = None,
-    ) -> list:
+    ) -> mod_changes:
         """Extracts and installs a new mod."""
         logger.debug("Installing mod {}".format(folder))
 
@@ -472,9 +1251,7 @@ class flight_sim:
         for i, mod_folder in enumerate(mod_folders):
             # get the base folder name
             base_mod_folder = os.path.basename(mod_folder)
-            install_folder = os.path.join(
-                files.get_mod_install_folder(), base_mod_folder
-            )
+            install_folder = self.choose_install_folder(mod_folder)
             dest_folder = os.path.join(self.get_sim_mod_folder(), base_mod_folder)
 
             # copy mod to install dir
@@ -489,19 +1266,31 @@ class flight_sim:
             if percent_func:
                 percent_func((i, len(mod_folders)))
 
-            installed_mods.append(base_mod_folder)
+            installed_mods.append(dest_folder)
 
-        # clear the cache of the mod function
-        self.clear_mod_cache()
-        # return installed mods list
-        return installed_mods
+            # clear the cache of the replaced mod, if any
+            self.invalidate_mod_cache(install_folder)
+            self.invalidate_mod_cache(dest_folder)
+            self.index_mod_conflicts(install_folder)
+            self.graph_mod(dest_folder, dependencies.ENABLED)
+
+        self.conflict_index.save()
+
+        changes = mod_changes()
+        for dest_folder in installed_mods:
+            # a disabled copy of the mod is now linked into the sim
+            changes.removed.append((os.path.basename(dest_folder), False))
+            changes.added.append(self.parse_mod_manifest(dest_folder, enabled=True))
+
+        # return what was installed
+        return changes
 
     def install_mod_archive(
         self,
         mod_archive: str,
         update_func: Callable = None,
         percent_func: Callable = None,
-    ) -> list:
+    ) -> mod_changes:
         """Extracts and installs a new mod."""
         logger.debug("Installing mod {}".format(mod_archive))
         # extract the archive
@@ -516,24 +1305,50 @@ class flight_sim:
             percent_func=percent_func,
         )
 
-    def uninstall_mod(self, folder: str, update_func: Callable = None) -> bool:
+    def uninstall_mod(self, folder: str, update_func: Callable = None) -> mod_changes:
         """Uninstalls a mod."""
         logger.debug("Uninstalling mod {}".format(folder))
+        name = os.path.basename(folder)
+        enabled = folder == self.get_mod_folder(name, enabled=True)
+
         # delete folder
         files.delete_folder(folder, update_func=update_func)
-        return True
+        self.invalidate_mod_cache(folder)
+
+        # and the archive, if it was packed
+        cold = self.cold_index.remove(name)
+        if cold is not None:
+            if os.path.isfile(cold.archive):
+                files.delete_file(cold.archive, update_func=update_func)
+            self.cold_index.save()
+
+        self.conflict_index.remove(name)
+        self.conflict_index.save()
+        self.dependency_graph.remove_package(name)
 
-    def enable_mod(self, folder: str, update_func: Callable = None) -> bool:
+        changes = mod_changes()
+        changes.removed.append((name, enabled))
+        return changes
+
+    def enable_mod(self, folder: str, update_func: Callable = None) -> mod_changes:
         """Creates symlink to flight sim install."""
         logger.debug("Enabling mod {}".format(folder))
+        cold = self.cold_index.get(folder)
+        if cold is not None:
+            self.unpack_mod(cold, update_func=update_func)
+
         src_folder = self.get_mod_folder(folder, enabled=False)
         dest_folder = self.get_mod_folder(folder, enabled=True)
 
         # create symlink to sim
         files.create_symlink(src_folder, dest_folder, update_func=update_func)
-        return True
+        self.graph_mod(dest_folder, dependencies.ENABLED)
+
+        changes = mod_changes()
+        changes.changed.append(self.parse_mod_manifest(dest_folder, enabled=True))
+        return changes
 
-    def disable_mod(self, folder: str, update_func: Callable = None) -> bool:
+    def disable_mod(self, folder: str, update_func: Callable = None) -> mod_changes:
         """Deletes symlink/copies mod folder into mod install location."""
         logger.debug("Disabling mod {}".format(folder))
         src_folder = self.get_mod_folder(folder, enabled=True)
@@ -546,7 +1361,124 @@ class flight_sim:
             # move mod to mod install location
             files.move_folder(src_folder, dest_folder, update_func=update_func)
 
-        return True
+        self.graph_mod(dest_folder, dependencies.DISABLED)
+        mod = self.parse_mod_manifest(dest_folder, enabled=False)
+
+        # packing only saves space, so the mod is disabled either way
+        if cold_storage.is_enabled():
+            try:
+                self.pack_mod(mod, update_func=update_func)
+            except (cold_storage.PackError, OSError):
+                logger.exception("Failed to pack {}, kept as a folder".format(folder))
+
+        changes = mod_changes()
+        changes.changed.append(mod)
+        return changes
+
+    def pack_mod(self, mod: mod_record, update_func: Callable = None) -> int:
+        """Packs a disabled mod into an archive next to its folder, and deletes
+        the folder. The mod is still listed from the cold storage index.
+        Returns how many bytes were saved."""
+        logger.debug("Packing mod {}".format(mod.full_path))
+        archive = cold_storage.get_archive_path(mod.full_path)
+        members, size, packed_size = cold_storage.pack(
+            mod.full_path, archive, update_func=update_func
+        )
+
+        # nothing is deleted unless the archive holds all of the mod
+        if update_func:
+            update_func("Verifying {}".format(archive))
+        try:
+            cold_storage.verify_archive(archive, members, size)
+        except Exception:
+            files.delete_file(archive)
+            raise
+
+        # the index is saved before the folder is deleted, so the mod is never
+        # only in an archive no one knows about
+        self.cold_index.add(mod, archive, packed_size)
+        self.cold_index.save()
+
+        files.delete_folder(mod.full_path, update_func=update_func)
+        self.invalidate_mod_cache(mod.full_path)
+
+        logger.debug(
+            "Packed {} into {}".format(
+                files.human_readable_size(size),
+                files.human_readable_size(packed_size),
+            )
+        )
+        return size - packed_size
+
+    def unpack_mod(
+        self, cold: cold_storage.cold_mod, update_func: Callable = None
+    ) -> None:
+        """Restores a mod packed into an archive to its folder, and deletes the
+        archive."""
+        logger.debug("Unpacking mod {}".format(cold.archive))
+        cold_storage.unpack(cold.archive, cold.mod_folder, update_func=update_func)
+
+        self.cold_index.remove(cold.record.folder_name)
+        self.cold_index.save()
+
+        files.delete_file(cold.archive, update_func=update_func)
+        self.invalidate_mod_cache(cold.mod_folder)
+
+    def pack_disabled_mods(
+        self, update_func: Callable = None, percent_func: Callable = None
+    ) -> Tuple[List[str], List[str], int]:
+        """Packs every disabled mod into an archive. Returns the mods that were
+        packed, those that failed, and how many bytes were saved."""
+        _, disabled_mod_folders = self.get_all_mod_folders()
+
+        packed = []
+        errors = []
+        saved = 0
+
+        for i, mod_folder in enumerate(disabled_mod_folders):
+            if update_func:
+                update_func(
+                    "Packing {} ({} of {} mods)".format(
+                        os.path.basename(mod_folder), i + 1, len(disabled_mod_folders)
+                    )
+                )
+
+            try:
+                mod = self.parse_mod_manifest(mod_folder, enabled=False)
+                saved += self.pack_mod(mod)
+                packed.append(mod_folder)
+            except Exception:
+                logger.exception("Failed to pack {}".format(mod_folder))
+                errors.append(mod_folder)
+
+            if percent_func:
+                percent_func((i, len(disabled_mod_folders)))
+
+        return (packed, errors, saved)
+
+    def deduplicate_mod_files(
+        self, update_func: Callable = None, percent_func: Callable = None
+    ) -> Tuple[int, int, List[str]]:
+        """Replaces identical files across the mods in every library with hard
+        links to a single copy. Returns how many files were linked, how many
+        bytes were freed, and the files that failed."""
+        mod_folders = [
+            files.fix_path(mod_folder)
+            for library in libraries.get_libraries()
+            for mod_folder in files.listdir_dirs(library, full_paths=True)
+            if not files.is_symlink(mod_folder)
+        ]
+
+        result = dedup.deduplicate(
+            mod_folders,
+            self.dedup_index,
+            update_func=update_func,
+            percent_func=percent_func,
+        )
+
+        # linked files now have the dates of the copy they point to
+        self.clear_mod_cache()
+        return result
 
     def create_backup(self, archive: str, update_func: Callable = None) -> str:
         """Creates a backup of all enabled mods."""
@@ -555,15 +1487,30 @@ class flight_sim:
         )
 
     def move_mod_install_folder(
-        self, src: str, dest: str, update_func: Callable = None
-    ) -> None:
-        """Moves the mod install folder."""
+        self,
+        src: str,
+        dest: str,
+        update_func: Callable = None,
+        percent_func: Callable = None,
+    ) -> Tuple[List[str], List[str]]:
+        """Moves the mod install folder. The move is planned and saved first, and
+        checkpointed after every mod, so a move that was interrupted is resumed
+        by moving to the same folder again. Returns the links that were pointed
+        to the new folder, and those that failed."""
         logger.debug("Moving mod install folder from {} to {}".format(src, dest))
-        # first, build a list of the currently enabled mods
-        enabled_mod_folders = files.listdir_dirs(self.get_sim_mod_folder())
 
-        # move the install folder
-        files.move_folder(src, dest, update_func=update_func)
+        plan = relocate.load_plan()
+        if (
+            plan is not None
+            and files.check_same_path(plan.src, src)
+            and files.check_same_path(plan.dest, dest)
+        ):
+            logger.debug("Resuming move, {} mod(s) done".format(len(plan.done)))
+        else:
+            plan = relocate.make_plan(src, dest, self.get_sim_mod_folder())
+            plan.save()
+
+        relocate.run_plan(plan, update_func=update_func, percent_func=percent_func)
 
         # set new config value
         config.set_key_value(config.MOD_INSTALL_FOLDER_KEY, dest, path=True)
@@ -571,13 +1518,64 @@ class flight_sim:
         self.clear_mod_cache()
         config.get_key_value.cache_clear()
 
-        # now, go through mods in the install folder and re-enable them
-        # if they were enabled before.
-        moved_mod_folders = files.listdir_dirs(dest)
+        # now, point every link into the old folder at the new one, all at once
+        mod_folder = self.get_sim_mod_folder()
+        result = links.relink_all(
+            {
+                os.path.join(mod_folder, name): os.path.join(dest, name)
+                for name in plan.linked
+            },
+            update_func=update_func,
+            percent_func=percent_func,
+        )
+
+        relocate.clear_plan()
+        return result
+
+    def get_pending_move(self) -> Union[Tuple[str, str], None]:
+        """Returns where an interrupted move of the mod install folder was moving
+        from and to, if there is one."""
+        plan = relocate.load_plan()
+        return (plan.src, plan.dest) if plan is not None else None
+
+    def cancel_pending_move(self) -> None:
+        """Forgets an interrupted move of the mod install folder. Mods that were
+        already moved are left where they are."""
+        relocate.clear_plan()
+
+
+class get_all_mods_thread(thread.base_thread):
+    """Setup a thread to parse all mods and not block the main thread.
+    Parsed mods are emitted in batches through the data update signal,
+    and the final result is saved as the new mod snapshot."""
+
+    def __init__(self, flight_sim_handle: flight_sim, stream: bool = True) -> None:
+        """Initialize the mod parser thread."""
+        logger.debug("Initialzing mod parser thread")
+
+        def function() -> Tuple[list, list]:
+            result = flight_sim_handle.get_all_mods(
+                batch_func=self.data_update.emit if stream else None,  # type: ignore
+            )
+            snapshot.save_mods(result[0])
+            return result
+
+        thread.base_thread.__init__(self, function)
+
 
-        for mod_folder in moved_mod_folders:
-            if mod_folder in enabled_mod_folders:
-                self.enable_mod(mod_folder, update_func=update_func)
+class stream_mod_files_thread(thread.base_thread):
+    """Setup a thread to walk the files of a mod and not block the main thread.
+    Files are emitted in batches through the data update signal."""
+
+    def __init__(self, flight_sim_handle: flight_sim, mod_folder: str) -> None:
+        """Initialize the mod files walker thread."""
+        logger.debug("Initialzing mod files walker thread")
+        function = lambda: flight_sim_handle.stream_mod_files(
+            mod_folder,
+            batch_func=self.data_update.emit,  # type: ignore
+            cancel_func=self.isInterruptionRequested,
+        )
+        thread.base_thread.__init__(self, function)
 
 
 class install_mods_thread(thread.base_thread):
@@ -660,11 +1658,162 @@ class create_backup_thread(thread.base_thread):
         thread.base_thread.__init__(self, function)
 
 
+class find_mod_folder_cleanup_thread(thread.base_thread):
+    """Setup a thread to find mod folders to clean up and not block the main
+    thread."""
+
+    def __init__(self, flight_sim_handle: flight_sim) -> None:
+        """Initialize the mod folder cleanup finder thread."""
+        logger.debug("Initialzing mod folder cleanup finder thread")
+        function = lambda: flight_sim_handle.find_mod_folder_cleanup()
+        thread.base_thread.__init__(self, function)
+
+
+class clean_mod_folders_thread(thread.base_thread):
+    """Setup a thread to clean up mod folders and not block the main thread."""
+
+    def __init__(
+        self, flight_sim_handle: flight_sim, folders: List[reconcile.folder_state]
+    ) -> None:
+        """Initialize the mod folder cleaner thread."""
+        logger.debug("Initialzing mod folder cleaner thread")
+        function = lambda: flight_sim_handle.clean_mod_folders(
+            folders,
+            update_func=self.activity_update.emit,  # type: ignore
+            percent_func=self.percent_update.emit,  # type: ignore
+        )
+        thread.base_thread.__init__(self, function)
+
+
+class audit_mod_links_thread(thread.base_thread):
+    """Setup a thread to check mod links and not block the main thread."""
+
+    def __init__(self, flight_sim_handle: flight_sim) -> None:
+        """Initialize the mod link auditor thread."""
+        logger.debug("Initialzing mod link auditor thread")
+        function = lambda: flight_sim_handle.audit_mod_links()
+        thread.base_thread.__init__(self, function)
+
+
+class repair_mod_links_thread(thread.base_thread):
+    """Setup a thread to repair mod links and not block the main thread."""
+
+    def __init__(
+        self, flight_sim_handle: flight_sim, reports: List[links.link_report]
+    ) -> None:
+        """Initialize the mod link repairer thread."""
+        logger.debug("Initialzing mod link repairer thread")
+        function = lambda: flight_sim_handle.repair_mod_links(
+            reports,
+            update_func=self.activity_update.emit,  # type: ignore
+            percent_func=self.percent_update.emit,  # type: ignore
+        )
+        thread.base_thread.__init__(self, function)
+
+
+class rebalance_libraries_thread(thread.base_thread):
+    """Setup a thread to move mods between libraries and not block the main
+    thread."""
+
+    def __init__(self, flight_sim_handle: flight_sim) -> None:
+        """Initialize the mod library rebalancer thread."""
+        logger.debug("Initialzing mod library rebalancer thread")
+        function = lambda: flight_sim_handle.rebalance_libraries(
+            update_func=self.activity_update.emit,  # type: ignore
+            percent_func=self.percent_update.emit,  # type: ignore
+        )
+        thread.base_thread.__init__(self, function)
+
+
+class pack_disabled_mods_thread(thread.base_thread):
+    """Setup a thread to pack disabled mods into archives and not block the
+    main thread."""
+
+    def __init__(self, flight_sim_handle: flight_sim) -> None:
+        """Initialize the mod packer thread."""
+        logger.debug("Initialzing mod packer thread")
+        function = lambda: flight_sim_handle.pack_disabled_mods(
+            update_func=self.activity_update.emit,  # type: ignore
+            percent_func=self.percent_update.emit,  # type: ignore
+        )
+        thread.base_thread.__init__(self, function)
+
+
+class deduplicate_mod_files_thread(thread.base_thread):
+    """Setup a thread to link identical mod files together and not block the
+    main thread."""
+
+    def __init__(self, flight_sim_handle: flight_sim) -> None:
+        """Initialize the mod file deduplicator thread."""
+        logger.debug("Initialzing mod file deduplicator thread")
+        function = lambda: flight_sim_handle.deduplicate_mod_files(
+            update_func=self.activity_update.emit,  # type: ignore
+            percent_func=self.percent_update.emit,  # type: ignore
+        )
+        thread.base_thread.__init__(self, function)
+
+
+class generate_mod_layouts_thread(thread.base_thread):
+    """Setup a thread to rebuild mod layouts and not block the main thread."""
+
+    def __init__(self, flight_sim_handle: flight_sim) -> None:
+        """Initialize the mod layout generator thread."""
+        logger.debug("Initialzing mod layout generator thread")
+        function = lambda: flight_sim_handle.generate_mod_layouts(
+            update_func=self.activity_update.emit,  # type: ignore
+            percent_func=self.percent_update.emit,  # type: ignore
+        )
+        thread.base_thread.__init__(self, function)
+
+
+class verify_mods_thread(thread.base_thread):
+    """Setup a thread to verify mods and not block the main thread."""
+
+    def __init__(self, flight_sim_handle: flight_sim, deep: bool = False) -> None:
+        """Initialize the mod verifier thread."""
+        logger.debug("Initialzing mod verifier thread")
+        function = lambda: flight_sim_handle.verify_mods(
+            deep=deep,
+            update_func=self.activity_update.emit,  # type: ignore
+            percent_func=self.percent_update.emit,  # type: ignore
+        )
+        thread.base_thread.__init__(self, function)
+
+
+class update_indexes_thread(thread.base_thread):
+    """Setup a thread to index the dependencies and files of mods and not block
+    the main thread."""
+
+    def __init__(self, flight_sim_handle: flight_sim) -> None:
+        """Initialize the indexer thread."""
+        logger.debug("Initialzing indexer thread")
+        function = lambda: flight_sim_handle.update_indexes()
+        thread.base_thread.__init__(self, function)
+
+
+class get_all_conflicts_thread(thread.base_thread):
+    """Setup a thread to find conflicting mods and not block the main thread."""
+
+    def __init__(self, flight_sim_handle: flight_sim) -> None:
+        """Initialize the conflict finder thread."""
+        logger.debug("Initialzing conflict finder thread")
+        function = lambda: (
+            flight_sim_handle.get_all_conflicts(),
+            flight_sim_handle.get_official_overrides(),
+        )
+        thread.base_thread.__init__(self, function)
+
+
 class move_mod_install_folder_thread(thread.base_thread):
     """Setup a thread to move the mod install folder and not block the main thread."""
 
     def __init__(self, flight_sim_handle: flight_sim, src: str, dest: str):
         """Initialize the mod install folder mover thread."""
         logger.debug("Initialzing mod install folder mover thread")
-        function = lambda: flight_sim_handle.move_mod_install_folder(src, dest, update_func=self.activity_update.emit)  # type: ignore
+        function = lambda: flight_sim_handle.move_mod_install_folder(
+            src,
+            dest,
+            update_func=self.activity_update.emit,  # type: ignore
+            percent_func=self.percent_update.emit,  # type: ignore
+        )
         thread.base_thread.__init__(self, function)
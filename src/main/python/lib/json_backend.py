@@ -0,0 +1,79 @@
+import codecs
+import json
+import os
+from typing import Any, Union
+
+from loguru import logger
+
+# orjson parses straight from bytes, and is several times faster than the
+# standard library. It's optional, so fall back if it is not installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+# byte order marks some editors and tools write at the start of files,
+# which neither parser accepts
+UTF8_BOM = codecs.BOM_UTF8
+UTF16_BOMS = (codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)
+
+
+def decode(data: bytes) -> Union[bytes, str]:
+    """Strips a byte order mark from raw JSON. UTF-16 content is decoded to
+    text, as only UTF-8 can be parsed as bytes."""
+    if data.startswith(UTF8_BOM):
+        return data[len(UTF8_BOM) :]
+
+    if data.startswith(UTF16_BOMS):
+        return data.decode("utf-16")
+
+    return data
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Parses JSON from bytes or text, with the fastest available backend."""
+    if isinstance(data, bytes):
+        data = decode(data)
+    elif data.startswith("\ufeff"):
+        data = data[1:]
+
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # orjson is strict about things the standard library allows,
+            # such as NaN, so give that a try before failing
+            logger.debug("orjson could not parse data, falling back to json")
+
+    if isinstance(data, bytes):
+        data = data.decode("utf-8")
+
+    return json.loads(data)
+
+
+def load_file(path: str) -> Any:
+    """Reads and parses a JSON file."""
+    with open(path, "rb") as f:
+        return loads(f.read())
+
+
+def dumps(data: Any, indent: bool = False) -> bytes:
+    """Serializes data to UTF-8 JSON, with the fastest available backend."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0)
+
+    text = json.dumps(data, indent=2 if indent else None, ensure_ascii=False)
+    return text.encode("utf-8")
+
+
+def write_file(path: str, data: Any, indent: bool = False) -> None:
+    """Writes a JSON file. Written to a temporary file first, so a crash
+    never leaves a partially written file behind."""
+    tmp_file = "{}.tmp".format(path)
+
+    with open(tmp_file, "wb") as f:
+        f.write(dumps(data, indent=indent))
+
+    os.replace(tmp_file, path)
@@ -0,0 +1,278 @@
+import hashlib
+import json
+import os
+import re
+from typing import IO, Any, Iterable, Iterator, List
+
+import lib.json_backend as json_backend
+import lib.walker as walker
+
+# characters read from a layout.json file at a time
+LAYOUT_CHUNK_SIZE = 256 * 1024
+# layout.json files larger than this many bytes are streamed when summarized,
+# rather than parsed all at once, which is faster but uses more memory
+LAYOUT_STREAM_THRESHOLD = 16 * 1024 * 1024
+
+WHITESPACE_REGEX = re.compile(r"[ \t\n\r]*")
+
+# files that are never listed in a layout.json, the same as the sim's own tools
+EXCLUDED_FILES = ("layout.json", "manifest.json", "MSFSLayoutGenerator.exe")
+EXCLUDED_PREFIX = "_CVT_"
+
+# difference between the Windows file time epoch (1601) and the Unix epoch,
+# in 100 nanosecond intervals
+FILETIME_EPOCH_OFFSET = 116444736000000000
+
+decoder = json.JSONDecoder()
+
+
+class LayoutParseError(Exception):
+    """Raised when a layout.json file is not valid."""
+
+
+class layout_entry:
+    """A single file listed in a layout.json file."""
+
+    __slots__ = ("path", "size", "date")
+
+    def __init__(self, path: str, size: int, date: int) -> None:
+        # path relative to the mod folder
+        self.path = path
+        # size in bytes
+        self.size = size
+        # modification time, as a Windows file time
+        self.date = date
+
+
+def parse_entry(item: Any) -> layout_entry:
+    """Builds an entry from an item of the content list."""
+    try:
+        return layout_entry(
+            item["path"], int(item.get("size", 0)), int(item.get("date", 0))
+        )
+    except (TypeError, KeyError, ValueError, AttributeError):
+        raise LayoutParseError("Invalid entry {!r}".format(item))
+
+
+class layout_summary:
+    """Statistics of a layout.json file, computed without keeping its entries."""
+
+    __slots__ = ("file_count", "total_size", "newest_date")
+
+    def __init__(self) -> None:
+        self.file_count = 0
+        self.total_size = 0
+        # newest modification time, as a Windows file time
+        self.newest_date = 0
+
+    def add(self, entry: layout_entry) -> None:
+        """Adds a single entry to the statistics."""
+        self.file_count += 1
+        self.total_size += entry.size
+        if entry.date > self.newest_date:
+            self.newest_date = entry.date
+
+
+class layout_reader:
+    """Reads the content entries of a layout.json file one at a time, holding
+    no more than a chunk of the file in memory, instead of building every
+    entry up front."""
+
+    def __init__(self, f: IO[str], chunk_size: int = LAYOUT_CHUNK_SIZE) -> None:
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """Reads another chunk into the buffer, dropping what was consumed.
+        Returns False if the file has been read entirely."""
+        if self.eof:
+            return False
+
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+
+        self.buffer = self.buffer[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Skips whitespace and returns the next character, without consuming it.
+        Returns an empty string at the end of the file."""
+        while True:
+            self.pos = WHITESPACE_REGEX.match(self.buffer, self.pos).end()  # type: ignore
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        """Consumes the given character, after any whitespace."""
+        if self.peek() != char:
+            raise LayoutParseError(
+                "Expected {!r} at {!r}".format(char, self.buffer[self.pos :][:20])
+            )
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Decodes and consumes the next JSON value."""
+        self.peek()
+
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                # most likely the value is cut off at the end of the buffer
+                if not self.fill():
+                    raise LayoutParseError(e)
+                continue
+
+            # a number at the very end of the buffer might continue in the next
+            # chunk, so only trust it once something follows it
+            if end == len(self.buffer) and self.fill():
+                continue
+
+            self.pos = end
+            return value
+
+    def __iter__(self) -> Iterator[layout_entry]:
+        """Iterates the entries of the content list."""
+        self.expect("{")
+
+        while True:
+            if self.peek() == "}":
+                # no content list at all
+                return
+
+            key = self.value()
+            self.expect(":")
+
+            if key != "content":
+                # skip over anything else, those are small
+                self.value()
+                if self.peek() == ",":
+                    self.pos += 1
+                continue
+
+            self.expect("[")
+            if self.peek() == "]":
+                return
+
+            while True:
+                yield parse_entry(self.value())
+
+                if self.peek() == ",":
+                    self.pos += 1
+                    continue
+
+                self.expect("]")
+                return
+
+
+def iter_layout(layout_path: str) -> Iterator[layout_entry]:
+    """Iterates the entries of a layout.json file."""
+    # utf-8-sig skips a byte order mark, if there is one
+    with open(layout_path, "r", encoding="utf-8-sig") as f:
+        yield from layout_reader(f)
+
+
+def load_layout(layout_path: str) -> List[layout_entry]:
+    """Parses all of the entries of a layout.json file at once. Faster than
+    iterating when every entry is needed anyway."""
+    data = json_backend.load_file(layout_path)
+
+    try:
+        content = data.get("content", [])
+    except AttributeError:
+        raise LayoutParseError("Invalid layout {!r}".format(layout_path))
+
+    return [parse_entry(item) for item in content]
+
+
+def summarize(entries: Iterable[layout_entry]) -> layout_summary:
+    """Computes the statistics of layout entries, one entry at a time."""
+    summary = layout_summary()
+    for entry in entries:
+        summary.add(entry)
+    return summary
+
+
+def summarize_layout(layout_path: str) -> layout_summary:
+    """Computes the statistics of a layout.json file. Large files are streamed,
+    so their entries are never all held in memory."""
+    if os.path.getsize(layout_path) > LAYOUT_STREAM_THRESHOLD:
+        return summarize(iter_layout(layout_path))
+
+    return summarize(load_layout(layout_path))
+
+
+def to_filetime(mtime_ns: int) -> int:
+    """Converts a modification time in nanoseconds to a Windows file time."""
+    return mtime_ns // 100 + FILETIME_EPOCH_OFFSET
+
+
+class layout_visitor(walker.visitor):
+    """Builds the layout entries of every file in a mod."""
+
+    def __init__(self) -> None:
+        self.entries = []  # type: List[layout_entry]
+
+    def visit_folder(self, entry: os.DirEntry, rel_folder: str) -> bool:
+        # the _CVT_ folder of converted files is left out as a whole
+        return not (rel_folder == os.curdir and entry.name.startswith(EXCLUDED_PREFIX))
+
+    def visit_file(
+        self, entry: os.DirEntry, stats: os.stat_result, rel_folder: str
+    ) -> None:
+        if entry.name in EXCLUDED_FILES:
+            return
+
+        # the sim always uses forward slashes, relative to the mod
+        if rel_folder == os.curdir:
+            path = entry.name
+        else:
+            path = "{}/{}".format(rel_folder.replace(os.sep, "/"), entry.name)
+
+        if path.startswith(EXCLUDED_PREFIX):
+            return
+
+        self.entries.append(
+            layout_entry(path, stats.st_size, to_filetime(stats.st_mtime_ns))
+        )
+
+
+def build_layout(
+    mod_folder: str, workers: int = walker.WALK_WORKERS
+) -> List[layout_entry]:
+    """Builds the layout entries of a mod from its files, sorted by path."""
+    visitor = layout_visitor()
+    walker.walker(workers=workers).walk(mod_folder, [visitor])
+    return sorted(visitor.entries, key=lambda entry: entry.path)
+
+
+def digest(entries: Iterable[layout_entry]) -> str:
+    """Returns a fingerprint of the paths and sizes of layout entries, which
+    ignores their order. Dates are left out, as extracting, building or linking
+    a mod changes them without changing what the sim needs to know."""
+    h = hashlib.sha1()
+    for entry in sorted(entries, key=lambda entry: entry.path):
+        h.update("{}\0{}\n".format(entry.path, entry.size).encode("utf-8"))
+    return h.hexdigest()
+
+
+def write_layout(layout_path: str, entries: List[layout_entry]) -> None:
+    """Writes a layout.json file atomically."""
+    json_backend.write_file(
+        layout_path,
+        {
+            "content": [
+                {"path": entry.path, "size": entry.size, "date": entry.date}
+                for entry in entries
+            ]
+        },
+        indent=True,
+    )
@@ -0,0 +1,220 @@
+import functools
+import os
+import shutil
+import time
+from typing import Callable, Dict, List, Tuple
+
+from loguru import logger
+
+import lib.config as config
+import lib.files as files
+
+# placement policies, deciding which library a new mod is installed to
+# the library on the drive with the most free space, relative to its size
+FREE_SPACE = "free_space"
+# the fastest drive with room for the mod
+FASTEST = "fastest"
+# always the main mod install folder
+MANUAL = "manual"
+POLICIES = (FREE_SPACE, FASTEST, MANUAL)
+
+# separates library paths in the config file, as no Windows path contains it
+LIBRARY_SEPARATOR = "|"
+
+# bytes written and read back to measure the speed of a drive
+SPEED_PROBE_SIZE = 8 * 1024 * 1024
+# a mod is only placed on a drive with this much more free space than it needs
+SPACE_MARGIN = 1024 * 1024 * 1024
+# rebalancing stops once the free fractions of all drives are this close
+REBALANCE_TOLERANCE = 0.05
+# content type of mods that prefer the fastest drive
+SCENERY = "SCENERY"
+
+
+def get_extra_libraries() -> List[str]:
+    """Returns the mod libraries besides the main mod install folder."""
+    succeeded, value = config.get_key_value(config.MOD_LIBRARIES_KEY)
+    if not succeeded or not value:
+        return []
+    return [os.path.normpath(path) for path in value.split(LIBRARY_SEPARATOR)]
+
+
+def set_extra_libraries(libraries: List[str]) -> None:
+    """Writes the mod libraries besides the main mod install folder."""
+    config.set_key_value(
+        config.MOD_LIBRARIES_KEY,
+        LIBRARY_SEPARATOR.join(os.path.normpath(path) for path in libraries),
+    )
+
+
+def get_libraries() -> List[str]:
+    """Returns every mod library, the main mod install folder first. Libraries
+    that are not available, such as on a disconnected drive, are left out."""
+    libraries = [files.get_mod_install_folder()]
+
+    for library in get_extra_libraries():
+        if os.path.isdir(library):
+            libraries.append(files.fix_path(library))
+        else:
+            logger.warning("Mod library {} is not available".format(library))
+
+    return libraries
+
+
+def get_offline_libraries() -> List[str]:
+    """Returns the mod libraries that are configured, but not available, such as
+    on a disconnected drive. Links into them are left alone."""
+    return [library for library in get_extra_libraries() if not os.path.isdir(library)]
+
+
+def get_policy() -> str:
+    """Returns the placement policy of new mods."""
+    succeeded, value = config.get_key_value(config.PLACEMENT_POLICY_KEY)
+    return value if succeeded and value in POLICIES else MANUAL
+
+
+def set_policy(policy: str) -> None:
+    """Writes the placement policy of new mods."""
+    config.set_key_value(config.PLACEMENT_POLICY_KEY, policy)
+
+
+def get_device(folder: str) -> int:
+    """Returns the device a folder is on, so libraries sharing a drive are
+    treated as one."""
+    return os.stat(folder).st_dev
+
+
+def get_space(folder: str) -> Tuple[int, int]:
+    """Returns the free and total space of the drive a folder is on."""
+    usage = shutil.disk_usage(folder)
+    return (usage.free, usage.total)
+
+
+@functools.lru_cache()
+def measure_speed(folder: str) -> float:
+    """Returns how many bytes a second the drive of a folder writes and reads
+    back. Measured once per run with a small probe file."""
+    probe = os.path.join(folder, ".speed_probe")
+    data = os.urandom(SPEED_PROBE_SIZE)
+
+    try:
+        start = time.perf_counter()
+        with open(probe, "wb", buffering=0) as f:
+            f.write(data)
+            os.fsync(f.fileno())
+        with open(probe, "rb", buffering=0) as f:
+            f.read()
+        elapsed = time.perf_counter() - start
+    except OSError:
+        logger.exception("Unable to measure the speed of {}".format(folder))
+        return 0.0
+    finally:
+        if os.path.isfile(probe):
+            os.remove(probe)
+
+    speed = 2 * SPEED_PROBE_SIZE / max(elapsed, 1e-6)
+    logger.debug("Speed of {}: {}/s".format(folder, files.human_readable_size(speed)))
+    return speed
+
+
+def choose_library(
+    libraries: List[str], size_func: Callable[[], int], policy: str
+) -> str:
+    """Returns the library to install a mod to. The size of the mod is only
+    measured if the policy has a choice to make."""
+    if policy == MANUAL or len(libraries) == 1:
+        return libraries[0]
+
+    size = size_func()
+
+    spaces = {library: get_space(library) for library in libraries}
+    fitting = [
+        library for library in libraries if spaces[library][0] > size + SPACE_MARGIN
+    ]
+    if not fitting:
+        # nothing has room to spare, so let the main library fail or not
+        return libraries[0]
+
+    if policy == FASTEST:
+        return max(fitting, key=measure_speed)
+
+    return max(fitting, key=lambda library: spaces[library][0] / spaces[library][1])
+
+
+class library_mod:
+    """A mod in a library, as seen by the rebalancer."""
+
+    __slots__ = ("name", "library", "size", "scenery")
+
+    def __init__(self, name: str, library: str, size: int, scenery: bool) -> None:
+        self.name = name
+        self.library = library
+        self.size = size
+        self.scenery = scenery
+
+
+def plan_rebalance(
+    libraries: List[str], mods: List[library_mod], policy: str
+) -> List[Tuple[str, str, str]]:
+    """Plans which mods to move between libraries. With the fastest drive
+    policy, scenery is moved to the fastest drive first. Then the largest mods
+    that fit are moved from the fullest drive to the emptiest, until every
+    drive is about as full as the others. Returns the names of the mods to
+    move, with the library they are in and the library to move them to."""
+    devices = {library: get_device(library) for library in libraries}
+    # free and total space of each drive, updated as moves are planned
+    space = {}  # type: Dict[int, List[int]]
+    for library in libraries:
+        space.setdefault(devices[library], list(get_space(library)))
+
+    moves = []
+    moved = set()
+
+    def plan_move(mod: library_mod, dest: str) -> None:
+        space[devices[mod.library]][0] += mod.size
+        space[devices[dest]][0] -= mod.size
+        moves.append((mod.name, mod.library, dest))
+        moved.add(mod.name)
+
+    if policy == FASTEST:
+        fastest = max(libraries, key=measure_speed)
+        for mod in sorted(mods, key=lambda mod: mod.size):
+            if (
+                mod.scenery
+                and devices[mod.library] != devices[fastest]
+                and space[devices[fastest]][0] > mod.size + SPACE_MARGIN
+            ):
+                plan_move(mod, fastest)
+
+    def free_fraction(library: str) -> float:
+        free, total = space[devices[library]]
+        return free / total
+
+    # one move per mod at most, so this always ends
+    for _ in range(len(mods)):
+        fullest = min(libraries, key=free_fraction)
+        emptiest = max(libraries, key=free_fraction)
+        if (
+            devices[fullest] == devices[emptiest]
+            or free_fraction(emptiest) - free_fraction(fullest) < REBALANCE_TOLERANCE
+        ):
+            break
+
+        # the largest mod that does not swap which drive is fuller
+        fullest_free, fullest_total = space[devices[fullest]]
+        emptiest_free, emptiest_total = space[devices[emptiest]]
+        candidates = [
+            mod
+            for mod in mods
+            if mod.library == fullest
+            and mod.name not in moved
+            and not (policy == FASTEST and mod.scenery)
+            and (fullest_free + mod.size) / fullest_total
+            <= (emptiest_free - mod.size) / emptiest_total
+        ]
+        if not candidates:
+            break
+
+        plan_move(max(candidates, key=lambda mod: mod.size), emptiest)
+
+    return moves
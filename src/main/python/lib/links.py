@@ -0,0 +1,368 @@
+import concurrent.futures
+import os
+import struct
+import subprocess
+import sys
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from loguru import logger
+
+import lib.walker as walker
+
+if sys.platform == "win32":
+    import win32file
+    import winioctlcon
+
+# reparse point tags, and the largest reparse data Windows will return
+IO_REPARSE_TAG_MOUNT_POINT = 0xA0000003
+IO_REPARSE_TAG_SYMLINK = 0xA000000C
+MAXIMUM_REPARSE_DATA_BUFFER_SIZE = 16 * 1024
+
+FILE_FLAG_OPEN_REPARSE_POINT = 0x00200000
+FILE_FLAG_BACKUP_SEMANTICS = 0x02000000
+GENERIC_WRITE = 0x40000000
+
+# number of links rewritten at once
+RELINK_WORKERS = 8
+
+# prefix of the substitute name of a junction
+NT_PREFIX = "\\??\\"
+# prefix of long paths
+LONG_PATH_PREFIX = "\\\\?\\"
+
+# states a link can be in
+# points to a mod folder in one of the mod libraries
+OK = "ok"
+# points to a folder that exists, outside of the mod libraries
+OUTSIDE = "outside"
+# points to a folder that no longer exists
+MISSING = "missing"
+# points into a mod library that is not available, such as on a disconnected
+# drive
+OFFLINE = "offline"
+
+
+class LinkError(Exception):
+    """Raised when the target of a link cannot be read."""
+
+
+def parse_reparse_data(data: bytes) -> str:
+    """Returns the target of a junction or symlink from its raw reparse data."""
+    tag = struct.unpack_from("<L", data)[0]
+
+    if tag == IO_REPARSE_TAG_MOUNT_POINT:
+        buffer_offset = 16
+    elif tag == IO_REPARSE_TAG_SYMLINK:
+        # symlinks have an extra flags field
+        buffer_offset = 20
+    else:
+        raise LinkError("Unsupported reparse tag {:#x}".format(tag))
+
+    sub_offset, sub_length, print_offset, print_length = struct.unpack_from(
+        "<HHHH", data, 8
+    )
+
+    # the print name is what mklink was given, the substitute name is the
+    # same path in NT form, which is all some tools fill in
+    if print_length:
+        start = buffer_offset + print_offset
+        return data[start : start + print_length].decode("utf-16-le")
+
+    start = buffer_offset + sub_offset
+    target = data[start : start + sub_length].decode("utf-16-le")
+    if target.startswith(NT_PREFIX):
+        target = target[len(NT_PREFIX) :]
+    return target
+
+
+def read_link(path: str) -> str:
+    """Returns the target of a symlink or directory junction. On Windows, the
+    reparse point is read directly, rather than asking fsutil about it."""
+    if sys.platform != "win32" or os.path.islink(path):
+        try:
+            return os.readlink(path)
+        except OSError as e:
+            raise LinkError(e)
+
+    try:
+        handle = win32file.CreateFile(
+            path,
+            0,
+            win32file.FILE_SHARE_READ
+            | win32file.FILE_SHARE_WRITE
+            | win32file.FILE_SHARE_DELETE,
+            None,
+            win32file.OPEN_EXISTING,
+            FILE_FLAG_OPEN_REPARSE_POINT | FILE_FLAG_BACKUP_SEMANTICS,
+            None,
+        )
+        try:
+            data = win32file.DeviceIoControl(
+                handle,
+                winioctlcon.FSCTL_GET_REPARSE_POINT,
+                None,
+                MAXIMUM_REPARSE_DATA_BUFFER_SIZE,
+            )
+        finally:
+            handle.Close()
+    except Exception as e:
+        raise LinkError(e)
+
+    return parse_reparse_data(bytes(data))
+
+
+def build_junction_data(target: str) -> bytes:
+    """Returns the raw reparse data of a junction pointing to a folder."""
+    print_name = target.encode("utf-16-le")
+    sub_name = (NT_PREFIX + target).encode("utf-16-le")
+    # both names are null terminated, the substitute name first
+    path_buffer = sub_name + b"\0\0" + print_name + b"\0\0"
+
+    return (
+        struct.pack(
+            "<LHHHHHH",
+            IO_REPARSE_TAG_MOUNT_POINT,
+            8 + len(path_buffer),
+            0,
+            0,
+            len(sub_name),
+            len(sub_name) + 2,
+            len(print_name),
+        )
+        + path_buffer
+    )
+
+
+def create_junction(path: str, target: str) -> None:
+    """Creates a directory junction, by writing its reparse point directly
+    rather than running mklink."""
+    target = os.path.abspath(target)
+    if target.startswith(LONG_PATH_PREFIX):
+        target = target[len(LONG_PATH_PREFIX) :]
+
+    os.mkdir(path)
+    try:
+        handle = win32file.CreateFile(
+            path,
+            GENERIC_WRITE,
+            0,
+            None,
+            win32file.OPEN_EXISTING,
+            FILE_FLAG_OPEN_REPARSE_POINT | FILE_FLAG_BACKUP_SEMANTICS,
+            None,
+        )
+        try:
+            win32file.DeviceIoControl(
+                handle,
+                winioctlcon.FSCTL_SET_REPARSE_POINT,
+                build_junction_data(target),
+                0,
+            )
+        finally:
+            handle.Close()
+    except Exception as e:
+        os.rmdir(path)
+        raise LinkError(e)
+
+
+def iter_links(folder: str) -> List[str]:
+    """Returns the paths of the links in a folder, read in one pass."""
+    try:
+        with os.scandir(folder) as it:
+            return [entry.path for entry in it if walker.is_link(entry)]
+    except OSError:
+        logger.warning("Unable to read folder {}".format(folder))
+        return []
+
+
+def read_links(folder: str, workers: int = walker.WALK_WORKERS) -> Dict[str, str]:
+    """Returns the targets of every link in a folder, read in parallel.
+    Links that cannot be read are left out."""
+
+    def read(path: str) -> Tuple[str, str]:
+        try:
+            return (path, read_link(path))
+        except LinkError:
+            logger.exception("Unable to read link {}".format(path))
+            return (path, "")
+
+    with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+        return {
+            path: target
+            for path, target in executor.map(read, iter_links(folder))
+            if target
+        }
+
+
+def normalize(path: str) -> str:
+    """Returns a path in the form it is compared in."""
+    if path.startswith(LONG_PATH_PREFIX):
+        path = path[len(LONG_PATH_PREFIX) :]
+    return os.path.normcase(os.path.normpath(path))
+
+
+class link_report:
+    """Result of checking a single link in the Community folder."""
+
+    __slots__ = ("path", "target", "state", "repair_target")
+
+    def __init__(
+        self, path: str, target: str, state: str, repair_target: str = ""
+    ) -> None:
+        self.path = path
+        self.target = target
+        self.state = state
+        # where the link should point instead, if a copy of the mod was found
+        # in one of the mod libraries
+        self.repair_target = repair_target
+
+    def __repr__(self) -> str:
+        return "link_report({!r}, {!r})".format(self.path, self.state)
+
+
+def check_link(
+    path: str, install_folders: List[str], offline_folders: Iterable[str] = ()
+) -> link_report:
+    """Reads the target of a link, and checks it against the mod libraries."""
+    try:
+        target = read_link(path)
+    except LinkError:
+        logger.exception("Unable to read link {}".format(path))
+        target = ""
+
+    if target and not os.path.isabs(target):
+        # symlinks can be relative to the folder they are in
+        target = os.path.join(os.path.dirname(path), target)
+
+    if target and os.path.dirname(normalize(target)) in {
+        normalize(folder) for folder in offline_folders
+    }:
+        return link_report(path, target, OFFLINE)
+
+    if target and os.path.isdir(target):
+        if os.path.dirname(normalize(target)) in {
+            normalize(folder) for folder in install_folders
+        }:
+            return link_report(path, target, OK)
+        state = OUTSIDE
+    else:
+        state = MISSING
+
+    # the mod folder of the same name, where the link is expected to point
+    repair_target = ""
+    for install_folder in install_folders:
+        if os.path.isdir(os.path.join(install_folder, os.path.basename(path))):
+            repair_target = os.path.join(install_folder, os.path.basename(path))
+            break
+
+    return link_report(path, target, state, repair_target)
+
+
+def audit_links(
+    community_folder: str,
+    install_folders: List[str],
+    offline_folders: Iterable[str] = (),
+    workers: int = walker.WALK_WORKERS,
+) -> List[link_report]:
+    """Checks every link in the Community folder in one pass. The folder is read
+    once, and links are read in parallel. Returns the links that are not ok,
+    sorted by path. Links into libraries that are not available are skipped."""
+    with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+        reports = executor.map(
+            lambda path: check_link(path, install_folders, offline_folders),
+            iter_links(community_folder),
+        )
+        return sorted(
+            (report for report in reports if report.state not in (OK, OFFLINE)),
+            key=lambda report: report.path,
+        )
+
+
+def relink(path: str, target: str) -> None:
+    """Points an existing link at a new target."""
+    # removing a junction or directory symlink as a directory does not touch
+    # what it points to, and needs no external tool
+    if sys.platform != "win32":
+        os.unlink(path)
+        os.symlink(target, path)
+        return
+
+    os.rmdir(path)
+    try:
+        create_junction(path, target)
+    except LinkError:
+        logger.exception("Unable to create junction {} directly".format(path))
+        subprocess.run(
+            ["cmd", "/c", "mklink", "/J", path, target],
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+
+def copy_link(src: str, dest: str) -> None:
+    """Creates a link pointing to the same target as an existing one. A link
+    already at the destination is replaced."""
+    target = read_link(src)
+
+    if os.path.lexists(dest):
+        if read_link(dest) == target:
+            return
+        # removing a link as a directory does not touch what it points to
+        if sys.platform == "win32" and os.path.isdir(dest):
+            os.rmdir(dest)
+        else:
+            os.unlink(dest)
+
+    if sys.platform == "win32" and not os.path.islink(src):
+        # anything that is not a symlink is a junction
+        create_junction(dest, target)
+    else:
+        os.symlink(target, dest, target_is_directory=os.path.isdir(src))
+
+
+def relink_all(
+    targets: Dict[str, str],
+    workers: int = RELINK_WORKERS,
+    update_func: Callable = None,
+    percent_func: Callable = None,
+) -> Tuple[List[str], List[str]]:
+    """Points many existing links at new targets at once. Returns the links
+    that were rewritten, and those that failed."""
+    relinked = []
+    errors = []
+
+    def run(path: str) -> None:
+        relink(path, targets[path])
+
+    with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+        futures = {executor.submit(run, path): path for path in targets}
+
+        for i, future in enumerate(concurrent.futures.as_completed(futures)):
+            path = futures[future]
+            try:
+                future.result()
+                relinked.append(path)
+            except (OSError, subprocess.CalledProcessError):
+                logger.exception("Unable to rewrite link {}".format(path))
+                errors.append(path)
+
+            if update_func:
+                update_func("Pointing {} to {}".format(path, targets[path]))
+            if percent_func:
+                percent_func((i, len(targets)))
+
+    return (sorted(relinked), sorted(errors))
+
+
+def repair_links(
+    reports: List[link_report],
+    update_func: Callable = None,
+    percent_func: Callable = None,
+) -> Tuple[List[str], List[str]]:
+    """Points every link that can be repaired at its copy in the mod libraries.
+    Returns the links that were repaired, and those that failed."""
+    targets = {
+        report.path: report.repair_target for report in reports if report.repair_target
+    }
+    return relink_all(targets, update_func=update_func, percent_func=percent_func)
@@ -0,0 +1,99 @@
+import datetime
+from typing import Any, Dict, Iterable, Tuple
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def format_timestamp(timestamp: float) -> str:
+    """Formats a timestamp for display."""
+    if not timestamp:
+        return ""
+    return datetime.datetime.fromtimestamp(timestamp).strftime(TIME_FORMAT)
+
+
+class mod_record:
+    """Data of a single mod, as parsed from its manifest.
+    Slotted rather than a dictionary per mod, and keeps the raw timestamp,
+    which is only formatted when it is displayed."""
+
+    __slots__ = (
+        "folder_name",
+        "content_type",
+        "title",
+        "manufacturer",
+        "creator",
+        "version",
+        "minimum_game_version",
+        "size",
+        "timestamp",
+        "enabled",
+        "full_path",
+        "dependencies",
+    )
+
+    def __init__(
+        self,
+        folder_name: str,
+        content_type: str = "",
+        title: str = "",
+        manufacturer: str = "",
+        creator: str = "",
+        version: str = "",
+        minimum_game_version: str = "",
+        size: int = 0,
+        timestamp: float = 0.0,
+        enabled: bool = True,
+        full_path: str = "",
+        dependencies: Iterable[Tuple[str, str]] = (),
+    ) -> None:
+        self.folder_name = folder_name
+        self.content_type = content_type
+        self.title = title
+        self.manufacturer = manufacturer
+        self.creator = creator
+        self.version = version
+        self.minimum_game_version = minimum_game_version
+        # size as recorded by the package itself, in bytes
+        self.size = size
+        # creation time of the manifest
+        self.timestamp = timestamp
+        self.enabled = enabled
+        self.full_path = full_path
+        # names of the packages this one depends on, and the version it asks for
+        self.dependencies = tuple(tuple(dep) for dep in dependencies)
+
+    @property
+    def time_mod(self) -> str:
+        """Formatted creation time of the manifest."""
+        return format_timestamp(self.timestamp)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Returns a field by name, like a dictionary would."""
+        return getattr(self, key, default)
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, mod_record):
+            return NotImplemented
+        return all(getattr(self, key) == getattr(other, key) for key in self.__slots__)
+
+    # compared by value, but the fields can change, so records are unhashable.
+    # Key them by folder name instead
+    __hash__ = None  # type: ignore
+
+    def __repr__(self) -> str:
+        return "mod_record({!r}, enabled={!r})".format(self.folder_name, self.enabled)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the fields as a dictionary, such as for saving to JSON."""
+        return {key: getattr(self, key) for key in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "mod_record":
+        """Builds a record from a dictionary of fields. Unknown keys are ignored."""
+        return cls(**{key: data[key] for key in cls.__slots__ if key in data})
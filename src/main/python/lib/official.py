@@ -0,0 +1,117 @@
+import hashlib
+import os
+import threading
+from typing import Any, Dict, Iterable, Tuple, Union
+
+from loguru import logger
+
+import lib.cache as cache
+import lib.config as config
+import lib.json_backend as json_backend
+from lib.mod_record import mod_record
+
+OFFICIAL_INVENTORY_VERSION = 2
+
+
+def get_fingerprint(folder: str) -> Tuple:
+    """Returns a fingerprint of the official packages folder, which changes when
+    packages are added or removed, and when a sim update rewrites the manifest
+    of any of them, such as the one of fs-base."""
+    try:
+        package_folders = sorted(
+            entry.path for entry in os.scandir(folder) if entry.is_dir()
+        )
+    except OSError:
+        package_folders = []
+
+    h = hashlib.sha1()
+    for package_folder in package_folders:
+        manifest = cache.fingerprint(os.path.join(package_folder, "manifest.json"))
+        h.update("{}\0{}\n".format(package_folder, manifest).encode("utf-8"))
+
+    return tuple(cache.fingerprint(folder) or ()) + (h.hexdigest(),)
+
+
+class official_inventory:
+    """Index of the sim's official packages, as parsed from their manifests.
+    Persisted along with the fingerprint of the official packages folder, and
+    only rebuilt once packages are added to or removed from it, or one of their
+    manifests changes."""
+
+    def __init__(self) -> None:
+        # folder the packages were listed from, and its fingerprint at the time
+        self.folder = ""
+        self.fingerprint = None  # type: Any
+        # package name to record
+        self.packages = {}  # type: Dict[str, mod_record]
+        self.loaded = False
+
+        # the inventory is updated from worker threads
+        self.lock = threading.RLock()
+
+    def load(self) -> None:
+        """Loads the inventory from disk, the first time it is needed."""
+        with self.lock:
+            if self.loaded:
+                return
+            self.loaded = True
+
+            if not os.path.isfile(config.OFFICIAL_INVENTORY_FILE):
+                return
+
+            try:
+                data = json_backend.load_file(config.OFFICIAL_INVENTORY_FILE)
+            except Exception:
+                logger.exception("Official package inventory could not be parsed")
+                return
+
+            if data.get("version") != OFFICIAL_INVENTORY_VERSION:
+                logger.debug("Official package inventory version mismatch, ignoring")
+                return
+
+            self.folder = data["folder"]
+            self.fingerprint = tuple(data["fingerprint"])
+            self.packages = {
+                package["folder_name"]: mod_record.from_dict(package)
+                for package in data["packages"]
+            }
+
+    def save(self) -> None:
+        """Writes the inventory to disk."""
+        with self.lock:
+            try:
+                json_backend.write_file(
+                    config.OFFICIAL_INVENTORY_FILE,
+                    {
+                        "version": OFFICIAL_INVENTORY_VERSION,
+                        "folder": self.folder,
+                        "fingerprint": list(self.fingerprint),
+                        "packages": [
+                            package.to_dict() for package in self.packages.values()
+                        ],
+                    },
+                )
+            except Exception:
+                logger.exception("Official package inventory could not be written")
+
+    def is_current(self, folder: str, fingerprint: Any) -> bool:
+        """Returns if the inventory was built from the given folder, at the given
+        fingerprint."""
+        with self.lock:
+            self.load()
+            return self.folder == folder and self.fingerprint == fingerprint
+
+    def update(
+        self, folder: str, fingerprint: Any, packages: Iterable[mod_record]
+    ) -> None:
+        """Replaces the inventory with the packages of a folder."""
+        with self.lock:
+            self.folder = folder
+            self.fingerprint = fingerprint
+            self.packages = {package.folder_name: package for package in packages}
+
+    def get(self, name: str) -> Union[mod_record, None]:
+        """Returns the record of an official package, if it exists."""
+        with self.lock:
+            self.load()
+            return self.packages.get(name)
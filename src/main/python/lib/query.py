@@ -0,0 +1,235 @@
+import datetime
+import functools
+import re
+import shlex
+from typing import Any, Callable, Dict, List, Set, Tuple
+
+from lib.search import normalize
+
+# field names usable in a query, mapped to the mod data key they filter
+FIELD_ALIASES = {
+    "title": "title",
+    "name": "folder_name",
+    "folder": "folder_name",
+    "type": "content_type",
+    "creator": "creator",
+    "manufacturer": "manufacturer",
+    "version": "version",
+    "game": "minimum_game_version",
+    "enabled": "enabled",
+    "size": "size",
+    "modified": "timestamp",
+    "date": "timestamp",
+}
+
+BOOL_FIELDS = ("enabled",)
+SIZE_FIELDS = ("size",)
+DATE_FIELDS = ("timestamp",)
+VERSION_FIELDS = ("version", "minimum_game_version")
+
+SIZE_UNITS = {
+    "": 1,
+    "B": 1,
+    "KB": 1024,
+    "MB": 1024 ** 2,
+    "GB": 1024 ** 3,
+    "TB": 1024 ** 4,
+}
+
+# optional negation, field name, operator, and value, such as -size>=2GB
+TERM_REGEX = re.compile(r"^(-?)(\w+)(>=|<=|:|=|>|<)(.+)$")
+SIZE_REGEX = re.compile(r"^(\d*\.?\d+)\s*([KMGT]?B?)$", re.IGNORECASE)
+
+# date formats, mapped to the precision of the value they parse
+DATE_FORMATS = (
+    ("%Y-%m-%d %H:%M:%S", "second"),
+    ("%Y-%m-%d %H:%M", "minute"),
+    ("%Y-%m-%d", "day"),
+    ("%Y-%m", "month"),
+    ("%Y", "year"),
+)
+
+
+class QueryError(Exception):
+    """Raised when a value in a query cannot be parsed for its field."""
+
+
+def parse_bool(value: str) -> bool:
+    """Parses a boolean query value."""
+    value = value.lower()
+    if value in ("true", "yes", "y", "1"):
+        return True
+    if value in ("false", "no", "n", "0"):
+        return False
+    raise QueryError(value)
+
+
+def parse_size(value: str) -> int:
+    """Parses a size query value such as 2GB into bytes."""
+    match = SIZE_REGEX.match(value.strip())
+    if not match:
+        raise QueryError(value)
+
+    unit = match.group(2).upper()
+    if unit and not unit.endswith("B"):
+        unit += "B"
+
+    return int(float(match.group(1)) * SIZE_UNITS[unit])
+
+
+def next_date(date: datetime.datetime, precision: str) -> datetime.datetime:
+    """Returns the start of the period after the one a date falls in."""
+    if precision == "year":
+        return date.replace(year=date.year + 1)
+    if precision == "month":
+        if date.month == 12:
+            return date.replace(year=date.year + 1, month=1)
+        return date.replace(month=date.month + 1)
+    if precision == "day":
+        return date + datetime.timedelta(days=1)
+    if precision == "minute":
+        return date + datetime.timedelta(minutes=1)
+    return date + datetime.timedelta(seconds=1)
+
+
+def parse_date(value: str) -> Tuple[float, float]:
+    """Parses a date query value into the start and end timestamps of the
+    period it names. For example, 2021-05 spans the whole of May 2021."""
+    for date_format, precision in DATE_FORMATS:
+        try:
+            date = datetime.datetime.strptime(value, date_format)
+        except ValueError:
+            continue
+
+        return date.timestamp(), next_date(date, precision).timestamp()
+
+    raise QueryError(value)
+
+
+def version_key(value: Any) -> str:
+    """Returns a sortable key for a dotted version string."""
+    # pad each number so they compare correctly as strings
+    return ".".join(
+        part.zfill(10) if part.isdigit() else normalize(part)
+        for part in str(value).split(".")
+    )
+
+
+def number_value(value: Any) -> Any:
+    """Returns a numeric column value, treating missing values as zero."""
+    return value if isinstance(value, (int, float)) else 0
+
+
+def sort_key(key: str, value: Any) -> Any:
+    """Returns a typed sort key for a value of the given mod data key."""
+    if key in SIZE_FIELDS or key in DATE_FIELDS:
+        return number_value(value)
+    if key in VERSION_FIELDS:
+        return version_key(value)
+    if isinstance(value, bool):
+        return int(value)
+    return normalize(value)
+
+
+def build_predicate(key: str, op: str, value: str) -> Callable[[Any], bool]:
+    """Builds a function that tests a single typed column value."""
+    if key in BOOL_FIELDS:
+        target = parse_bool(value)
+        return lambda v: v == target
+
+    coerce = normalize  # type: Callable[[Any], Any]
+
+    if key in SIZE_FIELDS:
+        target = parse_size(value)  # type: Any
+        coerce = number_value
+    elif key in DATE_FIELDS:
+        start, end = parse_date(value)
+        # compare against the whole period the value names
+        if op in (":", "="):
+            return lambda v: start <= number_value(v) < end
+        if op == ">":
+            return lambda v: number_value(v) >= end
+        if op == "<":
+            return lambda v: number_value(v) < start
+        if op == ">=":
+            return lambda v: number_value(v) >= start
+        return lambda v: number_value(v) < end
+    elif key in VERSION_FIELDS and op not in (":", "="):
+        target = version_key(value)
+        coerce = version_key
+    else:
+        target = normalize(value)
+        if op == ":":
+            return lambda v: target in normalize(v)
+
+    if op in (":", "="):
+        return lambda v: coerce(v) == target
+    if op == ">":
+        return lambda v: coerce(v) > target
+    if op == "<":
+        return lambda v: coerce(v) < target
+    if op == ">=":
+        return lambda v: coerce(v) >= target
+    return lambda v: coerce(v) <= target
+
+
+class query:
+    """A search query, split into free text and field filters.
+    For example: type:aircraft enabled:false creator:asobo size>2GB"""
+
+    def __init__(self, text: str, filters: List[Tuple[str, bool, Callable]]) -> None:
+        # free text to search for
+        self.text = text
+        # list of mod data key, if negated, and the predicate to test it with
+        self.filters = filters
+
+    def evaluate(self, columns: Dict[str, list], ids: List[int]) -> Set[int]:
+        """Returns the ids of rows that pass every filter.
+        Each filter is run over a whole column at once."""
+        matches = None  # type: Any
+
+        for key, negate, predicate in self.filters:
+            if key not in columns:
+                continue
+
+            passed = {
+                row_id
+                for row_id, value in zip(ids, columns[key])
+                if predicate(value) != negate
+            }
+
+            matches = passed if matches is None else matches & passed
+
+            if not matches:
+                break
+
+        return set(ids) if matches is None else matches
+
+
+@functools.lru_cache(maxsize=32)
+def parse_query(term: str) -> query:
+    """Parses a search term into a query. Anything that is not a valid
+    field filter is treated as free text."""
+    try:
+        tokens = shlex.split(term)
+    except ValueError:
+        # unbalanced quotes
+        tokens = term.split()
+
+    text = []
+    filters = []
+
+    for token in tokens:
+        match = TERM_REGEX.match(token)
+        if match and match.group(2).lower() in FIELD_ALIASES:
+            negate, field, op, value = match.groups()
+            key = FIELD_ALIASES[field.lower()]
+            try:
+                filters.append((key, bool(negate), build_predicate(key, op, value)))
+                continue
+            except QueryError:
+                pass
+
+        text.append(token)
+
+    return query(" ".join(text), filters)
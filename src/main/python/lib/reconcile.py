@@ -0,0 +1,197 @@
+import concurrent.futures
+import os
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+from loguru import logger
+
+import lib.links as links
+import lib.walker as walker
+
+# states a mod folder can be in
+# linked into the Community folder from a mod library
+LINKED = "linked"
+# a real folder in the Community folder, not managed through a library
+REAL = "real"
+# only in a mod library
+DISABLED = "disabled"
+# a link in the Community folder whose target no longer exists
+ORPHANED = "orphaned"
+# a folder, or a link to a folder, with nothing in it
+EMPTY = "empty"
+# a real folder in the Community folder, with a copy in a mod library
+DUPLICATE = "duplicate"
+# a folder that exists, but cannot be read, such as for lack of permission.
+# Never removed, as there may well be a mod in it
+UNREADABLE = "unreadable"
+# a link to a mod in a library that is not available, such as on a
+# disconnected drive. Left alone, as it works again once the drive is back
+OFFLINE = "offline"
+
+
+class folder_state:
+    """State of a single mod folder."""
+
+    __slots__ = ("name", "state", "path", "link", "install_path")
+
+    def __init__(
+        self, name: str, state: str, path: str, link: bool, install_path: str = ""
+    ) -> None:
+        self.name = name
+        self.state = state
+        self.path = path
+        # if the folder is a symlink or junction
+        self.link = link
+        # for a folder in the Community folder, the copy of it in a mod
+        # library, if it is linked to or duplicated there
+        self.install_path = install_path
+
+    def __repr__(self) -> str:
+        return "folder_state({!r}, {!r})".format(self.path, self.state)
+
+
+class reconciliation:
+    """Result of comparing the Community folder against the mod libraries."""
+
+    def __init__(self) -> None:
+        self.folders = []  # type: List[folder_state]
+
+    def iter_state(self, *states: str) -> Iterator[folder_state]:
+        """Yields the mod folders in any of the given states."""
+        for folder in self.folders:
+            if folder.state in states:
+                yield folder
+
+    def get_mod_folders(self) -> Tuple[List[str], List[str]]:
+        """Returns the folders of all enabled mods, and of all disabled mods.
+        Orphaned links and empty folders are left out, as there is no mod in them."""
+        enabled = []
+        disabled = []
+
+        for folder in self.folders:
+            if folder.state in (LINKED, REAL, DUPLICATE):
+                enabled.append(folder.path)
+            if folder.state == DUPLICATE:
+                # the copy the Community folder does not link to is disabled
+                disabled.append(folder.install_path)
+            elif folder.state == DISABLED:
+                disabled.append(folder.path)
+
+        return (enabled, disabled)
+
+    def counts(self) -> Dict[str, int]:
+        """Returns how many mod folders are in each state."""
+        counts = {}  # type: Dict[str, int]
+        for folder in self.folders:
+            counts[folder.state] = counts.get(folder.state, 0) + 1
+        return counts
+
+
+def scan_entries(folder: str) -> Dict[str, bool]:
+    """Lists a folder once. Returns the names of the directories and links
+    inside of it, mapped to if each is a link."""
+    entries = {}
+
+    try:
+        with os.scandir(folder) as it:
+            for entry in it:
+                link = walker.is_link(entry)
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+
+                # broken links are not directories, but are still of interest
+                if is_dir or link:
+                    entries[entry.name] = link
+    except OSError:
+        logger.warning("Unable to read folder {}".format(folder))
+
+    return entries
+
+
+def check_contents(path: str, link: bool) -> str:
+    """Returns EMPTY if a folder has nothing in it, ORPHANED if it is a link
+    whose target is gone, and UNREADABLE if it cannot be read for any other
+    reason. Returns an empty string if it has contents. Only the first entry is
+    read, however large the folder is."""
+    try:
+        with os.scandir(path) as it:
+            return "" if next(it, None) is not None else EMPTY
+    except FileNotFoundError:
+        # a real folder that is gone since it was listed is left alone
+        return ORPHANED if link else UNREADABLE
+    except OSError:
+        logger.warning("Unable to read folder {}".format(path))
+        return UNREADABLE
+
+
+def classify_install(name: str, path: str, link: bool) -> folder_state:
+    """Classifies a folder in a mod library that is not linked to."""
+    return folder_state(name, check_contents(path, link) or DISABLED, path, link)
+
+
+def is_offline(path: str, offline_folders: Set[str]) -> bool:
+    """Tests if a broken link points into a library that is not available."""
+    try:
+        target = links.read_link(path)
+    except links.LinkError:
+        return False
+    return os.path.dirname(links.normalize(target)) in offline_folders
+
+
+def reconcile(
+    community_folder: str,
+    install_folders: List[str],
+    offline_folders: Iterable[str] = (),
+) -> reconciliation:
+    """Classifies every mod folder in the Community folder and the mod libraries,
+    reading each folder once, all at the same time, and matching names with
+    sets. A mod in more than one library is taken from the first one. Links
+    into libraries that are configured but not available are not orphaned."""
+    offline = {links.normalize(folder) for folder in offline_folders}
+    folders = [community_folder] + install_folders
+    with concurrent.futures.ThreadPoolExecutor(len(folders)) as executor:
+        community, *libraries = executor.map(scan_entries, folders)
+
+    # mod folder name to its path in the first library it is in, and if it
+    # is a link
+    install = {}  # type: Dict[str, Tuple[str, bool]]
+    for install_folder, entries in zip(install_folders, libraries):
+        for name, link in entries.items():
+            if name in install:
+                logger.warning("Mod {} is in more than one library".format(name))
+                continue
+            install[name] = (os.path.join(install_folder, name), link)
+
+    result = reconciliation()
+
+    for name in sorted(community.keys() | install.keys()):
+        install_path, install_link = install.get(name, ("", False))
+
+        if name not in community:
+            result.folders.append(classify_install(name, install_path, install_link))
+            continue
+
+        link = community[name]
+        path = os.path.join(community_folder, name)
+        state = check_contents(path, link)
+        if state == ORPHANED and is_offline(path, offline):
+            state = OFFLINE
+
+        if not state and link:
+            state = LINKED
+        elif not state:
+            state = DUPLICATE if install_path else REAL
+
+        if state in (LINKED, DUPLICATE):
+            result.folders.append(folder_state(name, state, path, link, install_path))
+            continue
+
+        result.folders.append(folder_state(name, state, path, link))
+
+        # nothing usable in the Community folder, so the copy in the mod
+        # library stands on its own
+        if install_path:
+            result.folders.append(classify_install(name, install_path, install_link))
+
+    return result
@@ -0,0 +1,306 @@
+import concurrent.futures
+import os
+import shutil
+from typing import Any, Callable, Dict, List, Tuple, Union
+
+from loguru import logger
+
+import lib.config as config
+import lib.files as files
+import lib.json_backend as json_backend
+import lib.links as links
+import lib.walker as walker
+
+MOVE_PLAN_VERSION = 1
+# number of files copied at once when moving to another drive
+COPY_WORKERS = 4
+# some filesystems, such as FAT, only keep modification times to 2 seconds
+MTIME_TOLERANCE = 2.0
+# suffix of the original of a moved mod, while it is being deleted
+MOVED_EXTENSION = ".moved"
+
+
+class MoveError(Exception):
+    """Raised when a copy of a mod does not match the original, which is then
+    left in place."""
+
+
+class move_plan:
+    """Plan of a move of the mod install folder. Saved before anything is moved,
+    and updated as each mod is done, so an interrupted move can be resumed."""
+
+    def __init__(
+        self,
+        src: str,
+        dest: str,
+        same_volume: bool,
+        mods: List[str],
+        linked: List[str],
+        done: List[str] = None,
+    ) -> None:
+        self.src = src
+        self.dest = dest
+        # if mod folders can be renamed, rather than copied
+        self.same_volume = same_volume
+        # names of the mod folders to move
+        self.mods = mods
+        # names of the links in the Community folder that point into the mod
+        # install folder, and need to point to the new one afterwards
+        self.linked = linked
+        # names of the mod folders that were fully moved
+        self.done = done or []
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the plan as a dictionary, such as for saving to JSON."""
+        return {
+            "version": MOVE_PLAN_VERSION,
+            "src": self.src,
+            "dest": self.dest,
+            "same_volume": self.same_volume,
+            "mods": self.mods,
+            "linked": self.linked,
+            "done": self.done,
+        }
+
+    def save(self) -> None:
+        """Writes the plan to disk."""
+        json_backend.write_file(config.MOVE_PLAN_FILE, self.to_dict())
+
+
+def load_plan() -> Union[move_plan, None]:
+    """Returns the plan of an interrupted move, if there is one."""
+    if not os.path.isfile(config.MOVE_PLAN_FILE):
+        return None
+
+    try:
+        data = json_backend.load_file(config.MOVE_PLAN_FILE)
+    except Exception:
+        logger.exception("Move plan could not be parsed")
+        return None
+
+    if data.get("version") != MOVE_PLAN_VERSION:
+        logger.debug("Move plan version mismatch, ignoring")
+        return None
+
+    return move_plan(
+        data["src"],
+        data["dest"],
+        data["same_volume"],
+        data["mods"],
+        data["linked"],
+        done=data["done"],
+    )
+
+
+def clear_plan() -> None:
+    """Removes the plan of a finished move."""
+    if os.path.isfile(config.MOVE_PLAN_FILE):
+        os.remove(config.MOVE_PLAN_FILE)
+
+
+def is_same_volume(src: str, dest: str) -> bool:
+    """Tests if a folder can be renamed to a new path, rather than copied."""
+    # the destination may not exist yet, so check what it will be created in
+    while not os.path.exists(dest) and os.path.dirname(dest) != dest:
+        dest = os.path.dirname(dest)
+
+    return os.stat(src).st_dev == os.stat(dest).st_dev
+
+
+def make_plan(src: str, dest: str, community_folder: str) -> move_plan:
+    """Plans a move of the mod install folder, and the links that point into it."""
+    src_key = links.normalize(src)
+    linked = [
+        os.path.basename(path)
+        for path, target in links.read_links(community_folder).items()
+        if os.path.dirname(links.normalize(target)) == src_key
+    ]
+
+    return move_plan(
+        src,
+        dest,
+        is_same_volume(src, dest),
+        sorted(files.listdir_dirs(src)),
+        sorted(linked),
+    )
+
+
+def is_copied(src_stats: os.stat_result, dest: str) -> bool:
+    """Tests if a file was already copied by an earlier, interrupted move."""
+    try:
+        dest_stats = os.stat(dest)
+    except OSError:
+        return False
+
+    return (
+        dest_stats.st_size == src_stats.st_size
+        and abs(dest_stats.st_mtime - src_stats.st_mtime) <= MTIME_TOLERANCE
+    )
+
+
+class tally_visitor(walker.visitor):
+    """Counts the files, bytes and linked folders of a folder, to compare a copy
+    with its original."""
+
+    def __init__(self) -> None:
+        self.file_count = 0
+        self.total_size = 0
+        # linked folders, relative to the root of the walk
+        self.links = []  # type: List[str]
+
+    def visit_file(
+        self, entry: os.DirEntry, stats: os.stat_result, rel_folder: str
+    ) -> None:
+        self.file_count += 1
+        self.total_size += stats.st_size
+
+    def visit_link(self, entry: os.DirEntry, rel_folder: str) -> None:
+        self.links.append(os.path.normpath(os.path.join(rel_folder, entry.name)))
+
+    def totals(self) -> Tuple[int, int, int]:
+        """Returns the number of files, bytes and linked folders."""
+        return (self.file_count, self.total_size, len(self.links))
+
+
+def tally(folder: str) -> Tuple[int, int, int]:
+    """Returns the number of files, bytes and linked folders in a folder.
+    Raises if any of it cannot be read."""
+    visitor = tally_visitor()
+    walker.walker(strict=True).walk(folder, [visitor])
+    return visitor.totals()
+
+
+def copy_mod(src: str, dest: str, progress_func: Callable) -> Tuple[int, int, int]:
+    """Copies a mod folder, a number of files at a time. Files that are already
+    in the destination with the same size and date are skipped, so a copy that
+    was interrupted picks up where it left off. Links are recreated rather than
+    followed, and anything that cannot be read raises. The progress function is
+    called with the number of bytes of each file, copied or not. Returns the
+    number of files, bytes and linked folders of the original."""
+
+    def copy(src_file: str, dest_file: str, stats: os.stat_result, link: bool) -> int:
+        if link:
+            links.copy_link(src_file, dest_file)
+        elif not is_copied(stats, dest_file):
+            # copies the modification date as well, once the contents are done
+            shutil.copy2(src_file, dest_file)
+        return stats.st_size
+
+    visitor = tally_visitor()
+
+    with concurrent.futures.ThreadPoolExecutor(COPY_WORKERS) as executor:
+        jobs = []
+
+        for rel_folder, entries in walker.walker(strict=True).iter_folders(
+            src, [visitor]
+        ):
+            dest_folder = os.path.normpath(os.path.join(dest, rel_folder))
+            os.makedirs(dest_folder, exist_ok=True)
+
+            for entry, stats in entries:
+                jobs.append(
+                    executor.submit(
+                        copy,
+                        entry.path,
+                        os.path.join(dest_folder, entry.name),
+                        stats,
+                        walker.is_link(entry),
+                    )
+                )
+
+        for job in concurrent.futures.as_completed(jobs):
+            progress_func(job.result())
+
+    # linked folders are not walked into, so point new links at their targets
+    for rel_link in visitor.links:
+        links.copy_link(os.path.join(src, rel_link), os.path.join(dest, rel_link))
+
+    return visitor.totals()
+
+
+def move_mod(src: str, dest: str, progress_func: Callable = None) -> None:
+    """Moves a single mod folder. Renamed on the same drive, otherwise copied
+    and then deleted. A folder of the same name at the destination is replaced.
+    The original is only deleted once the copy has the same number of files,
+    bytes and links."""
+    src = files.fix_path(src)
+    dest = files.fix_path(dest)
+
+    if is_same_volume(src, os.path.dirname(dest)):
+        files.delete_folder(dest)
+        os.rename(src, dest)
+        return
+
+    expected = copy_mod(src, dest, progress_func or (lambda size: None))
+    copied = tally(dest)
+    if copied != expected:
+        raise MoveError(
+            "Copy of {} has {} files, {} bytes and {} links, {} expected".format(
+                src, *copied, expected
+            )
+        )
+
+    # renamed out of the way first, so the original is either whole, or no
+    # longer where anything looks for it, even if deleting it fails
+    moved = src + MOVED_EXTENSION
+    files.delete_folder(moved)
+    os.rename(src, moved)
+    files.delete_folder(moved)
+
+
+def get_size(folder: str) -> int:
+    """Returns the size of every file in a folder."""
+    visitor = walker.size_visitor()
+    walker.walker().walk(folder, [visitor])
+    return visitor.total_size
+
+
+def run_plan(
+    plan: move_plan, update_func: Callable = None, percent_func: Callable = None
+) -> None:
+    """Moves every mod of a plan that is not done yet. On the same drive, each
+    mod folder is renamed. Otherwise, mods are copied and then deleted."""
+    remaining = [name for name in plan.mods if name not in plan.done]
+    os.makedirs(plan.dest, exist_ok=True)
+
+    total_size = 0
+    if not plan.same_volume:
+        if update_func:
+            update_func("Measuring {} mod(s) to move".format(len(remaining)))
+        total_size = sum(get_size(os.path.join(plan.src, name)) for name in remaining)
+
+    moved_size = 0
+
+    def progress(size: int) -> None:
+        nonlocal moved_size
+        moved_size += size
+        if percent_func and total_size:
+            percent_func((moved_size * 1000 // total_size, 1000))
+
+    for i, name in enumerate(remaining):
+        src_mod = files.fix_path(os.path.join(plan.src, name))
+        dest_mod = files.fix_path(os.path.join(plan.dest, name))
+
+        if update_func:
+            message = "Moving {} ({} of {} mods".format(name, i + 1, len(remaining))
+            if total_size:
+                message += ", {} of {}".format(
+                    files.human_readable_size(moved_size),
+                    files.human_readable_size(total_size),
+                )
+            update_func(message + ")")
+
+        if os.path.isdir(src_mod):
+            move_mod(src_mod, dest_mod, progress)
+        if plan.same_volume and percent_func:
+            percent_func((i + 1, len(remaining)))
+
+        # checkpoint, so a restarted move skips this mod
+        plan.done.append(name)
+        plan.save()
+
+    # leave the old folder behind only if something else is still in it
+    try:
+        os.rmdir(plan.src)
+    except OSError:
+        logger.debug("Old mod install folder {} is not empty".format(plan.src))
@@ -0,0 +1,188 @@
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Set
+
+# minimum fraction of the search term trigrams a row needs to share
+# to be considered a fuzzy match
+FUZZY_THRESHOLD = 0.5
+
+# scores for how well a search term matched a row
+EXACT_SCORE = 3.0
+PREFIX_SCORE = 2.0
+SUBSTRING_SCORE = 1.0
+
+WILDCARD_CHARS = ("*", "?")
+
+
+def normalize(text: str) -> str:
+    """Lower-cases text and strips accents from it."""
+    decomposed = unicodedata.normalize("NFKD", str(text).casefold())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def get_trigrams(text: str) -> Set[str]:
+    """Returns the set of trigrams for every word in a normalized text."""
+    trigrams = set()
+
+    for word in text.split():
+        # pad the word so short words and word boundaries still produce trigrams
+        padded = "  {} ".format(word)
+        trigrams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+
+    return trigrams
+
+
+def wildcard_to_regex(term: str) -> Any:
+    """Converts a wildcard search term into a compiled regular expression."""
+    pattern = "".join(
+        ".*" if c == "*" else "." if c == "?" else re.escape(c) for c in term
+    )
+    return re.compile(pattern)
+
+
+class search_index:
+    """Normalized search index of table rows, keyed by a stable row id.
+    Optionally keeps trigram postings to allow fuzzy matching."""
+
+    def __init__(self, fuzzy: bool = True) -> None:
+        """Initialize the search index."""
+        self.fuzzy = fuzzy
+
+        # row id to normalized row text
+        self.text = {}  # type: Dict[int, str]
+        # row id to set of normalized row words
+        self.words = {}  # type: Dict[int, Set[str]]
+        # row id to trigrams of the row
+        self.trigrams = {}  # type: Dict[int, Set[str]]
+        # trigram to row ids containing it
+        self.postings = defaultdict(set)  # type: Dict[str, Set[int]]
+
+    def add(self, row_id: int, values: Iterable[Any]) -> None:
+        """Adds a row to the index."""
+        text = normalize(" ".join(str(value) for value in values))
+
+        self.text[row_id] = text
+        self.words[row_id] = set(text.split())
+
+        if self.fuzzy:
+            trigrams = get_trigrams(text)
+            self.trigrams[row_id] = trigrams
+            for trigram in trigrams:
+                self.postings[trigram].add(row_id)
+
+    def remove(self, row_id: int) -> None:
+        """Removes a row from the index."""
+        self.text.pop(row_id, None)
+        self.words.pop(row_id, None)
+
+        for trigram in self.trigrams.pop(row_id, ()):
+            postings = self.postings[trigram]
+            postings.discard(row_id)
+            if not postings:
+                del self.postings[trigram]
+
+    def update(self, row_id: int, values: Iterable[Any]) -> None:
+        """Re-indexes a row whose values changed."""
+        self.remove(row_id)
+        self.add(row_id, values)
+
+    def clear(self) -> None:
+        """Removes all rows from the index."""
+        self.text.clear()
+        self.words.clear()
+        self.trigrams.clear()
+        self.postings.clear()
+
+    def score_token(self, row_id: int, token: str) -> float:
+        """Returns how well a single normalized search token matches a row."""
+        if token in self.words[row_id]:
+            return EXACT_SCORE
+
+        if any(word.startswith(token) for word in self.words[row_id]):
+            return PREFIX_SCORE
+
+        return SUBSTRING_SCORE
+
+    def get_candidates(self, tokens: Iterable[str]) -> Iterable[int]:
+        """Returns the row ids that can possibly contain every search token.
+        This uses the trigram postings to skip rows, when they are available."""
+        candidates = None  # type: Any
+
+        if self.fuzzy:
+            for token in tokens:
+                if any(c in token for c in WILDCARD_CHARS):
+                    continue
+
+                # trigrams inside of the token are inside of any word containing it
+                for i in range(len(token) - 2):
+                    postings = self.postings.get(token[i : i + 3], set())
+                    if candidates is None:
+                        candidates = set(postings)
+                    else:
+                        candidates &= postings
+
+        if candidates is None:
+            return list(self.text)
+
+        return candidates
+
+    def search(self, term: str) -> Dict[int, float]:
+        """Returns the ids of rows matching a search term, mapped to a rank score.
+        Every word of the term needs to be in a row. If nothing matches that
+        way, rows sharing enough trigrams with the term are returned instead."""
+        tokens = normalize(term).split()
+
+        if not tokens:
+            return {row_id: 0.0 for row_id in self.text}
+
+        # compile wildcard tokens once, rather than for every row
+        patterns = {
+            token: wildcard_to_regex(token)
+            for token in tokens
+            if any(c in token for c in WILDCARD_CHARS)
+        }
+
+        results = {}
+
+        for row_id in self.get_candidates(tokens):
+            text = self.text[row_id]
+            score = 0.0
+
+            for token in tokens:
+                if token in patterns:
+                    if not patterns[token].search(text):
+                        break
+                    score += SUBSTRING_SCORE
+                elif token in text:
+                    score += self.score_token(row_id, token)
+                else:
+                    break
+            else:
+                results[row_id] = score
+
+        if results or not self.fuzzy:
+            return results
+
+        return self.fuzzy_search(" ".join(tokens))
+
+    def fuzzy_search(self, term: str) -> Dict[int, float]:
+        """Returns the ids of rows sharing enough trigrams with a normalized
+        search term, mapped to the fraction of trigrams shared."""
+        term_trigrams = get_trigrams(term)
+
+        if not term_trigrams:
+            return {}
+
+        # count shared trigrams using the postings,
+        # so rows without anything in common are never visited
+        counts = defaultdict(int)  # type: Dict[int, int]
+        for trigram in term_trigrams:
+            for row_id in self.postings.get(trigram, ()):
+                counts[row_id] += 1
+
+        return {
+            row_id: count / len(term_trigrams)
+            for row_id, count in counts.items()
+            if count / len(term_trigrams) >= FUZZY_THRESHOLD
+        }
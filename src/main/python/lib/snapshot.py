@@ -0,0 +1,49 @@
+import os
+from typing import List
+
+from loguru import logger
+
+import lib.config as config
+import lib.json_backend as json_backend
+from lib.mod_record import mod_record
+
+SNAPSHOT_VERSION = 4
+
+
+def load_mods() -> List[mod_record]:
+    """Loads the last known list of mod data from the snapshot file.
+    Returns an empty list if there is no usable snapshot."""
+    logger.debug("Loading mod snapshot {}".format(config.MOD_SNAPSHOT_FILE))
+
+    if not os.path.isfile(config.MOD_SNAPSHOT_FILE):
+        logger.debug("No mod snapshot found")
+        return []
+
+    try:
+        data = json_backend.load_file(config.MOD_SNAPSHOT_FILE)
+    except Exception:
+        logger.exception("Mod snapshot could not be parsed")
+        return []
+
+    if data.get("version") != SNAPSHOT_VERSION:
+        logger.debug("Mod snapshot version mismatch, ignoring")
+        return []
+
+    try:
+        return [mod_record.from_dict(mod) for mod in data["mods"]]
+    except Exception:
+        logger.exception("Mod snapshot has invalid mod data")
+        return []
+
+
+def save_mods(mods: List[mod_record]) -> None:
+    """Writes the list of mod data to the snapshot file."""
+    logger.debug("Writing mod snapshot {}".format(config.MOD_SNAPSHOT_FILE))
+
+    try:
+        json_backend.write_file(
+            config.MOD_SNAPSHOT_FILE,
+            {"version": SNAPSHOT_VERSION, "mods": [mod.to_dict() for mod in mods]},
+        )
+    except Exception:
+        logger.exception("Mod snapshot could not be written")
@@ -1,5 +1,6 @@
+import time
 from contextlib import contextmanager
-from typing import Callable
+from typing import Any, Callable
 
 import PySide2.QtCore as QtCore
 from loguru import logger
@@ -10,6 +11,7 @@ class base_thread(QtCore.QThread):
 
     activity_update = QtCore.Signal(object)
     percent_update = QtCore.Signal(object)
+    data_update = QtCore.Signal(object)
     finished = QtCore.Signal(object)
     failed = QtCore.Signal(Exception)
 
@@ -29,6 +31,39 @@ class base_thread(QtCore.QThread):
         logger.debug("Thread completed")
 
 
+class batcher:
+    """Collects items and passes them on in batches. A batch is sent once it
+    is full, or once it has been held for too long, so the first items show up
+    quickly even when producing them is slow."""
+
+    def __init__(self, func: Callable, size: int, interval: float) -> None:
+        """Initialize the batcher."""
+        self.func = func
+        self.size = size
+        self.interval = interval
+
+        self.batch = []  # type: list
+        self.last_batch = time.monotonic()
+
+    def add(self, item: Any) -> None:
+        """Adds an item, and sends the batch if it is due."""
+        self.batch.append(item)
+
+        if (
+            len(self.batch) >= self.size
+            or time.monotonic() - self.last_batch >= self.interval
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        """Sends whatever is in the current batch."""
+        if self.batch:
+            self.func(self.batch)
+            self.batch = []
+
+        self.last_batch = time.monotonic()
+
+
 @contextmanager
 def thread_wait(
     finished_signal: QtCore.Signal,
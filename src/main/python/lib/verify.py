@@ -0,0 +1,165 @@
+import hashlib
+import os
+from typing import Dict, List, Tuple, Union
+
+from loguru import logger
+
+import lib.config as config
+import lib.json_backend as json_backend
+import lib.layout as layout
+
+# bytes read from a file at a time when hashing
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class mod_report:
+    """Result of verifying a single mod against its layout.json."""
+
+    __slots__ = (
+        "mod_folder",
+        "missing",
+        "mismatched",
+        "extra",
+        "corrupted",
+        "unreadable",
+    )
+
+    def __init__(self, mod_folder: str) -> None:
+        self.mod_folder = mod_folder
+        # paths listed in the layout that do not exist
+        self.missing = []  # type: List[str]
+        # paths whose size differs from the layout, with the listed and actual size
+        self.mismatched = []  # type: List[Tuple[str, int, int]]
+        # paths that exist but are not listed in the layout
+        self.extra = []  # type: List[str]
+        # paths whose contents changed since they were last hashed,
+        # without their size or date changing
+        self.corrupted = []  # type: List[str]
+        # paths that could not be read while hashing
+        self.unreadable = []  # type: List[str]
+
+    @property
+    def ok(self) -> bool:
+        """If nothing is wrong with the mod."""
+        return not (
+            self.missing
+            or self.mismatched
+            or self.extra
+            or self.corrupted
+            or self.unreadable
+        )
+
+    def describe(self) -> str:
+        """Returns a short description of what is wrong with the mod."""
+        problems = []
+        if self.missing:
+            problems.append("{} file(s) missing".format(len(self.missing)))
+        if self.mismatched:
+            problems.append("{} file(s) wrong size".format(len(self.mismatched)))
+        if self.extra:
+            problems.append("{} file(s) not in layout".format(len(self.extra)))
+        if self.corrupted:
+            problems.append("{} file(s) corrupted".format(len(self.corrupted)))
+        if self.unreadable:
+            problems.append("{} file(s) unreadable".format(len(self.unreadable)))
+
+        return "{}: {}".format(os.path.basename(self.mod_folder), ", ".join(problems))
+
+
+def path_key(path: str) -> str:
+    """Returns a layout path in the form it is compared in. Windows paths are
+    case-insensitive, and the sim does not care about case either."""
+    return os.path.normcase(path.replace("/", os.sep))
+
+
+def compare_stats(
+    report: mod_report,
+    expected: List[layout.layout_entry],
+    actual: List[layout.layout_entry],
+) -> None:
+    """Compares the files of a mod to its layout path by path. Finds files of
+    the layout that are missing or have the wrong size, and files that are not
+    in the layout at all."""
+    actual_sizes = {path_key(entry.path): entry.size for entry in actual}
+    expected_keys = set()
+
+    for entry in expected:
+        key = path_key(entry.path)
+        expected_keys.add(key)
+
+        size = actual_sizes.get(key)
+        if size is None:
+            report.missing.append(entry.path)
+        elif size != entry.size:
+            report.mismatched.append((entry.path, entry.size, size))
+
+    report.extra.extend(
+        entry.path for entry in actual if path_key(entry.path) not in expected_keys
+    )
+
+
+def hash_file(path: str) -> Union[str, None]:
+    """Returns the hash of a file's contents, or None if it cannot be read."""
+    h = hashlib.sha256()
+    try:
+        with open(path, "rb", buffering=0) as f:
+            b = bytearray(HASH_CHUNK_SIZE)
+            mv = memoryview(b)
+            for n in iter(lambda: f.readinto(mv), 0):
+                h.update(mv[:n])
+    except OSError:
+        return None
+
+    return h.hexdigest()
+
+
+def get_hashes_file(mod_folder: str) -> str:
+    """Returns the path of the file the last known hashes of a mod are kept in.
+    Named after the full path of the mod, as mods in different libraries can
+    have the same folder name."""
+    mod_folder = os.path.abspath(mod_folder)
+    path = os.path.normcase(mod_folder)
+    return os.path.join(
+        config.HASHES_FOLDER,
+        "{}-{}.json".format(
+            os.path.basename(mod_folder),
+            hashlib.sha1(path.encode("utf-8")).hexdigest(),
+        ),
+    )
+
+
+def compare_hashes(report: mod_report, actual: List[layout.layout_entry]) -> None:
+    """Hashes every file of a mod, and compares them to the hashes from the last
+    deep verification. A file whose size and date are the same, but whose
+    contents changed, was corrupted. The first deep verification of a mod has
+    nothing to compare to, and only records the hashes. The new hashes are then
+    saved, except for corrupted files, which keep their good hash so they are
+    reported until they are fixed. An intended edit changes the date as well,
+    and is taken as the new baseline."""
+    hashes_file = get_hashes_file(report.mod_folder)
+
+    try:
+        previous = json_backend.load_file(hashes_file)  # type: Dict[str, list]
+    except (OSError, ValueError):
+        previous = {}
+
+    hashes = {}
+
+    for entry in actual:
+        h = hash_file(os.path.join(report.mod_folder, entry.path))
+        if h is None:
+            report.unreadable.append(entry.path)
+            continue
+
+        hashes[entry.path] = [entry.size, entry.date, h]
+
+        last = previous.get(entry.path)
+        if last and last[0] == entry.size and last[1] == entry.date and last[2] != h:
+            report.corrupted.append(entry.path)
+            hashes[entry.path] = last
+
+    try:
+        os.makedirs(config.HASHES_FOLDER, exist_ok=True)
+        json_backend.write_file(hashes_file, hashes)
+    except OSError:
+        logger.exception("Hashes for {} could not be saved".format(report.mod_folder))
@@ -1,6 +1,5 @@
 import ctypes
 import datetime
-import json
 import os
 import sys
 import urllib.request
@@ -11,6 +10,7 @@ from loguru import logger
 
 import lib.config as config
 import lib.files as files
+import lib.json_backend as json_backend
 import lib.thread as thread
 import lib.type_helper as type_helpers
 
@@ -34,8 +34,7 @@ def get_version(appctxt: ApplicationContext) -> str:
     logger.debug("Attemping to determine current application version")
     try:
         logger.debug("Parsing {}".format(appctxt.get_resource("base.json")))
-        with open(appctxt.get_resource("base.json"), "r") as fp:
-            data = json.load(fp)
+        data = json_backend.load_file(appctxt.get_resource("base.json"))
         version = "v{}".format(data["version"])
         logger.debug("Version found: {}".format(version))
         return version
@@ -115,12 +114,11 @@ def check_version(
     # read page contents
     logger.debug("Reading page contents")
     data = page.read()
-    data = data.decode("utf-8")
 
     # parse the json
     try:
         logger.debug("Attemping to parse page contents")
-        parsed_data = json.loads(data)
+        parsed_data = json_backend.loads(data)
         remote_version = parsed_data["tag_name"]
 
         if parsed_data["prerelease"]:
@@ -0,0 +1,268 @@
+import concurrent.futures
+import os
+import stat
+import sys
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from loguru import logger
+
+from lib.file_list import file_list
+
+# number of threads reading directories at once. Directory reads are bound by
+# disk and filesystem latency rather than the GIL, so this is more than cores
+WALK_WORKERS = min(16, (os.cpu_count() or 1) * 2)
+
+FILE_ATTRIBUTE_REPARSE_POINT = 1024
+
+FileEntry = Tuple[os.DirEntry, os.stat_result]
+
+
+def is_link(entry: os.DirEntry) -> bool:
+    """Tests if a directory entry is a symlink, or a directory junction."""
+    if entry.is_symlink():
+        return True
+
+    if sys.platform != "win32":
+        return False
+
+    # junctions are not symlinks as far as Python 3.6 is concerned, but their
+    # attributes come free with the directory scan on Windows
+    try:
+        attributes = entry.stat(follow_symlinks=False).st_file_attributes  # type: ignore
+    except OSError:
+        return False
+
+    return bool(attributes & FILE_ATTRIBUTE_REPARSE_POINT)
+
+
+def scan_folder(
+    folder: str, strict: bool = False
+) -> Tuple[List[os.DirEntry], List[FileEntry]]:
+    """Reads a single directory. Returns the entries of the folders inside of it,
+    and the entries and stats of the files inside of it. Run on a worker thread,
+    so the stat calls happen in parallel as well. If strict, anything that
+    cannot be read raises, rather than being skipped."""
+    folders = []
+    files = []
+
+    try:
+        with os.scandir(folder) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir():
+                        folders.append(entry)
+                        continue
+
+                    stats = entry.stat()
+                except OSError:
+                    # broken links still have a stat of their own
+                    try:
+                        stats = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        if strict:
+                            raise
+                        logger.warning("Unable to stat {}".format(entry.path))
+                        continue
+
+                files.append((entry, stats))
+    except OSError:
+        if strict:
+            raise
+        # like os.walk, skip folders that can't be read
+        logger.warning("Unable to read folder {}".format(folder))
+
+    return (folders, files)
+
+
+class visitor:
+    """Base visitor of a folder walk. Subclasses override the callbacks they
+    need. Callbacks are always run on the thread that started the walk,
+    one at a time, so visitors do not need any locking."""
+
+    def visit_folder(self, entry: os.DirEntry, rel_folder: str) -> bool:
+        """Called for every folder found inside of the folder being walked.
+        Returns False to not descend into it, for this visitor."""
+        return True
+
+    def visit_file(
+        self, entry: os.DirEntry, stats: os.stat_result, rel_folder: str
+    ) -> None:
+        """Called for every file, with its stat and its folder relative to
+        the root of the walk."""
+
+    def visit_link(self, entry: os.DirEntry, rel_folder: str) -> None:
+        """Called for every linked folder, when links are not followed."""
+
+
+class size_visitor(visitor):
+    """Sums the size of every file."""
+
+    def __init__(self) -> None:
+        self.total_size = 0
+
+    def visit_file(
+        self, entry: os.DirEntry, stats: os.stat_result, rel_folder: str
+    ) -> None:
+        self.total_size += stats.st_size
+
+
+class file_list_visitor(visitor):
+    """Builds a compact listing of every file, and of every folder walked."""
+
+    def __init__(self, mtimes: bool = False) -> None:
+        self.files = file_list(mtimes=mtimes)
+        self.files.add_folder(os.curdir)
+
+    def visit_folder(self, entry: os.DirEntry, rel_folder: str) -> bool:
+        if rel_folder == os.curdir:
+            self.files.add_folder(entry.name)
+        else:
+            self.files.add_folder(os.path.join(rel_folder, entry.name))
+        return True
+
+    def visit_file(
+        self, entry: os.DirEntry, stats: os.stat_result, rel_folder: str
+    ) -> None:
+        self.files.add(rel_folder, entry.name, stats.st_size, mtime=stats.st_mtime)
+
+
+class permission_visitor(visitor):
+    """Makes every folder and file writable, so that they can be deleted. Files
+    hard linked from elsewhere are left alone, as their permissions are shared
+    with every link."""
+
+    def visit_folder(self, entry: os.DirEntry, rel_folder: str) -> bool:
+        self.fix(entry)
+        return True
+
+    def visit_file(
+        self, entry: os.DirEntry, stats: os.stat_result, rel_folder: str
+    ) -> None:
+        try:
+            # the stats of a directory entry have no link count on Windows
+            if os.stat(entry.path).st_nlink > 1:
+                return
+        except OSError:
+            pass
+        self.fix(entry)
+
+    def fix(self, entry: os.DirEntry) -> None:
+        """Fixes the permissions of a single entry."""
+        # fix deletion permission https://blog.nathanv.me/posts/python-permission-issue/
+        try:
+            os.chmod(entry.path, stat.S_IWUSR)
+        except OSError:
+            logger.warning("Unable to fix permissions of {}".format(entry.path))
+
+
+class manifest_visitor(visitor):
+    """Finds every folder with a manifest.json file in it."""
+
+    def __init__(self) -> None:
+        self.mod_folders = []  # type: List[str]
+
+    def visit_file(
+        self, entry: os.DirEntry, stats: os.stat_result, rel_folder: str
+    ) -> None:
+        if entry.name == "manifest.json":
+            self.mod_folders.append(os.path.dirname(entry.path))
+
+
+class walker:
+    """Walks a folder tree once for any number of visitors. Directories are read
+    by a pool of threads, with every subfolder found queued as a new job that
+    any idle thread picks up."""
+
+    def __init__(
+        self,
+        workers: int = WALK_WORKERS,
+        follow_links: bool = False,
+        cancel_func: Callable = None,
+        strict: bool = False,
+    ) -> None:
+        self.workers = workers
+        # like os.walk, do not descend into linked folders by default
+        self.follow_links = follow_links
+        # returns True if the walk should stop early
+        self.cancel_func = cancel_func
+        # raise on folders and files that cannot be read, rather than skipping
+        # them, for walks that anything is deleted after
+        self.strict = strict
+
+    def iter_folders(
+        self, root: str, visitors: List[visitor] = None
+    ) -> Iterator[Tuple[str, List[FileEntry]]]:
+        """Walks a folder tree, and yields the folder relative to the root and
+        the file entries of each folder, as soon as they are read. Visitors are
+        called along the way, and may prune subfolders."""
+        active = visitors or []
+
+        with concurrent.futures.ThreadPoolExecutor(self.workers) as executor:
+            # running scans mapped to their relative folder, and the visitors
+            # that still want to see its contents
+            pending = {
+                executor.submit(scan_folder, root, self.strict): (os.curdir, active)
+            }  # type: Any
+
+            try:
+                while pending:
+                    done, _ = concurrent.futures.wait(
+                        pending, return_when=concurrent.futures.FIRST_COMPLETED
+                    )
+
+                    for future in done:
+                        rel_folder, folder_visitors = pending.pop(future)
+                        yield self.visit_scan(
+                            executor, pending, future, rel_folder, folder_visitors
+                        )
+
+                    if self.cancel_func and self.cancel_func():
+                        return
+            finally:
+                # stop queued scans when cancelled or abandoned early
+                for future in pending:
+                    future.cancel()
+
+    def visit_scan(
+        self,
+        executor: concurrent.futures.ThreadPoolExecutor,
+        pending: Dict[concurrent.futures.Future, Tuple[str, List[visitor]]],
+        future: concurrent.futures.Future,
+        rel_folder: str,
+        folder_visitors: List[visitor],
+    ) -> Tuple[str, List[FileEntry]]:
+        """Handles a finished scan of a folder. Its subfolders that are still
+        wanted are queued to be scanned, and its files are passed to the
+        visitors. Returns the relative folder and its file entries."""
+        folders, files = future.result()
+
+        for entry in folders:
+            if not self.follow_links and is_link(entry):
+                for v in folder_visitors:
+                    v.visit_link(entry, rel_folder)
+                continue
+
+            wanted = [
+                v
+                for v in folder_visitors
+                if v.visit_folder(entry, rel_folder) is not False
+            ]
+            # only prune if every visitor did, or there were never any visitors
+            if wanted or not folder_visitors:
+                sub_folder = os.path.join(rel_folder, entry.name)
+                if rel_folder == os.curdir:
+                    sub_folder = entry.name
+
+                job = executor.submit(scan_folder, entry.path, self.strict)
+                pending[job] = (sub_folder, wanted)
+
+        for entry, stats in files:
+            for v in folder_visitors:
+                v.visit_file(entry, stats, rel_folder)
+
+        return (rel_folder, files)
+
+    def walk(self, root: str, visitors: List[visitor]) -> None:
+        """Walks a folder tree, calling every visitor along the way."""
+        for _ in self.iter_folders(root, visitors):
+            pass
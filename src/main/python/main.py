@@ -34,15 +34,18 @@ def main() -> None:
         app_main_window.build()
         app_main_window.set_theme()
 
-        # load data
-        app_main_window.main_widget.find_sim()
-        app_main_window.main_widget.check_version()
-        app_main_window.main_widget.refresh(first=True)
+        # show the last known mods right away
+        app_main_window.main_widget.load_snapshot()
 
         # resize and show
         max_resize(app_main_window, app_main_window.sizeHint())
         app_main_window.show()
 
+        # load data, and revalidate the last known mods in the background
+        app_main_window.main_widget.find_sim()
+        app_main_window.main_widget.check_version()
+        app_main_window.main_widget.refresh(first=True)
+
         # execute the application
         sys.exit(app.exec_())
 
@@ -0,0 +1,215 @@
+from typing import Any, Dict, List
+
+import PySide2.QtCore as QtCore
+
+from lib.query import parse_query
+from lib.search import search_index
+
+# role for the typed value a column is sorted by
+SORT_ROLE = QtCore.Qt.UserRole  # type: ignore
+
+
+class base_model(QtCore.QAbstractTableModel):
+    """Base table model. Data is stored as one list per column,
+    rather than an item object per cell."""
+
+    def __init__(
+        self,
+        headers: List[str],
+        lookup: Dict[str, int],
+        roles: Dict[int, str] = None,
+        searchable: bool = False,
+        hidden: List[str] = None,
+        parent: QtCore.QObject = None,
+    ) -> None:
+        """Initialize table model."""
+        super().__init__(parent)
+        self.headers = headers
+        # column keys, in column order
+        self.keys = [key for key, _ in sorted(lookup.items(), key=lambda i: i[1])]
+        # keys that are stored, but not displayed as a column
+        self.hidden = hidden or []
+        # extra data roles mapped to the column key they return the raw value of
+        self.roles = roles or {}
+
+        # column key to list of values, including hidden keys
+        self.columns = {}  # type: Dict[str, list]
+        for key in self.keys + self.hidden:
+            self.columns[key] = []
+        self.count = 0
+
+        # stable id of each row, which does not shift when rows are removed
+        self.ids = []  # type: List[int]
+        self.next_id = 0
+        # search index of the rows, kept up to date as rows change
+        self.search_index = search_index() if searchable else None
+
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        """Returns the number of rows."""
+        # table models only have children of the root index
+        return 0 if parent.isValid() else self.count
+
+    def columnCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        """Returns the number of columns."""
+        return 0 if parent.isValid() else len(self.keys)
+
+    def headerData(
+        self,
+        section: int,
+        orientation: QtCore.Qt.Orientation,
+        role: int = QtCore.Qt.DisplayRole,  # type: ignore
+    ) -> Any:
+        """Returns the header text for the horizontal header."""
+        if orientation == QtCore.Qt.Horizontal and role == QtCore.Qt.DisplayRole:  # type: ignore
+            return self.headers[section]
+
+        return super().headerData(section, orientation, role)
+
+    def data(
+        self,
+        index: QtCore.QModelIndex,
+        role: int = QtCore.Qt.DisplayRole,  # type: ignore
+    ) -> Any:
+        """Returns the data for a given index and role."""
+        if not index.isValid():
+            return None
+
+        if role == QtCore.Qt.DisplayRole:  # type: ignore
+            key = self.keys[index.column()]
+            return self.display_value(key, self.get_value(index.row(), key))
+
+        if role == SORT_ROLE:
+            key = self.keys[index.column()]
+            return self.sort_value(key, index.row())
+
+        if role in self.roles:
+            return self.get_value(index.row(), self.roles[role])
+
+        return None
+
+    def display_value(self, key: str, value: Any) -> Any:
+        """Returns how a raw value of the given column key is displayed."""
+        # if it's a boolean, convert to string so capitalization
+        # is preserved, which oddly Qt does not do
+        if isinstance(value, bool):
+            return str(value)
+        return value
+
+    def sort_value(self, key: str, row: int) -> Any:
+        """Returns the value a row is sorted by for the given column key."""
+        return self.display_value(key, self.get_value(row, key))
+
+    def get_value(self, row: int, key: str) -> Any:
+        """Returns the raw value of a row for a given column key."""
+        return self.columns[key][row]
+
+    def index_rows(self, start: int) -> None:
+        """Assigns ids to, and indexes, every row from the given row onwards."""
+        new_ids = range(self.next_id, self.next_id + self.count - start)
+        self.ids.extend(new_ids)
+        self.next_id += len(new_ids)
+
+        if self.search_index is not None:
+            for r, row_id in zip(range(start, self.count), new_ids):
+                self.search_index.add(row_id, self.get_row_values(r))
+
+    def get_row_values(self, row: int) -> List[Any]:
+        """Returns the displayed values of a row, in column order."""
+        return [self.display_value(key, self.get_value(row, key)) for key in self.keys]
+
+    def search(self, term: str) -> Dict[int, float]:
+        """Returns the ids of rows matching a search query, mapped to a rank score.
+        Field filters are evaluated over the typed columns, and any free text
+        is looked up in the search index."""
+        parsed = parse_query(term)
+
+        if parsed.text:
+            scores = self.search_index.search(parsed.text)  # type: ignore
+        else:
+            scores = {row_id: 0.0 for row_id in self.ids}
+
+        if parsed.filters:
+            matches = parsed.evaluate(self.columns, self.ids)
+            scores = {
+                row_id: score for row_id, score in scores.items() if row_id in matches
+            }
+
+        return scores
+
+    def set_data(self, data: List[dict]) -> None:
+        """Replaces the entire dataset in a single model reset."""
+        self.beginResetModel()
+
+        self.columns = {key: [row.get(key, "") for row in data] for key in self.columns}
+        self.count = len(data)
+
+        self.ids = []
+        if self.search_index is not None:
+            self.search_index.clear()
+        self.index_rows(0)
+
+        self.endResetModel()
+
+    def append_data(self, data: List[dict]) -> None:
+        """Appends rows to the end of the dataset."""
+        if not data:
+            return
+
+        self.beginInsertRows(
+            QtCore.QModelIndex(), self.count, self.count + len(data) - 1
+        )
+
+        for key, column in self.columns.items():
+            column.extend(row.get(key, "") for row in data)
+
+        start = self.count
+        self.count += len(data)
+        self.index_rows(start)
+
+        self.endInsertRows()
+
+    def update_row(self, row: int, row_data: dict) -> None:
+        """Updates a row in place if any of its values changed."""
+        changed = False
+
+        for key, column in self.columns.items():
+            value = row_data.get(key, "")
+            if column[row] != value:
+                column[row] = value
+                changed = True
+
+        if changed:
+            if self.search_index is not None:
+                self.search_index.update(self.ids[row], self.get_row_values(row))
+
+            self.dataChanged.emit(  # type: ignore
+                self.index(row, 0), self.index(row, len(self.keys) - 1)
+            )
+
+    def remove_row(self, row: int) -> None:
+        """Removes a row from the dataset."""
+        self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+
+        for column in self.columns.values():
+            del column[row]
+
+        if self.search_index is not None:
+            self.search_index.remove(self.ids[row])
+        del self.ids[row]
+
+        self.count -= 1
+
+        self.endRemoveRows()
+
+    def role_changed(self, role: int) -> None:
+        """Notifies views that a role changed for every cell, so they repaint."""
+        if self.count:
+            self.dataChanged.emit(  # type: ignore
+                self.index(0, 0),
+                self.index(self.count - 1, len(self.keys) - 1),
+                [role],
+            )
+
+    def clear(self) -> None:
+        """Removes all rows from the dataset."""
+        self.set_data([])
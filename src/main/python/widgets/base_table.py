@@ -1,9 +1,11 @@
-from typing import List
+from typing import Any, List
 
 import PySide2.QtCore as QtCore
-import PySide2.QtGui as QtGui
 import PySide2.QtWidgets as QtWidgets
 
+from widgets.base_model import SORT_ROLE, base_model
+from widgets.search_proxy import search_proxy
+
 
 class base_table(QtWidgets.QTableView):
     """Base table widget."""
@@ -15,6 +17,7 @@ class base_table(QtWidgets.QTableView):
         # needs to be set by inherited class
         # self.headers = []
         # self.LOOKUP = {}
+        # self.ROLES = {}
 
         self.setSortingEnabled(True)
         self.setAlternatingRowColors(True)
@@ -29,16 +32,21 @@ class base_table(QtWidgets.QTableView):
         self.horizontalHeader().setStretchLastSection(True)
 
         # create data model
-        self.base_model = QtGui.QStandardItemModel(0, len(self.LOOKUP))  # type: ignore
-        # set model headers
-        for i, header in enumerate(self.headers):  # type: ignore
-            self.base_model.setHeaderData(i, QtCore.Qt.Horizontal, header)  # type: ignore
+        self.base_model = self.build_model()
+
+        # current search term
+        self.search_term = ""
+
+        # re-run the search as rows change, so it stays up to date
+        self.base_model.rowsInserted.connect(self.research)  # type: ignore
+        self.base_model.modelReset.connect(self.research)  # type: ignore
+        self.base_model.dataChanged.connect(self.research)  # type: ignore
 
         # proxy model
-        # self.proxy_model = MyProxy()
-        self.proxy_model = QtCore.QSortFilterProxyModel()
+        self.proxy_model = search_proxy()
         self.proxy_model.setSourceModel(self.base_model)
         self.proxy_model.setDynamicSortFilter(True)
+        self.proxy_model.setSortRole(SORT_ROLE)
         self.proxy_model.setFilterKeyColumn(-1)  # all columns
         # proxy model sort settings
         self.proxy_model.setSortCaseSensitivity(QtCore.Qt.CaseInsensitive)  # type: ignore
@@ -47,30 +55,18 @@ class base_table(QtWidgets.QTableView):
         # set table model
         self.setModel(self.proxy_model)
 
-    def set_row(self, row_data: dict) -> None:
-        """Set a row's data."""
-        self.base_model.insertRow(0)
-
-        for col, item in row_data.items():
-            # skip items not in lookup list
-            if col not in self.LOOKUP:  # type: ignore
-                continue
+    def build_model(self) -> base_model:
+        """Creates the source table model. Can be overriden by inherited class."""
+        return base_model(self.headers, self.LOOKUP, roles=self.ROLES)  # type: ignore
 
-            # if it's a boolean, convert to string so capitalization
-            # is preserved, which oddly Qt does not do
-            if isinstance(item, bool):
-                item = str(item)
-
-            self.base_model.setData(self.base_model.index(0, self.LOOKUP[col]), item)  # type: ignore
+    def append_data(self, data: List[dict]) -> None:
+        """Append rows to the end of the table data."""
+        self.base_model.append_data(data)
 
     def set_data(self, data: List[dict], first: bool = False) -> None:
         """Set the table data."""
-        # clear
-        self.clear()
-
-        # set data
-        for row in data:
-            self.set_row(row)
+        # replace all the data at once
+        self.base_model.set_data(data)
 
         # finish
         if first:
@@ -80,11 +76,11 @@ class base_table(QtWidgets.QTableView):
 
     def clear(self) -> None:
         """Clears the source table model."""
-        self.base_model.removeRows(0, self.base_model.rowCount())
+        self.base_model.clear()
 
-    def get_item(self, r: int, c: int) -> QtGui.QStandardItem:
-        """Convience function to get table item."""
-        return self.base_model.item(r, c)
+    def get_value(self, r: int, key: str) -> Any:
+        """Convience function to get the raw value of a table cell."""
+        return self.base_model.get_value(r, key)
 
     def rowCount(self) -> int:
         """Convience proxy function for rowCount like QTableWidget."""
@@ -121,6 +117,22 @@ class base_table(QtWidgets.QTableView):
         ]
 
     def search(self, term: str) -> None:
-        """Filters the proxy model with wildcard expression."""
-        self.proxy_model.setFilterWildcard(term)
-        self.resizeRowsToContents()
+        """Filters and ranks the rows matching the search query."""
+        self.search_term = term
+
+        if self.base_model.search_index is None:
+            # no index to search, fall back to a wildcard expression
+            self.proxy_model.setFilterWildcard(term)
+        elif term:
+            self.proxy_model.set_scores(self.base_model.search(term))
+        else:
+            self.proxy_model.set_scores(None)
+
+    def research(self, *args: Any) -> None:
+        """Re-runs the current search after the rows changed."""
+        # only changes to the displayed text can change the search results
+        if len(args) == 3 and args[2] and QtCore.Qt.DisplayRole not in args[2]:  # type: ignore
+            return
+
+        if self.search_term:
+            self.search(self.search_term)
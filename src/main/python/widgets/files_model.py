@@ -0,0 +1,54 @@
+from typing import Any, List
+
+import PySide2.QtCore as QtCore
+
+from lib.file_list import file_list
+from widgets.base_model import base_model
+
+
+class files_model(base_model):
+    """Table model for mod files, backed by a compact file listing
+    rather than a list of values per column."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """Initialize table model."""
+        super().__init__(*args, **kwargs)
+        self.files = file_list()
+
+    def get_value(self, row: int, key: str) -> Any:
+        """Returns the raw value of a row for a given column key."""
+        if key == "path":
+            return self.files.get_path(row)
+        return self.files.get_size(row)
+
+    def set_data(self, data: List[dict]) -> None:
+        """Replaces the entire dataset in a single model reset."""
+        self.beginResetModel()
+
+        self.files = file_list()
+        for row in data:
+            self.files.add_path(row["path"], row["size"])
+        self.files.pack()
+        self.count = len(self.files)
+
+        self.endResetModel()
+
+    def append_data(self, data: List[dict]) -> None:
+        """Appends rows to the end of the dataset."""
+        if not data:
+            return
+
+        self.beginInsertRows(
+            QtCore.QModelIndex(), self.count, self.count + len(data) - 1
+        )
+
+        # names are packed once every batch is in, as packing copies them all
+        for row in data:
+            self.files.add_path(row["path"], row["size"])
+        self.count = len(self.files)
+
+        self.endInsertRows()
+
+    def pack(self) -> None:
+        """Packs the names of appended files, once no more are coming."""
+        self.files.pack()
@@ -4,6 +4,10 @@ import PySide2.QtGui as QtGui
 import PySide2.QtWidgets as QtWidgets
 
 from widgets.base_table import base_table
+from widgets.files_model import files_model
+
+# number of rows sampled when sizing columns to their contents
+RESIZE_PRECISION = 1000
 
 
 class files_table(base_table):
@@ -21,12 +25,32 @@ class files_table(base_table):
             "size": 1,
         }
 
+        self.ROLES = {}
+
         super().__init__(parent)
         self.parent = parent  # type: ignore
 
+        # mods can have hundreds of thousands of files, so every row has the
+        # same height and columns are sized from a sample of rows, rather than
+        # measuring every single one
+        self.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)  # type: ignore
+        self.horizontalHeader().setResizeContentsPrecision(RESIZE_PRECISION)
+
+    def build_model(self) -> files_model:
+        """Creates the source table model, backed by a compact file listing."""
+        return files_model(self.headers, self.LOOKUP, roles=self.ROLES)
+
+    def pack(self) -> None:
+        """Packs the appended file listing, once every batch has been added."""
+        self.base_model.pack()
+
+    def resize(self) -> None:
+        """Resize the columns."""
+        self.resizeColumnsToContents()
+
     def get_basic_info(self, row_id: int) -> str:
         """Returns path of a given row index."""
-        return self.get_item(row_id, self.LOOKUP["path"]).text()
+        return self.get_value(row_id, "path")
 
     def contextMenuEvent(self, event: Any) -> None:
         """Override default context menu event to provide right-click menu."""
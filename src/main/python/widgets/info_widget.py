@@ -1,5 +1,5 @@
 import os
-from typing import List
+from typing import Any, List, Tuple
 
 import PySide2.QtCore as QtCore
 import PySide2.QtWidgets as QtWidgets
@@ -7,7 +7,8 @@ from fbs_runtime.application_context.PySide2 import ApplicationContext
 
 import lib.files as files
 import lib.resize as resize
-from lib.flight_sim import flight_sim
+from lib.flight_sim import flight_sim, stream_mod_files_thread
+from lib.mod_record import mod_record
 from widgets.files_table import files_table
 
 
@@ -81,32 +82,68 @@ class info_widget(QtWidgets.QWidget):
 
         self.open_folder_button.clicked.connect(self.open_folder)  # type: ignore
 
-    def set_data(self, mod_data: dict, files_data: List[dict]) -> None:
-        """Loads all the data for the widget."""
-        self.setWindowTitle("{} - Info".format(mod_data["folder_name"]))
+        # handle to the background mod files walker
+        self.loader = None
+
+    def set_data(self, mod_data: mod_record) -> None:
+        """Loads all the data for the widget.
+        The files of the mod are walked in a background thread and streamed
+        into the table as they are found."""
+        self.setWindowTitle("{} - Info".format(mod_data.folder_name))
 
         # form data
-        self.content_type_field.setText(mod_data["content_type"])
-        self.title_field.setText(mod_data["title"])
-        self.manufacturer_field.setText(mod_data["manufacturer"])
-        self.creator_field.setText(mod_data["creator"])
-        self.package_version_field.setText(mod_data["version"])
-        self.minimum_game_version_field.setText(mod_data["minimum_game_version"])
+        self.content_type_field.setText(mod_data.content_type)
+        self.title_field.setText(mod_data.title)
+        self.manufacturer_field.setText(mod_data.manufacturer)
+        self.creator_field.setText(mod_data.creator)
+        self.package_version_field.setText(mod_data.version)
+        self.minimum_game_version_field.setText(mod_data.minimum_game_version)
+
+        # misc data to hold onto
+        self.mod_path = mod_data.full_path
 
         # file data
-        self.files_table.set_data(files_data, first=True)
+        self.total_size = 0
+        self.total_size_field.setText("Calculating...")
+
+        self.loader = stream_mod_files_thread(self.flight_sim, self.mod_path)
+        self.loader.data_update.connect(self.add_files)  # type: ignore
+        self.loader.finished.connect(self.files_loaded)  # type: ignore
+        self.loader.start()
+
+    def add_files(self, files_data: List[dict]) -> None:
+        """Adds a batch of files to the table as they are found."""
+        first = self.files_table.rowCount() == 0
+        self.files_table.append_data(files_data)
+
+        if first:
+            # size the widget from the first batch of files
+            self.files_table.sortByColumn(0, QtCore.Qt.AscendingOrder)  # type: ignore
+            self.files_table.resize()
+            resize.max_resize(
+                self,
+                QtCore.QSize(self.sizeHint().width() + 32, self.sizeHint().height()),
+            )
 
-        # resize
-        resize.max_resize(
-            self, QtCore.QSize(self.sizeHint().width() + 32, self.sizeHint().height())
+        self.total_size += sum(file_data["size"] for file_data in files_data)
+        self.total_size_field.setText(
+            "{} (calculating...)".format(files.human_readable_size(self.total_size))
         )
 
-        # misc data to hold onto
-        self.mod_path = mod_data["full_path"]
+    def files_loaded(self, result: Tuple[int, int]) -> None:
+        """Shows the final total size once all files have been walked."""
+        _, self.total_size = result
+        self.total_size_field.setText(files.human_readable_size(self.total_size))
+        self.files_table.pack()
+        self.files_table.resize()
 
-        self.total_size_field.setText(
-            files.human_readable_size(files.get_folder_size(self.mod_path))
-        )
+    def closeEvent(self, event: Any) -> None:
+        """Stops walking the mod files when the widget is closed."""
+        if self.loader is not None and self.loader.isRunning():
+            self.loader.requestInterruption()
+            self.loader.wait()
+
+        super().closeEvent(event)
 
     def open_folder(self) -> None:
         """Opens the folder for the mod."""
@@ -0,0 +1,79 @@
+from typing import Any
+
+import PySide2.QtCore as QtCore
+import PySide2.QtGui as QtGui
+
+import lib.files as files
+from lib.mod_record import format_timestamp
+from lib.query import sort_key
+from widgets.base_model import base_model
+
+# light, disabled
+DISABLED_COLOR = QtGui.QColor(150, 150, 150)  # type: ignore
+# dark, enabled
+DARK_ENABLED_COLOR = QtGui.QColor(255, 255, 255)  # type: ignore
+# light, enabled
+LIGHT_ENABLED_COLOR = QtGui.QColor(0, 0, 0)  # type: ignore
+
+# displayed column keys mapped to the hidden typed key they are sorted by
+SORT_KEYS = {"time_mod": "timestamp"}
+# displayed column keys that are not stored, but formatted from another key
+DERIVED_KEYS = {"time_mod": ("timestamp", format_timestamp)}
+
+
+class main_model(base_model):
+    """Table model for mod summary.
+    Rows are colored based on enabled status and the active theme."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """Initialize table model."""
+        super().__init__(*args, **kwargs)
+        self.dark = False
+
+        for key in DERIVED_KEYS:
+            del self.columns[key]
+
+    def data(
+        self,
+        index: QtCore.QModelIndex,
+        role: int = QtCore.Qt.DisplayRole,  # type: ignore
+    ) -> Any:
+        """Returns the data for a given index and role."""
+        if role == QtCore.Qt.ForegroundRole and index.isValid():  # type: ignore
+            if not self.columns["enabled"][index.row()]:
+                return DISABLED_COLOR
+            elif self.dark:
+                return DARK_ENABLED_COLOR
+            else:
+                return LIGHT_ENABLED_COLOR
+
+        return super().data(index, role)
+
+    def display_value(self, key: str, value: Any) -> Any:
+        """Returns how a raw value of the given column key is displayed."""
+        if key == "size":
+            return files.human_readable_size(value) if value != "" else ""
+
+        return super().display_value(key, value)
+
+    def get_value(self, row: int, key: str) -> Any:
+        """Returns the raw value of a row for a given column key.
+        Derived values are only formatted when asked for."""
+        if key in DERIVED_KEYS:
+            source_key, format_func = DERIVED_KEYS[key]
+            return format_func(self.columns[source_key][row])
+
+        return super().get_value(row, key)
+
+    def sort_value(self, key: str, row: int) -> Any:
+        """Returns the typed value a row is sorted by for the given column key."""
+        key = SORT_KEYS.get(key, key)
+        return sort_key(key, self.columns[key][row])
+
+    def set_dark(self, dark: bool) -> None:
+        """Sets if a dark theme is active, and repaints if that changed."""
+        if dark == self.dark:
+            return
+
+        self.dark = dark
+        self.role_changed(QtCore.Qt.ForegroundRole)  # type: ignore
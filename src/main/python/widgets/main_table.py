@@ -1,10 +1,13 @@
-from typing import Any, Tuple
+from typing import Any, List, Tuple
 
+import PySide2.QtCore as QtCore
 import PySide2.QtGui as QtGui
 import PySide2.QtWidgets as QtWidgets
 
-import lib.type_helper as type_helper
+from lib.flight_sim import mod_changes
+from lib.mod_record import mod_record
 from widgets.base_table import base_table
+from widgets.main_model import main_model
 
 
 class main_table(base_table):
@@ -21,6 +24,7 @@ class main_table(base_table):
             "Minimum Game Version",
             "Enabled",
             "Last Modified",
+            "Size",
         ]
 
         self.LOOKUP = {
@@ -32,36 +36,98 @@ class main_table(base_table):
             "minimum_game_version": 5,
             "enabled": 6,
             "time_mod": 7,
+            "size": 8,
+        }
+
+        # stored for searching and sorting, but not displayed
+        self.HIDDEN = ["manufacturer", "timestamp"]
+
+        self.FOLDER_ROLE = QtCore.Qt.UserRole + 1  # type: ignore
+        self.ENABLED_ROLE = QtCore.Qt.UserRole + 2  # type: ignore
+
+        self.ROLES = {
+            self.FOLDER_ROLE: "folder_name",
+            self.ENABLED_ROLE: "enabled",
         }
 
         super().__init__(parent)
         self.parent = parent  # type: ignore
 
+    def build_model(self) -> main_model:
+        """Creates the source table model, which colors rows by enabled status."""
+        return main_model(
+            self.headers,
+            self.LOOKUP,
+            roles=self.ROLES,
+            searchable=True,
+            hidden=self.HIDDEN,
+        )
+
     def set_colors(self, dark: bool) -> None:
         """Set the colors for the rows, based on being a dark theme or not."""
-        for r in range(self.rowCount()):
-            _, enabled = self.get_basic_info(r)
-            if not enabled:
-                # light, disabled
-                color = QtGui.QColor(150, 150, 150)  # type: ignore
-            elif dark:
-                # dark, enabled
-                color = QtGui.QColor(255, 255, 255)  # type: ignore
+        # colors are computed by the model, so this only triggers a repaint
+        self.base_model.set_dark(dark)
+
+    def update_data(self, data: List[mod_record]) -> None:
+        """Reconciles the table data with the given mod data,
+        only touching rows that were added, removed or changed."""
+        new_data = {(mod.folder_name, mod.enabled): mod for mod in data}
+
+        # go backwards so removing a row does not shift the rows still to be visited
+        for r in reversed(range(self.rowCount())):
+            mod = new_data.pop(self.get_basic_info(r), None)
+
+            if mod is None:
+                self.base_model.remove_row(r)
+            else:
+                self.base_model.update_row(r, mod)
+
+        # whatever is left over is new
+        self.append_data(list(new_data.values()))
+
+    def find_row(self, folder: str, enabled: bool) -> int:
+        """Returns the row index of a mod, or -1 if it is not in the table."""
+        for r, (row_folder, row_enabled) in enumerate(
+            zip(
+                self.base_model.columns["folder_name"],
+                self.base_model.columns["enabled"],
+            )
+        ):
+            if row_folder == folder and row_enabled == enabled:
+                return r
+
+        return -1
+
+    def apply_changes(self, changes: mod_changes) -> None:
+        """Applies a set of mod changes, only touching the affected rows."""
+        for folder, enabled in changes.removed:
+            r = self.find_row(folder, enabled)
+            if r != -1:
+                self.base_model.remove_row(r)
+
+        for mod in changes.changed:
+            # the row is still listed under the previous enabled status
+            r = self.find_row(mod.folder_name, not mod.enabled)
+            if r == -1:
+                r = self.find_row(mod.folder_name, mod.enabled)
+
+            if r != -1:
+                self.base_model.update_row(r, mod)
             else:
-                # light, enabled
-                color = QtGui.QColor(0, 0, 0)  # type: ignore
+                self.append_data([mod])
 
-            for c in range(self.columnCount()):
-                self.get_item(r, c).setForeground(color)  # type: ignore
+        for mod in changes.added:
+            # reinstalling a mod replaces the existing row
+            r = self.find_row(mod.folder_name, mod.enabled)
+            if r != -1:
+                self.base_model.update_row(r, mod)
+            else:
+                self.append_data([mod])
 
     def get_basic_info(self, row_id: int) -> Tuple[str, bool]:
         """Returns folder name and enabled status of a given row index."""
-        name = self.get_item(row_id, self.LOOKUP["folder_name"]).text()
-        enabled = type_helper.str2bool(
-            self.get_item(row_id, self.LOOKUP["enabled"]).text()
-        )
-
-        return (name, enabled)
+        index = self.base_model.index(row_id, 0)
+        return (index.data(self.FOLDER_ROLE), index.data(self.ENABLED_ROLE))
 
     def contextMenuEvent(self, event: Any) -> None:
         """Override default context menu event to provide right-click menu."""
@@ -2,7 +2,7 @@ import datetime
 import os
 import sys
 import webbrowser
-from typing import Any, Callable
+from typing import Any, Callable, List, Union
 
 import PySide2.QtCore as QtCore
 import PySide2.QtGui as QtGui
@@ -17,9 +17,13 @@ import dialogs.warning_dialogs as warning_dialogs
 import lib.config as config
 import lib.files as files
 import lib.flight_sim as flight_sim
+import lib.libraries as libraries
+import lib.resize as resize
+import lib.snapshot as snapshot
 import lib.thread as thread
 import lib.version as version
 from dialogs.version_check_dialog import version_check_dialog
+from lib.mod_record import mod_record
 from widgets.about_widget import about_widget
 from widgets.info_widget import info_widget
 from widgets.main_table import main_table
@@ -27,6 +31,8 @@ from widgets.progress_widget import progress_widget
 from widgets.versions_widget import versions_widget
 
 ARCHIVE_FILTER = "Archives (*.zip *.rar *.tar *.bz2 *.7z)"
+# milliseconds to wait after the last keystroke before searching
+SEARCH_DEBOUNCE = 150
 
 
 class main_widget(QtWidgets.QWidget):
@@ -38,6 +44,19 @@ class main_widget(QtWidgets.QWidget):
         self.parent = parent  # type: ignore
         self.appctxt = appctxt
 
+        # handle to the running background mod parser
+        self.refresher = None
+        # refresh requested while another was running, run once it finishes.
+        # None if there is none, otherwise if it was automated
+        self.queued_refresh = None  # type: Union[bool, None]
+        # if rows were changed while the running refresh was parsing, so its
+        # result is out of date
+        self.refresh_stale = False
+        # if an operation thread of the running action failed
+        self.action_failed = False
+        # handle to the running background dependency and conflict indexer
+        self.indexer = None
+
     def build(self) -> None:
         """Build layout."""
         self.layout = QtWidgets.QGridLayout()  # type: ignore
@@ -66,6 +85,9 @@ class main_widget(QtWidgets.QWidget):
         self.sublayout.addWidget(self.search_label)
 
         self.search_field = QtWidgets.QLineEdit(self)
+        self.search_field.setPlaceholderText(
+            "e.g. type:aircraft enabled:false size>2GB"
+        )
         self.sublayout.addWidget(self.search_field)
 
         self.clear_button = QtWidgets.QPushButton("Clear", self)
@@ -88,7 +110,13 @@ class main_widget(QtWidgets.QWidget):
         self.main_table.doubleClicked.connect(self.info)  # type: ignore
 
         self.clear_button.clicked.connect(self.clear_search)  # type: ignore
-        self.search_field.textChanged.connect(self.search)  # type: ignore
+
+        # wait for the user to stop typing before searching
+        self.search_timer = QtCore.QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE)
+        self.search_timer.timeout.connect(self.search)  # type: ignore
+        self.search_field.textChanged.connect(lambda _: self.search_timer.start())  # type: ignore
 
         # shortcuts
         self.shortcut_delete = QtWidgets.QShortcut(
@@ -170,6 +198,13 @@ class main_widget(QtWidgets.QWidget):
         """Allow user to select new mod install folder."""
         old_install = files.get_mod_install_folder()
 
+        pending = self.flight_sim.get_pending_move()
+        if pending is not None:
+            if question_dialogs.mod_install_folder_resume(self, *pending):
+                self.move_mod_install(*pending)
+                return
+            self.flight_sim.cancel_pending_move()
+
         information_dialogs.mod_install_folder(self)
 
         new_install = QtWidgets.QFileDialog.getExistingDirectory(
@@ -178,12 +213,194 @@ class main_widget(QtWidgets.QWidget):
             dir=os.path.dirname(old_install),
         )
 
+        if not new_install:
+            # cancel if no folder selected
+            return
+
+        if files.check_same_path(old_install, new_install):
+            # cancel if new folder is same as old folder
+            warning_dialogs.mod_install_folder_same(self)
+            return
+
+        if files.check_in_path(new_install, self.flight_sim.get_sim_mod_folder()):
+            # cancel if new folder is in sim packages folder
+            warning_dialogs.mod_install_folder_in_sim_path(self)
+            return
+
+        if not question_dialogs.mod_install_folder_move(self, old_install, new_install):
+            # last sanity check
+            return
+
+        self.move_mod_install(old_install, new_install)
+
+    def add_library(self) -> None:
+        """Allow user to add another mod library, such as on another drive."""
+        new_library = QtWidgets.QFileDialog.getExistingDirectory(
+            parent=self, caption="Select mod library"
+        )
+
+        if not new_library:
+            # cancel if no folder selected
+            return
+
+        for library in libraries.get_libraries():
+            if files.check_same_path(library, new_library):
+                # cancel if it is already a library
+                warning_dialogs.mod_install_folder_same(self)
+                return
+
+        if files.check_in_path(new_library, self.flight_sim.get_sim_mod_folder()):
+            # cancel if new folder is in sim packages folder
+            warning_dialogs.mod_install_folder_in_sim_path(self)
+            return
+
+        libraries.set_extra_libraries(libraries.get_extra_libraries() + [new_library])
+        self.refresh(automated=True)
+
+    def remove_library(self) -> None:
+        """Allow user to stop using a mod library. Its mods are left where they
+        are, so it can be added again later."""
+        extra_libraries = libraries.get_extra_libraries()
+
+        if not extra_libraries:
+            information_dialogs.no_mod_libraries(self)
+            return
+
+        library, ok = QtWidgets.QInputDialog.getItem(
+            self, "Remove Mod Library", "Mod library:", extra_libraries, 0, False
+        )
+
+        if not ok:
+            return
+
+        extra_libraries.remove(library)
+        libraries.set_extra_libraries(extra_libraries)
+        self.flight_sim.clear_mod_cache()
+        self.refresh(automated=True)
+
+    def rebalance_libraries(self) -> None:
+        """Moves mods between libraries following the placement policy."""
+        result = []
+
+        def core(progress: Callable) -> None:
+            # setup rebalancer thread
+            rebalancer = flight_sim.rebalance_libraries_thread(self.flight_sim)
+            rebalancer.activity_update.connect(progress.set_activity)  # type: ignore
+            rebalancer.percent_update.connect(progress.set_percent)  # type: ignore
+
+            def finish(output: tuple) -> None:
+                result.extend(output)
+
+            def failed(err: Exception) -> None:
+                self.base_fail(err, {}, "Failed to rebalance mod libraries")
+
+            # start the thread, with no timeout
+            with thread.thread_wait(
+                rebalancer.finished,
+                timeout=None,
+                finish_func=finish,
+                failed_signal=rebalancer.failed,
+                failed_func=failed,
+                update_signal=rebalancer.activity_update,
+            ):
+                rebalancer.start()
+
+        self.base_action(core)
+
+        if result:
+            moved, errors = result
+            if errors:
+                warning_dialogs.mods_not_moved(self, errors)
+            information_dialogs.mod_libraries_rebalanced(self, moved)
+
+    def pack_disabled_mods(self) -> None:
+        """Packs every disabled mod into an archive."""
+        result = []
+
+        def core(progress: Callable) -> None:
+            # setup packer thread
+            packer = flight_sim.pack_disabled_mods_thread(self.flight_sim)
+            packer.activity_update.connect(progress.set_activity)  # type: ignore
+            packer.percent_update.connect(progress.set_percent)  # type: ignore
+
+            def finish(output: tuple) -> None:
+                result.extend(output)
+
+            def failed(err: Exception) -> None:
+                self.base_fail(err, {}, "Failed to pack disabled mods")
+
+            # start the thread, with no timeout
+            with thread.thread_wait(
+                packer.finished,
+                timeout=None,
+                finish_func=finish,
+                failed_signal=packer.failed,
+                failed_func=failed,
+                update_signal=packer.activity_update,
+            ):
+                packer.start()
+
+        self.base_action(core, refresh=False)
+
+        if result:
+            packed, errors, saved = result
+            if errors:
+                warning_dialogs.mods_not_packed(self, errors)
+            information_dialogs.mods_packed(
+                self, packed, files.human_readable_size(saved)
+            )
+
+    def deduplicate(self) -> None:
+        """Links identical mod files together to free up space."""
+        result = []
+
+        def core(progress: Callable) -> None:
+            # setup deduplicator thread
+            deduplicator = flight_sim.deduplicate_mod_files_thread(self.flight_sim)
+            deduplicator.activity_update.connect(progress.set_activity)  # type: ignore
+            deduplicator.percent_update.connect(progress.set_percent)  # type: ignore
+
+            def finish(output: tuple) -> None:
+                result.extend(output)
+
+            def failed(err: Exception) -> None:
+                self.base_fail(err, {}, "Failed to deduplicate mod files")
+
+            # start the thread, with no timeout
+            with thread.thread_wait(
+                deduplicator.finished,
+                timeout=None,
+                finish_func=finish,
+                failed_signal=deduplicator.failed,
+                failed_func=failed,
+                update_signal=deduplicator.activity_update,
+            ):
+                deduplicator.start()
+
+        self.base_action(core, refresh=False)
+
+        if result:
+            linked, freed, errors = result
+            if errors:
+                warning_dialogs.mod_files_not_deduplicated(self, errors)
+            information_dialogs.mod_files_deduplicated(
+                self, linked, files.human_readable_size(freed)
+            )
+
+    def move_mod_install(self, old_install: str, new_install: str) -> None:
+        """Moves the mod install folder, or resumes an interrupted move."""
+        result = []
+
         def core(progress: Callable) -> None:
             # setup mover thread
             mover = flight_sim.move_mod_install_folder_thread(
                 self.flight_sim, old_install, new_install
             )
             mover.activity_update.connect(progress.set_activity)  # type: ignore
+            mover.percent_update.connect(progress.set_percent)  # type: ignore
+
+            def finish(output: tuple) -> None:
+                result.extend(output)
 
             def failed(err: Exception) -> None:
                 typ = type(err)
@@ -192,44 +409,34 @@ class main_widget(QtWidgets.QWidget):
                 logger.exception("Failed to move mod install folder")
                 error_dialogs.general(self, typ, message)
 
-            # start the thread
+            # start the thread, with no timeout, as large libraries take a while
             with thread.thread_wait(
                 mover.finished,
+                timeout=None,
+                finish_func=finish,
                 failed_signal=mover.failed,
                 failed_func=failed,
                 update_signal=mover.activity_update,
             ):
                 mover.start()
 
+        self.base_action(core)
+
+        if result:
+            _, errors = result
+            if errors:
+                warning_dialogs.mod_links_not_repaired(self, errors)
             # done
             information_dialogs.mod_install_folder_set(self, new_install)
 
-        if not new_install:
-            # cancel if no folder selected
-            return
-
-        if files.check_same_path(old_install, new_install):
-            # cancel if new folder is same as old folder
-            warning_dialogs.mod_install_folder_same(self)
-            return
-
-        if files.check_in_path(new_install, self.flight_sim.get_sim_mod_folder()):
-            # cancel if new folder is in sim packages folder
-            warning_dialogs.mod_install_folder_in_sim_path(self)
-            return
-
-        if not question_dialogs.mod_install_folder_move(self, old_install, new_install):
-            # last sanity check
-            return
-
-        self.base_action(core)
-
     # ======================
     # Inherited Functions
     # ======================
 
     def base_fail(self, error: Exception, mapping: dict, fallback_text: str) -> None:
         """Base thread failure function."""
+        self.action_failed = True
+
         typ = type(error)
         if typ not in mapping:
             logger.error(fallback_text)
@@ -249,8 +456,11 @@ class main_widget(QtWidgets.QWidget):
         empty_check: bool = False,
         empty_val: Any = None,
         refresh: bool = True,
+        changes: flight_sim.mod_changes = None,
     ):
-        """Base function for GUI actions."""
+        """Base function for GUI actions.
+        If a change set is provided, only the rows it affects are updated
+        instead of refreshing all of the data."""
         if empty_check and not empty_val:
             return
 
@@ -270,17 +480,31 @@ class main_widget(QtWidgets.QWidget):
         progress.set_mode(progress.INFINITE)
 
         # execute the core function
+        self.action_failed = False
         core_func(progress)
         progress.close()
 
-        # refresh the data
-        if refresh:
+        # update the data
+        if changes is not None and not self.action_failed:
+            self.apply_changes(changes)
+        elif refresh or changes is not None:
+            # a failed operation may have changed anything along the way
             self.refresh(automated=True)
 
         # cleanup
         if button:
             button.setEnabled(True)
 
+    def apply_changes(self, changes: flight_sim.mod_changes) -> None:
+        """Applies a change set to the table. A refresh that is still running
+        parsed the mods from before the change, so its result is discarded, and
+        the refresh runs again once it is done."""
+        self.main_table.apply_changes(changes)
+
+        if self.refresher is not None and self.refresher.isRunning():
+            self.refresh_stale = True
+            self.queued_refresh = self.queued_refresh is not False
+
     # ======================
     # Version Check
     # ======================
@@ -342,16 +566,14 @@ class main_widget(QtWidgets.QWidget):
             filter=ARCHIVE_FILTER,
         )[0]
 
-        succeeded = []
+        changes = flight_sim.mod_changes()
 
         def core(progress: Callable) -> None:
             # for each archive, try to install it
             for mod_archive in mod_archives:
 
-                def finish(result: list) -> None:
-                    # this function is required as the results will be a list,
-                    # which is not a hashable type
-                    succeeded.extend(result)
+                def finish(result: flight_sim.mod_changes) -> None:
+                    changes.merge(result)
 
                 def failed(err: Exception) -> None:
                     message = str(err)
@@ -400,13 +622,17 @@ class main_widget(QtWidgets.QWidget):
             button=self.install_button,
             empty_check=True,
             empty_val=mod_archives,
+            changes=changes,
         )
 
+        succeeded = [mod.folder_name for mod in changes.added]
+
         if succeeded:
             config.set_key_value(
                 config.LAST_OPEN_FOLDER_KEY, os.path.dirname(mod_archives[0]), path=True
             )
             information_dialogs.mods_installed(self, succeeded)
+            self.warn_conflicts(changes.added)
 
     def install_folder(self) -> None:
         """Installs selected mod folders."""
@@ -418,13 +644,11 @@ class main_widget(QtWidgets.QWidget):
             dir=files.get_last_open_folder(),
         )
 
-        succeeded = []
+        changes = flight_sim.mod_changes()
 
         def core(progress: Callable) -> None:
-            def finish(result: list) -> None:
-                # this function is required as the results will be a list,
-                # which is not a hashable type
-                succeeded.extend(result)
+            def finish(result: flight_sim.mod_changes) -> None:
+                changes.merge(result)
 
             def failed(err: Exception) -> None:
                 message = str(err)
@@ -466,17 +690,40 @@ class main_widget(QtWidgets.QWidget):
             button=self.install_button,
             empty_check=True,
             empty_val=mod_folder,
+            changes=changes,
         )
 
+        succeeded = [mod.folder_name for mod in changes.added]
+
         if succeeded:
             config.set_key_value(
                 config.LAST_OPEN_FOLDER_KEY, os.path.dirname(mod_folder), path=True
             )
             information_dialogs.mods_installed(self, succeeded)
+            self.warn_conflicts(changes.added)
+
+    def check_dependencies(self, selected: List[int], enabling: bool) -> bool:
+        """Asks to confirm enabling mods whose dependencies are not available, or
+        disabling mods that enabled mods depend on. Returns if the user agreed."""
+        info = [self.main_table.get_basic_info(_id) for _id in selected]
+
+        if enabling:
+            names = [folder for folder, enabled in info if not enabled]
+            missing = self.flight_sim.check_enable(names)
+            if missing:
+                return question_dialogs.mod_missing_dependencies(self, missing)
+        else:
+            names = [folder for folder, enabled in info if enabled]
+            dependents = self.flight_sim.check_disable(names)
+            if dependents:
+                return question_dialogs.mod_dependents(self, dependents)
+
+        return True
 
     def uninstall(self) -> None:
         """Uninstalls selected mods."""
         selected = self.main_table.get_selected_rows()
+        changes = flight_sim.mod_changes()
 
         def core(progress: Callable) -> None:
             for i, _id in enumerate(selected):
@@ -496,6 +743,7 @@ class main_widget(QtWidgets.QWidget):
                 # start the thread
                 with thread.thread_wait(
                     uninstaller.finished,
+                    finish_func=changes.merge,
                     failed_signal=uninstaller.failed,
                     failed_func=failed,
                     update_signal=uninstaller.activity_update,
@@ -504,17 +752,24 @@ class main_widget(QtWidgets.QWidget):
 
                 progress.set_percent(i, total=len(selected) - 1)
 
+        def sanity_check() -> bool:
+            if not self.check_dependencies(selected, enabling=False):
+                return False
+            return question_dialogs.mod_delete(self, len(selected))
+
         self.base_action(
             core,
             button=self.uninstall_button,
-            sanity_dialog=lambda: question_dialogs.mod_delete(self, len(selected)),
+            sanity_dialog=sanity_check,
             empty_check=True,
             empty_val=selected,
+            changes=changes,
         )
 
     def enable(self) -> None:
         """Enables selected mods."""
         selected = self.main_table.get_selected_rows()
+        changes = flight_sim.mod_changes()
 
         def core(progress: Callable) -> None:
             for i, _id in enumerate(selected):
@@ -534,6 +789,7 @@ class main_widget(QtWidgets.QWidget):
                 # start the thread
                 with thread.thread_wait(
                     enabler.finished,
+                    finish_func=changes.merge,
                     failed_signal=enabler.failed,
                     failed_func=failed,
                     update_signal=enabler.activity_update,
@@ -543,12 +799,18 @@ class main_widget(QtWidgets.QWidget):
                 progress.set_percent(i, total=len(selected) - 1)
 
         self.base_action(
-            core, button=self.enable_button, empty_check=True, empty_val=selected
+            core,
+            button=self.enable_button,
+            sanity_dialog=lambda: self.check_dependencies(selected, enabling=True),
+            empty_check=True,
+            empty_val=selected,
+            changes=changes,
         )
 
     def disable(self) -> None:
         """Disables selected mods."""
         selected = self.main_table.get_selected_rows()
+        changes = flight_sim.mod_changes()
 
         def core(progress: Callable) -> None:
             for i, _id in enumerate(selected):
@@ -568,6 +830,7 @@ class main_widget(QtWidgets.QWidget):
                 # start the thread
                 with thread.thread_wait(
                     disabler.finished,
+                    finish_func=changes.merge,
                     failed_signal=disabler.failed,
                     failed_func=failed,
                     update_signal=disabler.activity_update,
@@ -577,7 +840,12 @@ class main_widget(QtWidgets.QWidget):
                 progress.set_percent(i, total=len(selected) - 1)
 
         self.base_action(
-            core, button=self.disable_button, empty_check=True, empty_val=selected
+            core,
+            button=self.disable_button,
+            sanity_dialog=lambda: self.check_dependencies(selected, enabling=False),
+            empty_check=True,
+            empty_val=selected,
+            changes=changes,
         )
 
     def create_backup(self) -> None:
@@ -647,52 +915,422 @@ class main_widget(QtWidgets.QWidget):
                 # this will always be opening a folder and therefore is safe
                 os.startfile(os.path.dirname(archive))  # nosec
 
+    def generate_layouts(self) -> None:
+        """Rebuilds the layout.json of every mod whose files no longer match it."""
+        result = []
+
+        def core(progress: Callable) -> None:
+            # setup generator thread
+            generator = flight_sim.generate_mod_layouts_thread(self.flight_sim)
+            generator.activity_update.connect(progress.set_activity)  # type: ignore
+            generator.percent_update.connect(progress.set_percent)  # type: ignore
+
+            def finish(output: tuple) -> None:
+                result.extend(output)
+
+            def failed(err: Exception) -> None:
+                self.base_fail(err, {}, "Failed to generate mod layouts")
+
+            # start the thread, with no timeout
+            with thread.thread_wait(
+                generator.finished,
+                timeout=None,
+                finish_func=finish,
+                failed_signal=generator.failed,
+                failed_func=failed,
+                update_signal=generator.activity_update,
+            ):
+                generator.start()
+
+        self.base_action(core, refresh=False)
+
+        if result:
+            rewritten, errors = result
+            if errors:
+                warning_dialogs.mod_layouts(self, errors)
+            information_dialogs.mod_layouts_generated(self, rewritten)
+
+    def clean_mod_folders(self) -> None:
+        """Removes orphaned links and empty folders left behind in the mod folders,
+        once the user has seen the list and agreed."""
+        found = []
+
+        def find(progress: Callable) -> None:
+            # setup cleanup finder thread
+            finder = flight_sim.find_mod_folder_cleanup_thread(self.flight_sim)
+            progress.set_activity("Checking mod folders")
+
+            def finish(output: tuple) -> None:
+                found.extend(output)
+
+            def failed(err: Exception) -> None:
+                self.base_fail(err, {}, "Failed to check mod folders")
+
+            # start the thread, with no timeout
+            with thread.thread_wait(
+                finder.finished,
+                timeout=None,
+                finish_func=finish,
+                failed_signal=finder.failed,
+                failed_func=failed,
+            ):
+                finder.start()
+
+        self.base_action(find, refresh=False)
+
+        if not found:
+            return
+
+        folders, duplicates, unreadable = found
+        if duplicates:
+            warning_dialogs.mod_duplicates(self, duplicates)
+        if unreadable:
+            warning_dialogs.mod_folders_unreadable(self, unreadable)
+
+        if not folders:
+            information_dialogs.mod_folders_cleaned(self, [])
+            return
+
+        if not question_dialogs.mod_folders_clean(
+            self, ["{} ({})".format(folder.path, folder.state) for folder in folders]
+        ):
+            return
+
+        result = []
+
+        def core(progress: Callable) -> None:
+            # setup cleaner thread
+            cleaner = flight_sim.clean_mod_folders_thread(self.flight_sim, folders)
+            cleaner.activity_update.connect(progress.set_activity)  # type: ignore
+            cleaner.percent_update.connect(progress.set_percent)  # type: ignore
+
+            def finish(output: tuple) -> None:
+                result.extend(output)
+
+            def failed(err: Exception) -> None:
+                self.base_fail(err, {}, "Failed to clean up mod folders")
+
+            # start the thread, with no timeout
+            with thread.thread_wait(
+                cleaner.finished,
+                timeout=None,
+                finish_func=finish,
+                failed_signal=cleaner.failed,
+                failed_func=failed,
+                update_signal=cleaner.activity_update,
+            ):
+                cleaner.start()
+
+        self.base_action(core, refresh=False)
+
+        if result:
+            removed, errors = result
+            if errors:
+                warning_dialogs.mod_folders_not_cleaned(self, errors)
+            information_dialogs.mod_folders_cleaned(self, removed)
+
+    def audit_links(self) -> None:
+        """Checks the links of enabled mods, and offers to repair those that point
+        to the wrong place."""
+        reports = []
+
+        def audit(progress: Callable) -> None:
+            # setup auditor thread
+            auditor = flight_sim.audit_mod_links_thread(self.flight_sim)
+            progress.set_activity("Checking mod links")
+
+            def failed(err: Exception) -> None:
+                self.base_fail(err, {}, "Failed to check mod links")
+
+            # start the thread, with no timeout
+            with thread.thread_wait(
+                auditor.finished,
+                timeout=None,
+                finish_func=reports.extend,
+                failed_signal=auditor.failed,
+                failed_func=failed,
+            ):
+                auditor.start()
+
+        self.base_action(audit, refresh=False)
+
+        if not reports:
+            information_dialogs.mod_links_ok(self)
+            return
+
+        found = [
+            "{}: {}".format(
+                os.path.basename(report.path),
+                "points to {}".format(report.target) if report.target else "unreadable",
+            )
+            for report in reports
+        ]
+        repairable = [report for report in reports if report.repair_target]
+
+        if not repairable:
+            warning_dialogs.mod_links(self, found)
+            return
+
+        if not question_dialogs.mod_links_repair(self, found, len(repairable)):
+            return
+
+        result = []
+
+        def repair(progress: Callable) -> None:
+            # setup repairer thread
+            repairer = flight_sim.repair_mod_links_thread(self.flight_sim, repairable)
+            repairer.activity_update.connect(progress.set_activity)  # type: ignore
+            repairer.percent_update.connect(progress.set_percent)  # type: ignore
+
+            def finish(output: tuple) -> None:
+                result.extend(output)
+
+            def failed(err: Exception) -> None:
+                self.base_fail(err, {}, "Failed to repair mod links")
+
+            # start the thread, with no timeout
+            with thread.thread_wait(
+                repairer.finished,
+                timeout=None,
+                finish_func=finish,
+                failed_signal=repairer.failed,
+                failed_func=failed,
+                update_signal=repairer.activity_update,
+            ):
+                repairer.start()
+
+        self.base_action(repair)
+
+        if result:
+            repaired, errors = result
+            if errors:
+                warning_dialogs.mod_links_not_repaired(self, errors)
+            information_dialogs.mod_links_repaired(self, repaired)
+
+    def warn_conflicts(self, mods: List[mod_record]) -> None:
+        """Warns if newly installed mods provide the same files as enabled mods."""
+        found = []
+
+        for mod in mods:
+            try:
+                conflicts = self.flight_sim.get_mod_conflicts(mod.full_path)
+            except Exception:
+                logger.exception("Failed to find conflicts of {}".format(mod.full_path))
+                continue
+
+            if conflicts:
+                others = sorted(
+                    {other for names in conflicts.values() for other in names}
+                )
+                found.append(
+                    "{}: {} file(s) also in {}".format(
+                        mod.folder_name, len(conflicts), ", ".join(others)
+                    )
+                )
+
+        try:
+            overrides = self.flight_sim.get_official_overrides(
+                {mod.folder_name for mod in mods if mod.enabled}
+            )
+        except Exception:
+            logger.exception("Failed to find official packages replaced by mods")
+            overrides = {}
+
+        found.extend(
+            "{}: replaces official package version {}".format(name, version)
+            for name, version in sorted(overrides.items())
+        )
+
+        if found:
+            warning_dialogs.mod_conflicts(self, found)
+
+    def conflicts(self) -> None:
+        """Shows which enabled mods provide the same files."""
+        result = {}  # type: dict
+        overrides = {}  # type: dict
+
+        def core(progress: Callable) -> None:
+            # setup conflict finder thread
+            finder = flight_sim.get_all_conflicts_thread(self.flight_sim)
+            progress.set_activity("Finding mods that provide the same files")
+
+            def finish(output: tuple) -> None:
+                result.update(output[0])
+                overrides.update(output[1])
+
+            def failed(err: Exception) -> None:
+                self.base_fail(err, {}, "Failed to find mod conflicts")
+
+            # start the thread, with no timeout
+            with thread.thread_wait(
+                finder.finished,
+                timeout=None,
+                finish_func=finish,
+                failed_signal=finder.failed,
+                failed_func=failed,
+            ):
+                finder.start()
+
+        self.base_action(core, refresh=False)
+
+        found = [
+            "{}: shares files with {}".format(
+                name,
+                ", ".join(
+                    "{} ({})".format(other, count)
+                    for other, count in sorted(result[name].items())
+                ),
+            )
+            for name in sorted(result)
+        ]
+        found.extend(
+            "{}: replaces official package version {}".format(name, version)
+            for name, version in sorted(overrides.items())
+        )
+
+        if found:
+            warning_dialogs.mod_conflicts(self, found)
+        else:
+            information_dialogs.no_mod_conflicts(self)
+
+    def verify(self, deep: bool = False) -> None:
+        """Checks every mod for missing or damaged files."""
+        result = []
+
+        def core(progress: Callable) -> None:
+            # setup verifier thread
+            verifier = flight_sim.verify_mods_thread(self.flight_sim, deep=deep)
+            verifier.activity_update.connect(progress.set_activity)  # type: ignore
+            verifier.percent_update.connect(progress.set_percent)  # type: ignore
+
+            def finish(output: tuple) -> None:
+                result.extend(output)
+
+            def failed(err: Exception) -> None:
+                self.base_fail(err, {}, "Failed to verify mods")
+
+            # start the thread, with no timeout
+            with thread.thread_wait(
+                verifier.finished,
+                timeout=None,
+                finish_func=finish,
+                failed_signal=verifier.failed,
+                failed_func=failed,
+                update_signal=verifier.activity_update,
+            ):
+                verifier.start()
+
+        self.base_action(core, refresh=False)
+
+        if result:
+            reports, errors = result
+            if errors:
+                warning_dialogs.mod_layout_parsing(self, errors)
+            if reports:
+                warning_dialogs.mods_damaged(
+                    self, [report.describe() for report in reports]
+                )
+            else:
+                information_dialogs.mods_verified(self, deep=deep)
+
+    def load_snapshot(self) -> None:
+        """Populates the table with the last known mod data, if there is any."""
+        mods = snapshot.load_mods()
+
+        if not mods:
+            return
+
+        self.main_table.append_data(mods)
+        self.main_table.sortByColumn(0, QtCore.Qt.AscendingOrder)  # type: ignore
+        self.main_table.resize()
+
     def refresh(self, first: bool = False, automated: bool = False) -> None:
         """Refreshes all mod data."""
 
-        """This is not a separate thread, as the time it takes to parse each manifest
-        is so low, that the GUI will easily stay responsive, even running in
-        the foreground thread. I believe Windows gives applications around
-        4 seconds to respond to incoming events before being marked as unresponsive,
-        which should never happen in the process of parsing manifest.json files"""
+        """Mods are parsed in a background thread. If the table is empty,
+        mods are streamed into it in batches as they are parsed, so it fills in
+        progressively. Otherwise, the existing rows stay usable while parsing
+        and only the differences are applied once it is done."""
 
-        def core(progress: Callable) -> None:
+        if self.refresher is not None and self.refresher.isRunning():
+            # a refresh is already in progress, so run another once it is done,
+            # as it may not see the changes this one was requested for. A human
+            # request wins, as it clears the mod cache
+            self.queued_refresh = automated and self.queued_refresh is not False
+            return
+
+        self.refresh_button.setEnabled(False)
+
+        # clear mod cache if a human clicked the button
+        if not automated:
+            self.flight_sim.clear_mod_cache()
+
+        stream = self.main_table.rowCount() == 0
+        self.refresh_stale = False
+
+        if stream:
             # temporarily clear search so that header resizing doesn't get borked
             self.search(override="")
 
-            progress.set_mode(progress.PERCENT)
+        def finish(result: tuple) -> None:
+            all_mods_data, all_mods_errors = result
 
-            def update(message: str, percent: int, total: int) -> None:
-                progress.set_activity(message)
-                progress.set_percent(percent, total)
-                # make sure the progress bar gets updated.
-                self.appctxt.app.processEvents()
+            if self.refresh_stale:
+                logger.debug("Mods changed during refresh, discarding its result")
+            elif not stream:
+                self.search(override="")
+                self.main_table.update_data(all_mods_data)
 
-            # clear mod cache if a human clicked the button
-            if not automated:
-                self.flight_sim.clear_mod_cache()
+            if first:
+                self.main_table.sortByColumn(0, QtCore.Qt.AscendingOrder)  # type: ignore
 
-            # build list of mods
-            all_mods_data, all_mods_errors = self.flight_sim.get_all_mods(
-                progress_func=update
-            )
+            self.main_table.resize()
+
+            if first and stream:
+                # the window was sized before any data was loaded
+                resize.max_resize(self.parent, self.parent.sizeHint())
 
-            # set data
-            self.main_table.set_data(all_mods_data, first=first)
-            self.main_table.set_colors(self.parent.theme_menu_action.isChecked())
+            # put the search back to how it was
+            self.search()
+            self.refresh_button.setEnabled(True)
 
             # display errors
             if all_mods_errors:
                 warning_dialogs.mod_parsing(self, all_mods_errors)
 
-            # put the search back to how it was
-            self.search()
+            # keep the dependency graph and conflict index up to date
+            # in the background
+            if self.indexer is None or not self.indexer.isRunning():
+                self.indexer = flight_sim.update_indexes_thread(self.flight_sim)
+                self.indexer.failed.connect(  # type: ignore
+                    lambda err: logger.error("Failed to index mods: {}", err)
+                )
+                self.indexer.start()
 
-        self.base_action(
-            core,
-            button=self.refresh_button,
-            refresh=False,
-        )
+            self.run_queued_refresh()
+
+        def failed(err: Exception) -> None:
+            self.refresh_button.setEnabled(True)
+            self.base_fail(err, {}, "Failed to refresh mods")
+            self.run_queued_refresh()
+
+        # setup parser thread
+        self.refresher = flight_sim.get_all_mods_thread(self.flight_sim, stream=stream)
+        self.refresher.data_update.connect(self.main_table.append_data)  # type: ignore
+        self.refresher.finished.connect(finish)  # type: ignore
+        self.refresher.failed.connect(failed)  # type: ignore
+
+        # start the thread, without waiting on it
+        self.refresher.start()
+
+    def run_queued_refresh(self) -> None:
+        """Runs the refresh requested while the last one was running, if any."""
+        if self.queued_refresh is None:
+            return
+
+        automated = self.queued_refresh
+        self.queued_refresh = None
+        self.refresh(automated=automated)
 
     # ======================
     # Child Widgets
@@ -711,11 +1349,8 @@ class main_widget(QtWidgets.QWidget):
         mod_folder = self.flight_sim.get_mod_folder(folder, enabled)
 
         wid = info_widget(self.flight_sim, self, self.appctxt)
-        wid.set_data(
-            self.flight_sim.parse_mod_manifest(mod_folder),
-            self.flight_sim.parse_mod_files(mod_folder),
-        )
         wid.show()
+        wid.set_data(self.flight_sim.parse_mod_manifest(mod_folder))
 
         # self.info_button.setEnabled(True)
 
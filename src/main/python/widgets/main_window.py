@@ -5,7 +5,9 @@ import PySide2.QtGui as QtGui
 import PySide2.QtWidgets as QtWidgets
 from fbs_runtime.application_context.PySide2 import ApplicationContext
 
+import lib.cold_storage as cold_storage
 import lib.files as files
+import lib.libraries as libraries
 from lib.config import CONFIG_FILE, DEBUG_LOG
 from lib.theme import get_theme, set_theme
 from lib.version import get_version
@@ -83,6 +85,66 @@ class main_window(QtWidgets.QMainWindow):
         menu_action.triggered.connect(self.main_widget.select_mod_install)  # type: ignore
         edit_menu.addAction(menu_action)  # type: ignore
 
+        menu_action = QtWidgets.QAction("Add Mod Library", self)
+        menu_action.triggered.connect(self.main_widget.add_library)  # type: ignore
+        edit_menu.addAction(menu_action)  # type: ignore
+
+        menu_action = QtWidgets.QAction("Remove Mod Library", self)
+        menu_action.triggered.connect(self.main_widget.remove_library)  # type: ignore
+        edit_menu.addAction(menu_action)  # type: ignore
+
+        policy_menu = edit_menu.addMenu("Mod Placement")
+        policy_group = QtWidgets.QActionGroup(self)
+        policy = libraries.get_policy()
+
+        for key, name in (
+            (libraries.MANUAL, "Main Mod Install Folder"),
+            (libraries.FREE_SPACE, "Most Free Space"),
+            (libraries.FASTEST, "Fastest Drive"),
+        ):
+            menu_action = QtWidgets.QAction(name, self, checkable=True)  # type: ignore
+            menu_action.setChecked(key == policy)
+            menu_action.triggered.connect(  # type: ignore
+                lambda checked, key=key: libraries.set_policy(key)
+            )
+            policy_group.addAction(menu_action)  # type: ignore
+            policy_menu.addAction(menu_action)  # type: ignore
+
+        menu_action = QtWidgets.QAction("Rebalance Mod Libraries", self)
+        menu_action.triggered.connect(self.main_widget.rebalance_libraries)  # type: ignore
+        edit_menu.addAction(menu_action)  # type: ignore
+
+        edit_menu.addSeparator()
+
+        menu_action = QtWidgets.QAction(
+            "Pack Mods When Disabled", self, checkable=True  # type: ignore
+        )
+        menu_action.setChecked(cold_storage.is_enabled())
+        menu_action.triggered.connect(cold_storage.set_enabled)  # type: ignore
+        edit_menu.addAction(menu_action)  # type: ignore
+
+        menu_action = QtWidgets.QAction("Pack Disabled Mods", self)
+        menu_action.triggered.connect(self.main_widget.pack_disabled_mods)  # type: ignore
+        edit_menu.addAction(menu_action)  # type: ignore
+
+        menu_action = QtWidgets.QAction("Deduplicate Mod Files", self)
+        menu_action.triggered.connect(self.main_widget.deduplicate)  # type: ignore
+        edit_menu.addAction(menu_action)  # type: ignore
+
+        edit_menu.addSeparator()
+
+        menu_action = QtWidgets.QAction("Regenerate Mod Layouts", self)
+        menu_action.triggered.connect(self.main_widget.generate_layouts)  # type: ignore
+        edit_menu.addAction(menu_action)  # type: ignore
+
+        menu_action = QtWidgets.QAction("Clean Up Mod Folders", self)
+        menu_action.triggered.connect(self.main_widget.clean_mod_folders)  # type: ignore
+        edit_menu.addAction(menu_action)  # type: ignore
+
+        menu_action = QtWidgets.QAction("Repair Mod Links", self)
+        menu_action.triggered.connect(self.main_widget.audit_links)  # type: ignore
+        edit_menu.addAction(menu_action)  # type: ignore
+
         info_menu = main_menu.addMenu("Info")
 
         menu_action = QtWidgets.QAction("Refresh Mods", self)
@@ -93,6 +155,22 @@ class main_window(QtWidgets.QMainWindow):
         menu_action.triggered.connect(self.main_widget.info)  # type: ignore
         info_menu.addAction(menu_action)  # type: ignore
 
+        info_menu.addSeparator()
+
+        menu_action = QtWidgets.QAction("File Conflicts", self)
+        menu_action.triggered.connect(self.main_widget.conflicts)  # type: ignore
+        info_menu.addAction(menu_action)  # type: ignore
+
+        menu_action = QtWidgets.QAction("Verify Mods", self)
+        menu_action.triggered.connect(lambda: self.main_widget.verify())  # type: ignore
+        info_menu.addAction(menu_action)  # type: ignore
+
+        menu_action = QtWidgets.QAction("Verify Mods (Check Contents)", self)
+        menu_action.triggered.connect(  # type: ignore
+            lambda: self.main_widget.verify(deep=True)
+        )
+        info_menu.addAction(menu_action)  # type: ignore
+
         help_menu = main_menu.addMenu("Help")
 
         menu_action = QtWidgets.QAction("About", self)
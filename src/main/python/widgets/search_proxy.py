@@ -0,0 +1,43 @@
+from typing import Dict
+
+import PySide2.QtCore as QtCore
+
+
+class search_proxy(QtCore.QSortFilterProxyModel):
+    """Proxy model that filters and ranks rows by precomputed search scores,
+    rather than evaluating an expression against every cell."""
+
+    def __init__(self, parent: QtCore.QObject = None) -> None:
+        """Initialize proxy model."""
+        super().__init__(parent)
+        # row id to search score, or None if no search is active
+        self.scores = None  # type: Dict[int, float]
+
+    def set_scores(self, scores: Dict[int, float] = None) -> None:
+        """Sets the search scores of the matching rows, and refilters."""
+        self.scores = scores
+        self.invalidate()
+
+    def filterAcceptsRow(
+        self, source_row: int, source_parent: QtCore.QModelIndex
+    ) -> bool:
+        """Only accepts rows that matched the search."""
+        if self.scores is None:
+            return super().filterAcceptsRow(source_row, source_parent)
+
+        return self.sourceModel().ids[source_row] in self.scores  # type: ignore
+
+    def lessThan(self, left: QtCore.QModelIndex, right: QtCore.QModelIndex) -> bool:
+        """Sorts better search matches first, and otherwise by column."""
+        if self.scores:
+            ids = self.sourceModel().ids  # type: ignore
+            left_score = self.scores.get(ids[left.row()], 0.0)
+            right_score = self.scores.get(ids[right.row()], 0.0)
+
+            if left_score != right_score:
+                # keep the best matches on top no matter the sort order
+                if self.sortOrder() == QtCore.Qt.DescendingOrder:  # type: ignore
+                    return left_score < right_score
+                return left_score > right_score
+
+        return super().lessThan(left, right)